@@ -1,23 +1,93 @@
+import os
 import sys
+import time
+
+# 程序启动时间，用于统计从启动到显示第一帧的耗时
+APP_START_TIME = time.perf_counter()
+
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QVBoxLayout,
                              QHBoxLayout, QWidget, QLabel, QCheckBox, QMessageBox,
-                             QProgressBar)
-from PyQt5.QtCore import Qt, QTimer, QThread
+                             QProgressBar, QLineEdit)
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
 from PyQt5.QtGui import QImage, QPixmap
-import cv2
-import numpy as np
 
-from mouth_detector import MouthDetector
-from video_thread import VideoThread
+from calibration_store import CalibrationStore
+
+# mediapipe / cv2 较重，由 BackgroundLoader 在后台线程中导入，窗口可以先显示出来
+
+# 视频显示区域的尺寸（宽, 高）
+VIDEO_DISPLAY_SIZE = (640, 480)
+
+# 进度条样式只解析这两种，未达到最大值时为红色，达到后为绿色
+PROGRESS_STYLE_TEMPLATE = """
+    QProgressBar {
+        border: 2px solid grey;
+        border-radius: 5px;
+        text-align: center;
+        background-color: #f0f0f0;
+    }
+    QProgressBar::chunk {
+        background-color: %s;
+    }
+"""
+PROGRESS_STYLES = {
+    False: PROGRESS_STYLE_TEMPLATE % 'red',
+    True: PROGRESS_STYLE_TEMPLATE % '#4CAF50'
+}
+
+
+class BackgroundLoader(QThread):
+    """后台导入 mediapipe/cv2、构建 FaceMesh 图并打开摄像头"""
+    loaded_signal = pyqtSignal(object, object)  # (检测器, 摄像头)
+    failed_signal = pyqtSignal(str)
+
+    def __init__(self, camera_index=0, backend='facemesh_refined'):
+        super().__init__()
+        self.camera_index = camera_index
+        self.backend = backend
+
+    def run(self):
+        try:
+            from mouth_detector import MouthDetector
+            from frame_source import CaptureSource
+
+            detector = MouthDetector(backend=self.backend)
+            detector.warm_up()
+            # 摄像头保持打开，多次检测之间复用，避免每次重新打开设备
+            camera = CaptureSource(self.camera_index)
+            camera.open()
+        except Exception as e:
+            self.failed_signal.emit(str(e))
+            return
+        self.loaded_signal.emit(detector, camera)
 
 
 class MouthDetectionUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, server=None):
+        """server: 可选的 MeasurementServer，测量结果会同时广播给远程看板"""
         super().__init__()
-        self.detector = MouthDetector()
+        self.server = server
+        self.store = CalibrationStore()  # 按患者保存的校准结果和会话记录
+        self.session_id = None  # 当前校准或训练会话
+        self.session_kind = None  # 'calibration' 或 'training'
+        self.detector = None  # 由 BackgroundLoader 加载完成后设置
+        self.camera = None  # 保持打开的摄像头，校准和训练之间复用
         self.video_thread = None
         self.initUI()
 
+        # 首帧耗时统计
+        self.first_frame_shown = False
+        self.run_start_time = None
+
+        # 在后台加载模型和摄像头
+        self.set_buttons_enabled(False)
+        self.status_label.setText('当前状态: 正在加载模型...')
+        # 设置 MOUTH_DETECT_BACKEND 可在较弱的电脑上换用更快的关键点后端，例如 facemesh
+        self.loader = BackgroundLoader(backend=os.environ.get('MOUTH_DETECT_BACKEND', 'facemesh_refined'))
+        self.loader.loaded_signal.connect(self.on_loaded)
+        self.loader.failed_signal.connect(self.on_load_failed)
+        self.loader.start()
+
         # 初始化最大位移变量
         self.max_open_distance = 0.0
         self.max_left_distance = 0.0  # 将存储负值
@@ -27,8 +97,12 @@ class MouthDetectionUI(QMainWindow):
         self.current_action = None
         self.reached_maximum = False
 
-        # 尝试加载已保存的数据
-        # self.load_max_distances()
+        # 测量信号只保存最新值，由定时器按屏幕刷新率统一更新界面
+        self.latest_measurement = None
+        self.display_dirty = False
+
+        # 加载默认患者已保存的校准数据
+        self.load_max_distances()
 
     def initUI(self):
         self.setWindowTitle('口型检测系统')
@@ -49,7 +123,7 @@ class MouthDetectionUI(QMainWindow):
 
         # 添加视频显示
         self.video_label = QLabel()
-        self.video_label.setMinimumSize(640, 480)
+        self.video_label.setMinimumSize(*VIDEO_DISPLAY_SIZE)
         right_layout.addWidget(self.video_label)
 
         # 添加进度条
@@ -61,34 +135,14 @@ class MouthDetectionUI(QMainWindow):
         self.vertical_progress.setMaximum(1000)  # 提高精度
         self.vertical_progress.setOrientation(Qt.Vertical)  # 设置为垂直方向
         self.vertical_progress.setFixedHeight(200)  # 设置固定高度
-        self.vertical_progress.setStyleSheet("""
-            QProgressBar {
-                border: 2px solid grey;
-                border-radius: 5px;
-                text-align: center;
-                background-color: #f0f0f0;
-            }
-            QProgressBar::chunk {
-                background-color: red;
-            }
-        """)
+        self.set_progress_style(self.vertical_progress, False)
         # 水平进度条（用于左右运动）
         self.horizontal_progress = QProgressBar()
         self.horizontal_progress.setMinimum(0)
         self.horizontal_progress.setMaximum(1000)  # 提高精度
         self.horizontal_progress.setOrientation(Qt.Horizontal)  # 设置为水平方向
         self.horizontal_progress.setFixedWidth(200)  # 设置固定宽度
-        self.horizontal_progress.setStyleSheet("""
-            QProgressBar {
-                border: 2px solid grey;
-                border-radius: 5px;
-                text-align: center;
-                background-color: #f0f0f0;
-            }
-            QProgressBar::chunk {
-                background-color: red;
-            }
-        """)
+        self.set_progress_style(self.horizontal_progress, False)
 
         # 创建进度条容器
         progress_container = QWidget()
@@ -107,6 +161,12 @@ class MouthDetectionUI(QMainWindow):
         self.vertical_progress.hide()
         self.horizontal_progress.hide()
 
+        # 患者编号，校准结果按患者保存
+        control_layout.addWidget(QLabel('患者编号:'))
+        self.patient_input = QLineEdit('default')
+        self.patient_input.editingFinished.connect(self.load_max_distances)
+        control_layout.addWidget(self.patient_input)
+
         # 添加压力选择复选框
         self.pressure_checkbox = QCheckBox('是否施加压力')
         control_layout.addWidget(self.pressure_checkbox)
@@ -147,6 +207,12 @@ class MouthDetectionUI(QMainWindow):
         self.measurement_label = QLabel('当前位移: 0.000')
         control_layout.addWidget(self.measurement_label)
 
+        # 添加性能统计显示；首帧耗时单独显示，不会被定期刷新的统计覆盖
+        self.first_frame_label = QLabel('')
+        control_layout.addWidget(self.first_frame_label)
+        self.perf_label = QLabel('')
+        control_layout.addWidget(self.perf_label)
+
         # 连接按钮信号
         self.open_button.clicked.connect(lambda: self.start_calibration('open'))
         self.left_button.clicked.connect(lambda: self.start_calibration('left'))
@@ -161,44 +227,108 @@ class MouthDetectionUI(QMainWindow):
         self.instruction_timer.timeout.connect(self.update_instruction)
         self.current_instruction = 0
 
+        # 按屏幕刷新率合并测量信号后更新界面
+        self.display_timer = QTimer()
+        self.display_timer.timeout.connect(self.refresh_display)
+        screen = QApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen is not None else 0
+        self.display_timer.setInterval(int(1000 / (refresh_rate if refresh_rate > 0 else 60)))
+
         # 初始化检测状态
         self.detection_running = False
 
+    def set_buttons_enabled(self, enabled):
+        """启用或禁用校准和训练按钮"""
+        for button in (self.open_button, self.left_button, self.right_button,
+                       self.open_training_button, self.left_training_button, self.right_training_button):
+            button.setEnabled(enabled)
+
+    def on_loaded(self, detector, camera):
+        """后台加载完成"""
+        self.detector = detector
+        self.camera = camera
+        self.set_buttons_enabled(True)
+        elapsed = time.perf_counter() - APP_START_TIME
+        camera_state = '' if camera.is_opened() else '（摄像头未打开）'
+        self.status_label.setText(f'当前状态: 未开始检测（加载耗时 {elapsed:.1f}s）{camera_state}')
+
+    def on_load_failed(self, message):
+        """后台加载失败"""
+        self.status_label.setText('当前状态: 模型加载失败')
+        QMessageBox.critical(self, '加载失败', message)
+
+    def ensure_video_thread(self):
+        """获取常驻的视频线程，首次调用时创建；之后切换模式不再重启线程或重新打开摄像头"""
+        if self.video_thread is None:
+            from video_thread import VideoThread
+
+            self.video_thread = VideoThread(self.detector, display_size=VIDEO_DISPLAY_SIZE, camera=self.camera)
+            self.video_thread.change_pixmap_signal.connect(self.update_image)
+            self.video_thread.measurement_signal.connect(self.update_measurement)
+            self.video_thread.stats_signal.connect(self.update_stats)
+            self.video_thread.source_finished_signal.connect(self.on_source_finished)
+            if self.server is not None:
+                self.video_thread.measurement_signal.connect(self.publish_measurement)
+            self.video_thread.pause()
+            self.video_thread.start()
+        return self.video_thread
+
+    def on_source_finished(self):
+        """视频来源播放完毕：结束本次检测，下次检测时重新创建视频线程"""
+        self.stop_detection()
+        if self.video_thread is not None:
+            self.video_thread.stop()
+            self.video_thread = None
+        self.status_label.setText('视频播放结束')
+
+    def publish_measurement(self, measurements):
+        """把测量结果和动作统计交给广播服务，服务自行排队，不阻塞界面"""
+        action_stats = self.video_thread.action_stats if self.video_thread is not None else None
+        self.server.publish(measurements, action_stats)
+
+    def start_video_thread(self):
+        """恢复常驻视频线程的推理和显示"""
+        self.run_start_time = time.perf_counter()
+        self.display_timer.start()
+        self.ensure_video_thread().resume()
+
+    @staticmethod
+    def set_label_text(label, text):
+        """只在文字变化时更新标签"""
+        if label.text() != text:
+            label.setText(text)
+
+    @staticmethod
+    def set_progress_style(progress_bar, full):
+        """在预先生成的两种样式之间切换，样式未变时不重新设置"""
+        if getattr(progress_bar, 'style_full', None) != full:
+            progress_bar.style_full = full
+            progress_bar.setStyleSheet(PROGRESS_STYLES[full])
+
+    @staticmethod
+    def set_progress_value(progress_bar, value):
+        if progress_bar.value() != value:
+            progress_bar.setValue(value)
+
     def update_progress_bar_style(self, progress_bar, progress):
         """更新进度条样式"""
-        if progress >= 100:
-            progress_bar.setStyleSheet("""
-                QProgressBar {
-                    border: 2px solid grey;
-                    border-radius: 5px;
-                    text-align: center;
-                    background-color: #f0f0f0;
-                }
-                QProgressBar::chunk {
-                    background-color: #4CAF50;
-                }
-            """)
-        else:
-            progress_bar.setStyleSheet("""
-                QProgressBar {
-                    border: 2px solid grey;
-                    border-radius: 5px;
-                    text-align: center;
-                    background-color: #f0f0f0;
-                }
-                QProgressBar::chunk {
-                    background-color: red;
-                }
-            """)
+        self.set_progress_style(progress_bar, progress >= 100)
 
     def start_calibration(self, mode):
         """开始校准过程"""
         if self.video_thread is not None:
             self.stop_detection()
 
-        self.detector.reset_calibration()
-        self.detector.calibration_mode = mode
+        # 检测器状态在推理线程的两帧之间切换
+        def switch_mode():
+            self.detector.reset_calibration()
+            self.detector.calibration_mode = mode
+        self.ensure_video_thread().submit(switch_mode)
         self.current_action = mode
+        # 新会话的校准行保存全部三个最大值，未校准的模式沿用该患者最近一次的结果
+        self.load_max_distances()
+        self.session_id = self.store.start_session(self.patient_id(), 'calibration', mode)
+        self.session_kind = 'calibration'
 
         # 只重置当前校准模式对应的值
         if mode == 'left':
@@ -217,18 +347,24 @@ class MouthDetectionUI(QMainWindow):
         self.progress_label.setText('当前值与最大值比例: 0%')
 
         # 启动视频线程
-        self.video_thread = VideoThread(self.detector)
-        self.video_thread.change_pixmap_signal.connect(self.update_image)
-        self.video_thread.measurement_signal.connect(self.update_measurement)
-        self.video_thread.start()
+        self.start_video_thread()
 
     def start_training(self, mode):
         """开始特定模式的训练"""
         if self.video_thread is not None:
             self.stop_detection()
 
+        # 每次训练会话的动作统计从零开始，不包含校准动作和之前的训练
+        def reset_stats():
+            self.detector.reset_action_stats()
+            self.video_thread.action_stats = None
+        self.ensure_video_thread().submit(reset_stats)
+
         self.detection_running = True
         self.current_action = mode
+        self.load_max_distances()
+        self.session_id = self.store.start_session(self.patient_id(), 'training', mode)
+        self.session_kind = 'training'
         self.status_label.setText(f'正在进行{self.get_mode_name(mode)}训练...')
         self.maximum_label.setText('')
 
@@ -263,10 +399,7 @@ class MouthDetectionUI(QMainWindow):
         self.update_current_instruction()
 
         # 启动视频线程
-        self.video_thread = VideoThread(self.detector)
-        self.video_thread.change_pixmap_signal.connect(self.update_image)
-        self.video_thread.measurement_signal.connect(self.update_measurement)
-        self.video_thread.start()
+        self.start_video_thread()
 
         # 启动指令定时器
         self.instruction_timer.start(5000)  # 每5秒更新一次指令
@@ -280,23 +413,22 @@ class MouthDetectionUI(QMainWindow):
         }
         return mode_names.get(mode, mode)
 
+    def patient_id(self):
+        """当前患者编号"""
+        return self.patient_input.text().strip() or 'default'
+
     def load_max_distances(self):
-        """从文件加载最大位移数据"""
-        try:
-            with open('max_distances.txt', 'r') as f:
-                lines = f.readlines()
-                for line in lines:
-                    if '最大张嘴位移:' in line:
-                        self.max_open_distance = float(line.split(':')[1])
-                    elif '最大左侧位移:' in line:
-                        self.max_left_distance = float(line.split(':')[1])
-                    elif '最大右侧位移:' in line:
-                        self.max_right_distance = float(line.split(':')[1])
-        except FileNotFoundError:
-            # 如果文件不存在，使用默认值
+        """从数据库加载当前患者最近一次的最大位移数据"""
+        latest = self.store.latest_calibration(self.patient_id())
+        if latest is None:
+            # 没有记录时使用默认值
             self.max_open_distance = 0.0
             self.max_left_distance = 0.0
             self.max_right_distance = 0.0
+        else:
+            self.max_open_distance = latest['max_open']
+            self.max_left_distance = latest['max_left']
+            self.max_right_distance = latest['max_right']
 
     def update_current_instruction(self):
         """更新当前指令和动作类型"""
@@ -321,110 +453,164 @@ class MouthDetectionUI(QMainWindow):
             self.instruction_label.setText('训练完成！')
 
     def update_image(self, frame):
-        """更新视频显示"""
-        rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        h, w, ch = rgb_image.shape
-        bytes_per_line = ch * w
-        convert_to_qt_format = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        scaled_image = convert_to_qt_format.scaled(640, 480, Qt.KeepAspectRatio)
-        self.video_label.setPixmap(QPixmap.fromImage(scaled_image))
+        """更新视频显示
+
+        VideoThread 发来的帧已经是 RGB 顺序并缩放到显示尺寸，直接在其缓冲区上构造 QImage
+        """
+        if self.video_thread is None:
+            return
+        if not self.video_thread.active:
+            # 暂停前已发出的帧不再显示
+            self.video_thread.frame_displayed()
+            return
+
+        start = time.perf_counter()
+        h, w = frame.shape[:2]
+        image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
+        self.video_label.setPixmap(QPixmap.fromImage(image))
+        self.video_thread.frame_displayed(time.perf_counter() - start)
+
+        if self.run_start_time is not None:
+            # 统计本次检测从按下按钮到显示第一帧的耗时，以及程序启动后的首帧耗时
+            now = time.perf_counter()
+            message = f'首帧耗时: {now - self.run_start_time:.2f}s'
+            if not self.first_frame_shown:
+                self.first_frame_shown = True
+                message += f'（启动至首帧 {now - APP_START_TIME:.2f}s）'
+            self.first_frame_label.setText(message)
+            self.run_start_time = None
+
+    def update_stats(self, stats):
+        """显示 VideoThread 定期发送的性能统计"""
+        stages = stats['perf']['stages']
+        counters = stats['perf']['counters']
+        latency = stages.get('latency', {})
+        inference = stages.get('inference', {})
+        self.perf_label.setText(
+            f'处理帧数: {stats["inference"]["processed"]}  丢弃: {stats["capture"]["dropped"]}\n'
+            f'延迟 p95: {latency.get("p95_ms", 0):.1f} ms  推理 p95: {inference.get("p95_ms", 0):.1f} ms\n'
+            f'未检测到人脸: {counters.get("no_face", 0)}'
+        )
+
+    def is_training(self):
+        """是否正在按训练指令进行训练"""
+        return hasattr(self, 'instructions') and self.current_instruction < len(self.instructions)
 
     def update_measurement(self, measurements):
-        """更新测量值显示并保存最大位移"""
-        if measurements:
-            # 只在训练模式下显示进度条
-            is_training = hasattr(self, 'instructions') and self.current_instruction < len(self.instructions)
-
-            if is_training:
-                current_value = 0
-                max_value = 0
-
-                if self.current_action == 'open' and "vertical" in measurements:
-                    current_value = measurements["vertical"]
-                    max_value = self.max_open_distance
-                    # 显示垂直进度条，隐藏水平进度条
-                    self.vertical_progress.show()
-                    self.horizontal_progress.hide()
-                    active_progress_bar = self.vertical_progress
-                elif (self.current_action in ['left', 'right']) and "horizontal" in measurements:
-                    current_value = abs(measurements["horizontal"])
-                    max_value = abs(
-                        self.max_left_distance if self.current_action == 'left' else self.max_right_distance)
-                    # 显示水平进度条，隐藏垂直进度条
-                    self.horizontal_progress.show()
-                    self.vertical_progress.hide()
-                    active_progress_bar = self.horizontal_progress
-
-                # 更新进度条
-                if max_value > 0:
-                    progress = (current_value / max_value) * 1000  # 使用更精确的比例
-                    active_progress_bar.setValue(min(int(progress), 1000))
-                    percentage = (current_value / max_value) * 100
-                    self.progress_label.setText(f'当前值与最大值比例: {percentage:.1f}%')
-                    self.update_progress_bar_style(active_progress_bar, percentage)
-            else:
-                # 非训练模式下隐藏进度条
+        """接收测量值：只记录最新值并更新最大位移，界面由 refresh_display 按刷新率更新"""
+        if not measurements:
+            return
+        self.latest_measurement = measurements
+        self.display_dirty = True
+        # 最大位移需要看到每一帧，不能合并
+        if not self.is_training():
+            self.update_max_distances(measurements)
+
+    def update_max_distances(self, measurements):
+        """只在非训练模式下更新最大位移数据"""
+        # 处理垂直方向（开口）的测量
+        if "vertical" in measurements and self.current_action == 'open':
+            current_value = measurements["vertical"]
+            if current_value > 0:  # 只处理正值
+                if current_value > self.max_open_distance:
+                    self.max_open_distance = current_value
+                    self.check_maximum(current_value, self.max_open_distance)
+                    self.save_max_distances()
+
+        # 处理水平方向（左右）的测量
+        if "horizontal" in measurements:
+            current_value = measurements["horizontal"]
+
+            # 左侧运动（负值）
+            if self.current_action == 'left':
+                if current_value > 0:  # 只处理负值
+                    if self.max_left_distance == 0 or current_value > self.max_left_distance:
+                        self.max_left_distance = current_value
+                        self.check_maximum(abs(current_value), abs(self.max_left_distance))
+                        self.save_max_distances()
+
+            # 右侧运动（正值）
+            elif self.current_action == 'right':
+                if current_value > 0:  # 只处理正值
+                    if current_value > self.max_right_distance:
+                        self.max_right_distance = current_value
+                        self.check_maximum(current_value, self.max_right_distance)
+                        self.save_max_distances()
+
+    def refresh_display(self):
+        """用最新的测量值更新界面，只修改发生变化的控件"""
+        if not self.display_dirty:
+            return
+        self.display_dirty = False
+        measurements = self.latest_measurement
+
+        # 只在训练模式下显示进度条
+        if self.is_training():
+            current_value = 0
+            max_value = 0
+            active_progress_bar = None
+
+            if self.current_action == 'open' and "vertical" in measurements:
+                current_value = measurements["vertical"]
+                max_value = self.max_open_distance
+                active_progress_bar, hidden_progress_bar = self.vertical_progress, self.horizontal_progress
+            elif (self.current_action in ['left', 'right']) and "horizontal" in measurements:
+                current_value = abs(measurements["horizontal"])
+                max_value = abs(
+                    self.max_left_distance if self.current_action == 'left' else self.max_right_distance)
+                active_progress_bar, hidden_progress_bar = self.horizontal_progress, self.vertical_progress
+
+            if active_progress_bar is not None:
+                # 显示当前动作对应的进度条，隐藏另一个
+                if active_progress_bar.isHidden():
+                    active_progress_bar.show()
+                if not hidden_progress_bar.isHidden():
+                    hidden_progress_bar.hide()
+
+            # 更新进度条
+            if active_progress_bar is not None and max_value > 0:
+                progress = (current_value / max_value) * 1000  # 使用更精确的比例
+                self.set_progress_value(active_progress_bar, min(int(progress), 1000))
+                percentage = (current_value / max_value) * 100
+                self.set_label_text(self.progress_label, f'当前值与最大值比例: {percentage:.1f}%')
+                self.update_progress_bar_style(active_progress_bar, percentage)
+        else:
+            # 非训练模式下隐藏进度条
+            if not self.vertical_progress.isHidden():
                 self.vertical_progress.hide()
+            if not self.horizontal_progress.isHidden():
                 self.horizontal_progress.hide()
-                self.progress_labeQAl.setText('当前值与最大值比例: 0%')
-
-                # 只在非训练模式下更新最大位移数据
-                # 处理垂直方向（开口）的测量
-                if "vertical" in measurements and self.current_action == 'open':
-                    current_value = measurements["vertical"]
-                    if current_value > 0:  # 只处理正值
-                        if current_value > self.max_open_distance:
-                            self.max_open_distance = current_value
-                            self.check_maximum(current_value, self.max_open_distance)
-                            self.save_max_distances()
-
-                # 处理水平方向（左右）的测量
-                if "horizontal" in measurements:
-                    current_value = measurements["horizontal"]
-
-                    # 左侧运动（负值）
-                    if self.current_action == 'left':
-                        if current_value > 0:  # 只处理负值
-                            if self.max_left_distance == 0 or current_value > self.max_left_distance:
-                                self.max_left_distance = current_value
-                                self.check_maximum(abs(current_value), abs(self.max_left_distance))
-                                self.save_max_distances()
-
-                    # 右侧运动（正值）
-                    elif self.current_action == 'right':
-                        if current_value > 0:  # 只处理正值
-                            if current_value > self.max_right_distance:
-                                self.max_right_distance = current_value
-                                self.check_maximum(current_value, self.max_right_distance)
-                                self.save_max_distances()
-
-            # 更新显示
-            self.measurement_label.setText(
-                f'当前位移: {measurements.get("displacement", 0):.3f}\n'
-                f'最大张开: {self.max_open_distance:.3f}\n'
-                f'最大左侧: {self.max_left_distance:.3f}\n'
-                f'最大右侧: {self.max_right_distance:.3f}'
-            )
+            self.set_label_text(self.progress_label, '当前值与最大值比例: 0%')
+
+        # 更新显示
+        self.set_label_text(
+            self.measurement_label,
+            f'当前位移: {measurements.get("displacement", 0):.3f}\n'
+            f'最大张开: {self.max_open_distance:.3f}\n'
+            f'最大左侧: {self.max_left_distance:.3f}\n'
+            f'最大右侧: {self.max_right_distance:.3f}'
+        )
 
     def check_maximum(self, current_value, max_value):
         """检查是否达到最大值"""
         if not self.reached_maximum and max_value != 0:  # 添加对0的检查
             threshold = 0.9  # 设定阈值为最大值的90%
             if current_value >= max_value * threshold:
-                self.maximum_label.setText('已达到最大值！')
+                self.set_label_text(self.maximum_label, '已达到最大值！')
                 self.reached_maximum = True
             else:
-                self.maximum_label.setText('未达到最大值')
+                self.set_label_text(self.maximum_label, '未达到最大值')
 
     def stop_detection(self):
-        """停止检测并保存最大位移"""
+        """停止检测并保存最大位移；视频线程和摄像头保持运行，下次检测直接恢复"""
         if self.video_thread is not None:
-            self.video_thread.stop()
-            self.video_thread = None
+            self.video_thread.pause()
 
         self.detection_running = False
         self.status_label.setText('检测已停止')
         self.instruction_timer.stop()
+        self.display_timer.stop()
+        self.display_dirty = False
         self.video_label.clear()
         self.maximum_label.setText('')
 
@@ -433,25 +619,57 @@ class MouthDetectionUI(QMainWindow):
         self.horizontal_progress.hide()
         self.progress_label.setText('当前值与最大值比例: 0%')
 
-        # 保存最大位移数据
+        # 保存最大位移数据，并在会话结束时等待写入落盘
         self.save_max_distances()
+        if self.session_id is not None:
+            # 使用推理线程生成的快照，避免与正在更新统计的推理线程并发读取
+            action_stats = self.video_thread.action_stats if self.video_thread is not None else None
+            if not self.store.end_session(self.session_id, action_stats):
+                reason = self.store.last_error or '写入超时'
+                QMessageBox.warning(self, '保存失败', f'本次会话数据未能写入数据库: {reason}')
+            self.session_id = None
+            self.session_kind = None
 
     def save_max_distances(self):
-        """保存最大位移数据"""
-        with open('max_distances.txt', 'w') as f:
-            f.write(f'最大张嘴位移: {self.max_open_distance:.3f}\n')
-            f.write(f'最大左侧位移: {self.max_left_distance:.3f}\n')  # 保存负值
-            f.write(f'最大右侧位移: {self.max_right_distance:.3f}\n')
+        """保存最大位移数据；只记录最新值，由数据库后台线程批量写入
+
+        只有校准会话写入校准行，训练会话沿用校准结果，不产生新的校准记录
+        """
+        if self.session_id is None or self.session_kind != 'calibration':
+            return
+        self.store.update_calibration(self.session_id, self.patient_id(), self.max_open_distance,
+                                      self.max_left_distance, self.max_right_distance)
 
     def closeEvent(self, event):
         """程序关闭时的清理工作"""
         self.stop_detection()
+        if self.video_thread is not None:
+            self.video_thread.stop()
+            self.video_thread = None
+        if self.loader.isRunning():
+            self.loader.wait()
+        if self.camera is not None:
+            self.camera.release()
+        if self.server is not None:
+            self.server.stop()
+        self.store.close()
         event.accept()
 
 
 def main():
     app = QApplication(sys.argv)
-    window = MouthDetectionUI()
+
+    # 设置 MOUTH_DETECT_SERVER=地址:端口 时启动测量广播服务，例如 0.0.0.0:8765
+    server = None
+    address = os.environ.get('MOUTH_DETECT_SERVER')
+    if address:
+        from measurement_server import MeasurementServer
+
+        host, _, port = address.rpartition(':')
+        server = MeasurementServer(host or '127.0.0.1', int(port))
+        server.start()
+
+    window = MouthDetectionUI(server)
     window.show()
     sys.exit(app.exec_())
 
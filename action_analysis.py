@@ -0,0 +1,222 @@
+"""对完整测量历史离线重新划分动作
+
+与 action_stats.classify_action 使用相同的判定规则（张口优先，其次按水平位移判断左右），
+但一次性处理整段数组：阈值比较得到每帧状态，np.diff 找出状态变化点（游程编码），
+再用 np.add.reduceat 按段汇总时长和速度。不需要重新运行视频即可尝试新的阈值，
+sweep 对一组阈值组合逐一计算，各阈值的比较结果只计算一次并复用。
+
+    python action_analysis.py 会话.mdlg --open 0.08 0.1 0.12 --move 0.03 0.05
+"""
+import itertools
+
+import numpy as np
+
+from action_stats import ACTIONS, MOVEMENT_THRESHOLD, OPEN_THRESHOLD
+
+# 状态编码：0 为无动作，其余依次对应 ACTIONS
+STATE_CODES = {action: i for i, action in enumerate(ACTIONS, 1)}
+
+
+def hysteresis(values, on, off):
+    """滞回阈值：超过 on 时进入，降到 off 及以下时退出，介于两者之间保持上一帧的状态"""
+    values = np.asarray(values)
+    decided = (values > on) | (values <= off)
+    # 每帧取最近一次能明确判定的帧，前向填充其状态
+    last = np.where(decided, np.arange(len(values)), 0)
+    np.maximum.accumulate(last, out=last)
+    # 第一帧之前没有可判定的帧时 last 指向第 0 帧，此时 values[0] 未超过 on，结果为 False
+    return (values > on)[last]
+
+
+def _above(values, threshold, margin):
+    """values > threshold，margin 大于 0 时使用滞回（退出阈值为 threshold - margin）"""
+    if margin:
+        return hysteresis(values, threshold, threshold - margin)
+    return values > threshold
+
+
+def classify(vertical, displacement, open_threshold=OPEN_THRESHOLD, movement_threshold=MOVEMENT_THRESHOLD,
+             margin=0.0):
+    """逐帧动作状态编码数组（int8），规则与 classify_action 相同
+
+    margin: 滞回宽度，进入动作需超过阈值，退出需回落到阈值减 margin 以下，用于抑制边界抖动
+    """
+    vertical = np.asarray(vertical, dtype=np.float32)
+    displacement = np.asarray(displacement, dtype=np.float32)
+    return _combine(_above(vertical, open_threshold, margin),
+                    _above(-displacement, movement_threshold, margin),
+                    _above(displacement, movement_threshold, margin))
+
+
+def _combine(is_open, is_left, is_right):
+    states = np.zeros(len(is_open), dtype=np.int8)
+    states[is_right] = STATE_CODES['right']
+    states[is_left] = STATE_CODES['left']
+    states[is_open] = STATE_CODES['open']  # 张口优先
+    return states
+
+
+def run_lengths(states):
+    """游程编码：返回每段的起始下标、长度和状态"""
+    states = np.asarray(states)
+    if not len(states):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, states[:0]
+    starts = np.flatnonzero(np.diff(states)) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.append(starts, len(states)))
+    return starts, lengths, states[starts]
+
+
+def frame_speeds(times, positions):
+    """逐帧速度（位置变化 / 时间间隔），第一帧和时间间隔不为正的帧为 NaN
+
+    positions: (n,) 或 (n, 2) 数组，例如上嘴唇中点坐标
+    """
+    times = np.asarray(times, dtype=np.float64)
+    positions = np.asarray(positions, dtype=np.float64)
+    speeds = np.full(len(times), np.nan)
+    if len(times) < 2:
+        return speeds
+    step = np.diff(positions, axis=0)
+    distance = np.abs(step) if step.ndim == 1 else np.sqrt((step ** 2).sum(axis=1))
+    dt = np.diff(times)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        speeds[1:] = np.where(dt > 0, distance / dt, np.nan)
+    return speeds
+
+
+def segment(states, times, speeds=None):
+    """按状态划分动作段，返回每段的动作、开始时间、时长和平均速度
+
+    段的时长为该段第一帧到下一段第一帧的时间，与 detect_action 的计时方式一致；
+    最后一段截止到最后一帧。
+    """
+    times = np.asarray(times, dtype=np.float64)
+    starts, lengths, values = run_lengths(states)
+    if not len(starts):
+        return {'state': values, 'start': times[:0], 'duration': times[:0], 'frames': starts}
+
+    ends = np.append(starts[1:], len(times) - 1)
+    result = {
+        'state': values,
+        'start': times[starts],
+        'duration': times[ends] - times[starts],
+        'frames': lengths
+    }
+    if speeds is not None:
+        speeds = np.asarray(speeds, dtype=np.float64)
+        valid = ~np.isnan(speeds)
+        total = np.add.reduceat(np.where(valid, speeds, 0.0), starts)
+        count = np.add.reduceat(valid.astype(np.int64), starts)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['mean_speed'] = np.where(count > 0, total / count, np.nan)
+        result['peak_speed'] = np.fmax.reduceat(np.where(valid, speeds, np.nan), starts)
+    return result
+
+
+def summarize(segments, speeds=None, states=None):
+    """把动作段汇总为各动作的次数、总时长、平均时长和平均速度"""
+    summary = {}
+    for action, code in STATE_CODES.items():
+        mask = segments['state'] == code
+        durations = segments['duration'][mask]
+        entry = {
+            'count': int(mask.sum()),
+            'total_time': float(durations.sum()),
+            'mean_duration': float(durations.mean()) if len(durations) else 0.0
+        }
+        if speeds is not None and states is not None:
+            # 与在线统计一致：按该动作所有帧的速度求平均
+            frame_speeds_ = speeds[(states == code) & ~np.isnan(speeds)]
+            entry['avg_speed'] = float(frame_speeds_.mean()) if len(frame_speeds_) else 0.0
+            entry['peak_speed'] = float(frame_speeds_.max()) if len(frame_speeds_) else 0.0
+        summary[action] = entry
+    return summary
+
+
+def analyze(vertical, displacement, times, positions=None, open_threshold=OPEN_THRESHOLD,
+            movement_threshold=MOVEMENT_THRESHOLD, margin=0.0):
+    """用给定阈值重新划分整段历史，返回各动作的汇总和动作段数组
+
+    positions: 计算速度用的位置（默认使用水平位移）
+    """
+    states = classify(vertical, displacement, open_threshold, movement_threshold, margin)
+    speeds = frame_speeds(times, displacement if positions is None else positions)
+    segments = segment(states, times, speeds)
+    return {'summary': summarize(segments, speeds, states), 'segments': segments}
+
+
+def sweep(vertical, displacement, times, open_thresholds, movement_thresholds, margin=0.0):
+    """对阈值组合批量重新划分，返回每个组合的各动作次数和总时长
+
+    同一个张口阈值或左右阈值的比较结果在所有组合间共享，每个组合只需合并状态和游程编码。
+    """
+    vertical = np.asarray(vertical, dtype=np.float32)
+    displacement = np.asarray(displacement, dtype=np.float32)
+    times = np.asarray(times, dtype=np.float64)
+    open_masks = {t: _above(vertical, t, margin) for t in open_thresholds}
+    move_masks = {t: (_above(-displacement, t, margin), _above(displacement, t, margin))
+                  for t in movement_thresholds}
+
+    results = []
+    for open_threshold, movement_threshold in itertools.product(open_thresholds, movement_thresholds):
+        states = _combine(open_masks[open_threshold], *move_masks[movement_threshold])
+        segments = segment(states, times)
+        results.append({
+            'open_threshold': open_threshold,
+            'movement_threshold': movement_threshold,
+            **summarize(segments)
+        })
+    return results
+
+
+def load_session(path):
+    """从二进制会话日志读取 (vertical, displacement, times, 上嘴唇坐标)"""
+    from session_log import SessionReader
+
+    reader = SessionReader(path)
+    # 嘴部关键点按 MouthDetector.MOUTH_POINTS 的顺序记录，第 0 个为上嘴唇中点
+    data = (np.array(reader.column('vertical')), np.array(reader.column('displacement')),
+            np.array(reader.timestamps, dtype=np.float64), np.array(reader.points[:, 0]))
+    reader.close()
+    return data
+
+
+def load_csv(path, fps=30.0, stride=1):
+    """从 batch_process 输出的测量 CSV 读取
+
+    优先使用 CSV 中的 timestamp 列（帧来源的媒体时间）；旧文件没有该列时，
+    frame 是已处理的帧数，按抽帧步长和帧率换算为时间。
+    """
+    table = np.genfromtxt(path, delimiter=',', names=True)
+    if 'timestamp' in table.dtype.names:
+        times = table['timestamp'].astype(np.float64)
+    else:
+        times = (table['frame'] - 1) * stride / fps
+    return table['vertical'], table['displacement'], times, None
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='用不同阈值离线重新划分动作')
+    parser.add_argument('path', help='会话日志（.mdlg）或 batch_process 输出的测量 CSV')
+    parser.add_argument('--open', type=float, nargs='+', default=[OPEN_THRESHOLD], help='张口阈值')
+    parser.add_argument('--move', type=float, nargs='+', default=[MOVEMENT_THRESHOLD], help='左右移动阈值')
+    parser.add_argument('--margin', type=float, default=0.0, help='滞回宽度')
+    parser.add_argument('--fps', type=float, default=30.0, help='CSV 输入的帧率（CSV 没有 timestamp 列时使用）')
+    parser.add_argument('--stride', type=int, default=1, help='生成 CSV 时 batch_process 的抽帧步长')
+    args = parser.parse_args(argv)
+
+    if args.path.lower().endswith('.csv'):
+        vertical, displacement, times, _ = load_csv(args.path, args.fps, args.stride)
+    else:
+        vertical, displacement, times, _ = load_session(args.path)
+    results = sweep(vertical, displacement, times, args.open, args.move, args.margin)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""动作统计的增量计算
+
+每帧只做常数次运算：均值和方差用 Welford 算法在线更新，数值稳定，不需要回看测量历史；
+每完成一次动作（一次重复）记录一条包含时长、平均速度、峰值速度和达峰时间的记录。
+"""
+import math
+
+ACTIONS = ('open', 'left', 'right')
+
+# 动作判定阈值（归一化坐标），MouthDetector、MultiFaceDetector 和离线重新划分共用
+OPEN_THRESHOLD = 0.1  # 张嘴阈值：上下嘴唇中点距离
+MOVEMENT_THRESHOLD = 0.05  # 左右移动阈值：上嘴唇中点相对初始位置的水平位移
+
+
+def classify_action(vertical, displacement, open_threshold=OPEN_THRESHOLD,
+                    movement_threshold=MOVEMENT_THRESHOLD):
+    """单帧的动作判定：张口优先，其次按水平位移判断左右，返回 'neutral' 或 ACTIONS 之一
+
+    action_analysis.classify 是同一规则的向量化版本。
+    """
+    if vertical > open_threshold:
+        return 'open'
+    if displacement < -movement_threshold:
+        return 'left'
+    if displacement > movement_threshold:
+        return 'right'
+    return 'neutral'
+
+
+class RunningStats:
+    """Welford 在线均值和方差"""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # 与均值之差的平方和
+        self.min = math.inf
+        self.max = -math.inf
+
+    def push(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        """样本方差，少于两个样本时为 0"""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def to_dict(self):
+        if not self.count:
+            return {'count': 0, 'mean': 0.0, 'std': 0.0, 'min': 0.0, 'max': 0.0}
+        return {'count': self.count, 'mean': self.mean, 'std': self.std, 'min': self.min, 'max': self.max}
+
+
+class _Repetition:
+    """正在进行的一次动作"""
+
+    __slots__ = ('action', 'start', 'speed', 'peak_speed', 'peak_time', 'peak_amplitude')
+
+    def __init__(self, action, start):
+        self.action = action
+        self.start = start
+        self.speed = RunningStats()
+        self.peak_speed = 0.0
+        self.peak_time = start  # 达到峰值速度的时间
+        self.peak_amplitude = 0.0  # 本次动作的最大幅度（张口距离或横向位移的绝对值）
+
+    def to_record(self, end):
+        return {
+            'start': self.start,
+            'duration': end - self.start,
+            'mean_speed': self.speed.mean,
+            'speed_std': self.speed.std,
+            'peak_speed': self.peak_speed,
+            'time_to_peak': self.peak_time - self.start,
+            'peak_amplitude': self.peak_amplitude
+        }
+
+
+class _ActionTotals:
+    """一种动作跨所有重复的累计统计"""
+
+    __slots__ = ('total_time', 'speed', 'duration', 'amplitude', 'repetitions')
+
+    def __init__(self):
+        self.total_time = 0.0
+        self.speed = RunningStats()  # 该动作所有帧的速度
+        self.duration = RunningStats()  # 每次重复的时长
+        self.amplitude = RunningStats()  # 每次重复的最大幅度
+        self.repetitions = []
+
+
+class ActionStatistics:
+    """按动作类型（open/left/right）增量维护统计，随时可查询"""
+
+    def __init__(self, actions=ACTIONS):
+        self.actions = tuple(actions)
+        self.reset()
+
+    def reset(self):
+        self.totals = {action: _ActionTotals() for action in self.actions}
+        self.current = None  # 正在进行的 _Repetition
+        self.last_time = None
+
+    def update(self, action, current_time, speed=None, amplitude=None):
+        """记录一帧：当前动作（'neutral' 表示无动作）、该帧速度和动作幅度"""
+        self.last_time = current_time
+        if self.current is not None and self.current.action != action:
+            self.finish(current_time)
+        if action not in self.totals:
+            return
+        if self.current is None:
+            self.current = _Repetition(action, current_time)
+
+        rep = self.current
+        if speed is not None:
+            rep.speed.push(speed)
+            self.totals[action].speed.push(speed)
+            if speed > rep.peak_speed:
+                rep.peak_speed = speed
+                rep.peak_time = current_time
+        if amplitude is not None and amplitude > rep.peak_amplitude:
+            rep.peak_amplitude = amplitude
+
+    def finish(self, end_time):
+        """结束正在进行的动作并记录这次重复"""
+        rep = self.current
+        if rep is None:
+            return None
+        self.current = None
+        record = rep.to_record(end_time)
+        totals = self.totals[rep.action]
+        totals.total_time += record['duration']
+        totals.duration.push(record['duration'])
+        totals.amplitude.push(record['peak_amplitude'])
+        totals.repetitions.append(record)
+        return record
+
+    def get_repetitions(self, action):
+        """某种动作已完成的每次重复记录"""
+        return list(self.totals[action].repetitions)
+
+    def summary(self):
+        """各动作的统计；正在进行的动作计入总时长和速度统计，但不计入次数
+
+        可能在其他线程与 update/finish 并发调用，current 和 last_time 只读取一次。
+        """
+        current = self.current
+        last_time = self.last_time
+        result = {}
+        for action, totals in self.totals.items():
+            total_time = totals.total_time
+            peak_speed = totals.speed.max if totals.speed.count else 0.0
+            in_progress = current is not None and current.action == action
+            if in_progress and last_time is not None:
+                total_time += last_time - current.start
+            result[action] = {
+                'total_time': total_time,
+                'count': len(totals.repetitions),
+                'avg_speed': totals.speed.mean,
+                'speed_std': totals.speed.std,
+                'peak_speed': peak_speed,
+                'mean_duration': totals.duration.mean,
+                'duration_std': totals.duration.std,
+                'mean_peak_amplitude': totals.amplitude.mean,
+                'in_progress': in_progress
+            }
+        return result
@@ -0,0 +1,206 @@
+"""离线批处理：用进程池对录制好的训练视频重新打分
+
+用法：
+    python batch_process.py 视频目录 -o 输出目录 [-j 进程数] [--stride 抽帧步长]
+                            [--backend 关键点后端] [--lip-model 唇部模型]
+
+每个视频输出两个文件：
+    <文件名>.measurements.csv  每帧测量结果，timestamp 列为该帧在视频中的时间（秒）
+    <文件名>.summary.json      动作统计、校准最大值和各字段汇总
+summary.json 最后写入，作为该视频处理完成的标记；中断后重新运行会跳过已完成的视频。
+"""
+import argparse
+import csv
+import inspect
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import cv2
+
+from action_stats import ACTIONS
+from frame_source import PrefetchingSource, VideoFileSource
+from landmark_backend import BACKENDS
+from measurement_store import MEASUREMENT_FIELDS
+from mouth_detector import MouthDetector
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.wmv')
+CSV_FIELDS = ('timestamp',) + MEASUREMENT_FIELDS
+
+# 每个工作进程各自持有一个检测器（一个 FaceMesh 实例）
+_detector = None
+_init_error = None  # 创建检测器失败的原因；初始化函数抛出异常时进程池会不断重建进程
+
+
+def init_worker(backend='facemesh_refined', backend_params=None):
+    """工作进程初始化：限制 OpenCV 线程数并创建检测器"""
+    global _detector, _init_error
+    # 并行度由进程池提供，避免每个进程再开多线程导致核心争用
+    cv2.setNumThreads(1)
+    try:
+        # 无界面运行，不需要绘制
+        _detector = MouthDetector(render=False, backend=backend, backend_params=backend_params)
+    except Exception as e:
+        _init_error = f'无法创建检测器: {e}'
+
+
+def check_backend(backend, backend_params=None):
+    """在主进程中检查后端名称和参数，返回错误信息；参数有误时不必启动进程池
+
+    只检查参数而不创建后端：主进程中初始化过 mediapipe 后再 fork 工作进程并不安全。
+    """
+    if backend not in BACKENDS:
+        return f'未知的关键点后端: {backend}'
+    params = backend_params or {}
+    try:
+        inspect.signature(BACKENDS[backend]).bind(**params)
+    except TypeError as e:
+        return str(e)
+    model_path = params.get('model_path')
+    if model_path is not None and not os.path.isfile(model_path):
+        return f'模型文件不存在: {model_path}'
+    return None
+
+
+def output_paths(video_path, output_dir):
+    """返回视频对应的测量文件和汇总文件路径"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    return (os.path.join(output_dir, f'{stem}.measurements.csv'),
+            os.path.join(output_dir, f'{stem}.summary.json'))
+
+
+def is_done(video_path, output_dir):
+    """汇总文件存在即表示该视频已处理完成"""
+    return os.path.exists(output_paths(video_path, output_dir)[1])
+
+
+def process_video(task):
+    """在工作进程中处理单个视频，返回 (视频路径, 帧数, 错误信息)"""
+    video_path, output_dir, stride = task
+    if _init_error is not None:
+        return video_path, 0, _init_error
+    try:
+        return score_video(video_path, output_dir, stride)
+    except Exception as e:
+        # 单个视频出错不影响其他视频，错误信息交给主进程汇总
+        return video_path, 0, str(e)
+
+
+def score_video(video_path, output_dir, stride=1):
+    """对单个视频逐帧检测并写出测量结果和汇总；stride 大于 1 时每隔 stride 帧处理一帧"""
+    csv_path, summary_path = output_paths(video_path, output_dir)
+    detector = _detector
+    detector.reset_calibration()
+
+    video = VideoFileSource(video_path, stride)
+    if not video.open():
+        return video_path, 0, '无法打开视频'
+    # 解码线程提前解码后续帧，与检测并行
+    source = PrefetchingSource(video)
+
+    start = time.monotonic()
+    frames = 0
+    # 先写入临时文件，完成后再改名，避免中断时留下不完整的结果
+    tmp_csv = csv_path + '.tmp'
+    try:
+        with open(tmp_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for frame, timestamp in source:
+                frames += 1
+                measurement = detector.process_frame(frame, timestamp=timestamp)
+                if measurement is not None:
+                    # frame 只是已处理的帧数，抽帧时与视频时间不成比例，另外记录媒体时间
+                    writer.writerow({'timestamp': timestamp, **measurement})
+    finally:
+        source.release()
+    os.replace(tmp_csv, csv_path)
+
+    summary = {
+        'video': video_path,
+        'frames': frames,
+        'elapsed': time.monotonic() - start,
+        'action_stats': detector.action_stats,
+        'repetitions': {action: detector.get_action_repetitions(action) for action in ACTIONS},
+        'calibration': detector.get_calibration_results(),
+        'history': detector.get_history_summary()
+    }
+    tmp_summary = summary_path + '.tmp'
+    with open(tmp_summary, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=float)
+    os.replace(tmp_summary, summary_path)
+    return video_path, frames, None
+
+
+def find_videos(input_dir, extensions=VIDEO_EXTENSIONS):
+    """按文件名排序列出目录下的视频文件"""
+    names = sorted(os.listdir(input_dir))
+    return [os.path.join(input_dir, name) for name in names
+            if name.lower().endswith(extensions) and os.path.isfile(os.path.join(input_dir, name))]
+
+
+def run_batch(input_dir, output_dir, workers=None, resume=True, stride=1, backend='facemesh_refined',
+              backend_params=None):
+    """用进程池处理目录下的所有视频，返回处理失败的视频列表
+
+    backend_params: 传给关键点后端的参数，例如 dnn_lip 的 {'model_path': ...}
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    videos = find_videos(input_dir)
+    if resume:
+        skipped = [v for v in videos if is_done(v, output_dir)]
+        videos = [v for v in videos if v not in skipped]
+        if skipped:
+            print(f'跳过已完成的 {len(skipped)} 个视频')
+    if not videos:
+        print('没有需要处理的视频')
+        return []
+
+    error = check_backend(backend, backend_params)
+    if error:
+        print(f'[失败] 无法创建关键点后端 {backend}: {error}')
+        return videos
+
+    workers = min(workers or os.cpu_count() or 1, len(videos))
+    print(f'使用 {workers} 个进程处理 {len(videos)} 个视频')
+
+    failed = []
+    tasks = [(video, output_dir, stride) for video in videos]
+    with multiprocessing.Pool(workers, initializer=init_worker,
+                          initargs=(backend, backend_params)) as pool:
+        for video_path, frames, error in pool.imap_unordered(process_video, tasks):
+            if error:
+                failed.append(video_path)
+                print(f'[失败] {video_path}: {error}')
+            else:
+                print(f'[完成] {video_path}: {frames} 帧')
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='离线批量处理训练录像')
+    parser.add_argument('input_dir', help='视频所在目录')
+    parser.add_argument('-o', '--output-dir', default='batch_results', help='结果输出目录')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='进程数，默认使用全部 CPU 核心')
+    parser.add_argument('--no-resume', action='store_true', help='忽略已有结果，全部重新处理')
+    parser.add_argument('--stride', type=int, default=1, help='抽帧步长，每隔若干帧处理一帧')
+    parser.add_argument('--backend', default='facemesh_refined', choices=sorted(BACKENDS),
+                        help='关键点检测后端')
+    parser.add_argument('--lip-model', help='dnn_lip 后端使用的 ONNX 模型')
+    args = parser.parse_args(argv)
+
+    backend_params = None
+    if args.backend == 'dnn_lip':
+        if not args.lip_model:
+            parser.error('--backend dnn_lip 需要同时指定 --lip-model')
+        backend_params = {'model_path': args.lip_model}
+
+    failed = run_batch(args.input_dir, args.output_dir, args.workers, resume=not args.no_resume,
+                       stride=args.stride, backend=args.backend, backend_params=backend_params)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""检测流程的性能基准测试
+
+用法：
+    python benchmark.py                         # 使用合成的人脸画面
+    python benchmark.py --video 录像.mp4       # 使用录制的视频（需包含人脸）
+    python benchmark.py --video 录像.mp4 --target-fps 30 --roi-tracking --smoothing one_euro
+    python benchmark.py -o result.json --compare baseline.json
+
+检测通过 MouthDetector.process_frame 计时，与实际运行的路径相同（调度器跳帧、ROI 跟踪、平滑等），
+其中推理和测量的分阶段耗时取自检测器自己的 perf 统计；另外统计颜色转换、绘制和 Qt 图像转换。
+输出帧率、p50/p95/p99 延迟和内存峰值，结果保存为 JSON 便于不同版本之间对比。
+
+不指定视频时使用合成画面：左右移动、周期性张口的卡通人脸，FaceMesh 可以检出，
+覆盖推理、距离计算、动作判定和绘制的完整路径。没有检测到人脸时不报告检测相关的耗时，
+避免把未命中路径的耗时当作 FaceMesh 的性能。
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from frame_source import open_source
+from mouth_detector import MouthDetector
+from overlay_renderer import OverlayRenderer
+from perf_stats import PerfStats
+
+STAGES = ('color', 'process_frame', 'draw', 'qt')
+# 来自检测器 perf 统计的阶段
+DETECTOR_STAGES = ('inference', 'measurement')
+# 依赖检测到人脸才有意义的阶段
+FACE_STAGES = ('process_frame',) + DETECTOR_STAGES
+
+
+def draw_face(frame, cx, cy, opening, scale=1.0):
+    """在 frame 上画一张正面卡通人脸，嘴部中心在 (cx, cy + 70 * scale)，opening 为张口高度（像素）"""
+    def s(value):
+        return max(int(round(value * scale)), 1)
+
+    # 脸部由外向内逐渐变亮，模拟立体感
+    for i in range(31):
+        cv2.ellipse(frame, (cx, cy), (s(120 - i), s(160 - i)), 0, 0, 360,
+                    (170 - i, 200 - i, 230 - i // 2), -1)
+    for side in (-1, 1):
+        ex = cx + side * s(50)
+        cv2.ellipse(frame, (ex, cy - s(65)), (s(30), s(8)), 0, 180, 360, (40, 50, 60), s(5))  # 眉毛
+        cv2.ellipse(frame, (ex, cy - s(40)), (s(24), s(11)), 0, 0, 360, (250, 250, 250), -1)  # 眼白
+        cv2.circle(frame, (ex, cy - s(40)), s(9), (60, 40, 30), -1)
+        cv2.circle(frame, (ex, cy - s(40)), s(4), (0, 0, 0), -1)
+    cv2.line(frame, (cx, cy - s(30)), (cx - s(8), cy + s(20)), (100, 120, 160), s(3))  # 鼻梁
+    cv2.ellipse(frame, (cx, cy + s(25)), (s(18), s(8)), 0, 0, 180, (100, 120, 160), s(3))
+    cv2.ellipse(frame, (cx, cy + s(70)), (s(40), s(6 + opening)), 0, 0, 360, (60, 60, 170), -1)  # 嘴唇
+    if opening > 2:
+        cv2.ellipse(frame, (cx, cy + s(70)), (s(34), s(opening)), 0, 0, 360, (30, 20, 60), -1)  # 口腔
+
+
+def synthetic_frames(count, width=640, height=480, fps=30.0):
+    """生成合成视频帧：左右移动、周期性张口的卡通人脸，产出 (帧, 时间戳)
+
+    张口和左右位移的幅度都超过 MouthDetector 的动作阈值，动作判定和统计同样会被执行
+    """
+    scale = min(width / 512, height / 384)  # 人脸约占画面高度的 80%
+    background = np.full((height, width, 3), (90, 110, 130), dtype=np.uint8)
+    for i in range(count):
+        frame = background.copy()
+        cx = int(width / 2 + np.sin(i / 15) * 60 * scale)
+        opening = 20 * (1 + np.sin(i / 5))
+        draw_face(frame, cx, height // 2, opening, scale)
+        yield cv2.GaussianBlur(frame, (5, 5), 0), i / fps
+
+
+def video_frames(path, count=None):
+    """逐帧读取视频文件或图片目录，产出 (帧, 来源时间戳)"""
+    with open_source(path) as source:
+        if not source.is_opened():
+            raise IOError(f'无法打开视频: {path}')
+        for read, item in enumerate(source, 1):
+            yield item
+            if count is not None and read >= count:
+                break
+
+
+def make_qt_converter():
+    """返回把 RGB 帧转换为 QPixmap 的函数；没有 PyQt5 时返回 None"""
+    try:
+        os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        from PyQt5.QtGui import QGuiApplication, QImage, QPixmap
+    except ImportError:
+        return None
+    app = QGuiApplication.instance() or QGuiApplication(sys.argv[:1])
+
+    def convert(frame):
+        h, w = frame.shape[:2]
+        image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_RGB888)
+        return QPixmap.fromImage(image)
+
+    convert.app = app  # 保持 QGuiApplication 存活
+    return convert
+
+
+def summarize(samples):
+    """耗时样本（秒）的统计，结果单位为毫秒"""
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1000
+    p50, p95, p99 = np.percentile(values, (50, 95, 99)).tolist()
+    return {
+        'count': len(values),
+        'mean_ms': float(values.mean()),
+        'p50_ms': p50,
+        'p95_ms': p95,
+        'p99_ms': p99,
+        'max_ms': float(values.max())
+    }
+
+
+def peak_rss_mb():
+    """进程常驻内存峰值（MB），平台不支持时返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 单位为字节，Linux 为 KB
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_benchmark(frames, warmup=10, draw=True, qt=True, trace_memory=False, detector=None):
+    """逐帧运行检测流程并分阶段计时
+
+    frames: (BGR 帧, 时间戳) 的可迭代对象
+    detector: 要测试的 MouthDetector，默认新建一个不绘制的检测器；调度、ROI 跟踪等设置按它的配置运行
+    trace_memory: 用 tracemalloc 统计 Python 层分配峰值；会拖慢计时，默认只报告进程内存峰值
+    """
+    if detector is None:
+        detector = MouthDetector(render=False)
+    renderer = OverlayRenderer(rgb=True)
+    qt_convert = make_qt_converter() if qt else None
+
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    faces_found = 0
+    processed = 0
+    clock = time.perf_counter
+
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = None
+    for index, (frame, timestamp) in enumerate(frames):
+        if index == warmup:
+            # 预热帧（图加载、首次分配）不计入统计；检测器的统计窗口覆盖全部测量帧
+            wall_start = clock()
+            detector.perf = PerfStats(window=8192)
+            if trace_memory:
+                tracemalloc.reset_peak()
+        measured = index >= warmup
+
+        t0 = clock()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        t1 = clock()
+        detector.process_frame(rgb, draw=False, is_rgb=True, timestamp=timestamp)
+        overlay = detector.last_overlay
+        t2 = clock()
+        if draw and overlay is not None:
+            rgb = renderer.render(rgb, overlay)
+        t3 = clock()
+        if qt_convert is not None:
+            qt_convert(rgb)
+        t4 = clock()
+
+        if measured:
+            processed += 1
+            faces_found += overlay is not None
+            timings['color'].append(t1 - t0)
+            timings['process_frame'].append(t2 - t1)
+            if draw and overlay is not None:
+                timings['draw'].append(t3 - t2)
+            if qt_convert is not None:
+                timings['qt'].append(t4 - t3)
+            totals.append(t4 - t0)
+
+    wall = clock() - wall_start if wall_start is not None else 0.0
+    peak_traced = None
+    if trace_memory:
+        peak_traced = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    detector_perf = detector.get_perf_stats() if wall_start is not None else {'stages': {}, 'counters': {}}
+    stages = {stage: summarize(samples) for stage, samples in timings.items() if samples}
+    for stage in DETECTOR_STAGES:
+        summary = detector_perf['stages'].get(stage)
+        if summary is not None and 'p50_ms' in summary:
+            stages[stage] = {key: value for key, value in summary.items() if key != 'histogram'}
+
+    result = {
+        'frames': processed,
+        'faces_found': faces_found,
+        'fps': processed / wall if wall > 0 else None,
+        'latency': summarize(totals),
+        'stages': stages,
+        'counters': detector_perf['counters'],
+        'scheduler': detector.scheduler.get_stats() if detector.scheduler is not None else None,
+        'memory': {
+            'peak_traced_mb': peak_traced,
+            'peak_rss_mb': peak_rss_mb()
+        }
+    }
+    if not faces_found:
+        # 只走了未检测到人脸的路径，检测耗时和总延迟都不能代表实际性能
+        for stage in FACE_STAGES:
+            result['stages'].pop(stage, None)
+        result['fps'] = None
+        result['latency'] = None
+        result['error'] = '没有检测到人脸，未报告检测相关的耗时；请用 --video 指定包含人脸的录像'
+    return result
+
+
+def environment_info():
+    """记录运行环境，便于对比不同版本的依赖库"""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'mediapipe': getattr(mp, '__version__', 'unknown'),
+        'numpy': np.__version__
+    }
+
+
+def compare(current, baseline):
+    """打印当前结果与基准结果的 p50 对比"""
+    print(f'{"阶段":<14}{"基准 p50(ms)":>14}{"当前 p50(ms)":>14}{"变化":>10}')
+    rows = [('total', baseline.get('latency'), current.get('latency'))]
+    for stage in STAGES + DETECTOR_STAGES:
+        rows.append((stage, baseline['stages'].get(stage), current['stages'].get(stage)))
+    for name, old, new in rows:
+        if not old or not new:
+            continue
+        change = (new['p50_ms'] - old['p50_ms']) / old['p50_ms'] * 100 if old['p50_ms'] else 0.0
+        print(f'{name:<14}{old["p50_ms"]:>14.3f}{new["p50_ms"]:>14.3f}{change:>9.1f}%')
+    if baseline.get('fps') and current.get('fps'):
+        print(f'FPS: {baseline["fps"]:.1f} -> {current["fps"]:.1f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='嘴部检测流程性能基准测试')
+    parser.add_argument('--video', help='输入视频文件或图片目录，不指定时使用合成的人脸画面')
+    parser.add_argument('-n', '--frames', type=int, default=300, help='测试帧数（不含预热）')
+    parser.add_argument('--warmup', type=int, default=10, help='预热帧数')
+    parser.add_argument('--no-draw', action='store_true', help='不测试绘制阶段')
+    parser.add_argument('--no-qt', action='store_true', help='不测试 Qt 图像转换阶段')
+    parser.add_argument('--target-fps', type=float, default=None, help='启用自适应调度并维持该帧率')
+    parser.add_argument('--roi-tracking', action='store_true', help='启用嘴部 ROI 跟踪')
+    parser.add_argument('--smoothing', choices=('one_euro', 'kalman'), help='嘴部关键点平滑方式')
+    parser.add_argument('--backend', default='facemesh_refined', help='关键点检测后端')
+    parser.add_argument('--trace-memory', action='store_true', help='统计 Python 层内存分配峰值（会影响计时）')
+    parser.add_argument('-o', '--output', help='结果 JSON 文件，不指定时输出到标准输出')
+    parser.add_argument('--compare', help='与之前保存的 JSON 结果对比')
+    args = parser.parse_args(argv)
+
+    total = args.frames + args.warmup
+    if args.video:
+        frames = video_frames(args.video, total)
+        source = args.video
+    else:
+        frames = synthetic_frames(total)
+        source = 'synthetic'
+
+    detector = MouthDetector(roi_tracking=args.roi_tracking, target_fps=args.target_fps, render=False,
+                             smoothing=args.smoothing, backend=args.backend, full_mesh=not args.no_draw)
+    result = {
+        'source': source,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'config': {
+            'backend': args.backend,
+            'target_fps': args.target_fps,
+            'roi_tracking': args.roi_tracking,
+            'smoothing': args.smoothing
+        },
+        **run_benchmark(frames, args.warmup, draw=not args.no_draw, qt=not args.no_qt,
+                         trace_memory=args.trace_memory, detector=detector)
+    }
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        print(text)
+
+    if 'error' in result:
+        print(result['error'], file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(result, json.load(f))
+    return 1 if 'error' in result else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
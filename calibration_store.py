@@ -0,0 +1,211 @@
+"""按患者保存校准结果和训练会话的 SQLite 数据库
+
+写入都在后台线程中进行：update_calibration 只更新内存中每个会话的最新值，
+后台线程每隔 FLUSH_INTERVAL 秒把积累的修改合并成一个事务写入；
+end_session 会立即提交并等待落盘，保证会话结束时数据已持久化。写入失败时
+end_session/flush 返回 False，错误保存在 last_error 中，由调用方提示用户。
+查询按 (patient, date) 建立索引，绘制进度曲线时不需要扫描全表。
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    patient TEXT NOT NULL,
+    date TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    mode TEXT,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    action_stats TEXT
+);
+CREATE INDEX IF NOT EXISTS sessions_patient_date ON sessions (patient, date);
+
+CREATE TABLE IF NOT EXISTS calibrations (
+    session_id TEXT PRIMARY KEY REFERENCES sessions (id),
+    patient TEXT NOT NULL,
+    date TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    max_open REAL NOT NULL,
+    max_left REAL NOT NULL,
+    max_right REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calibrations_patient_date ON calibrations (patient, date, updated_at);
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')  # 读写互不阻塞
+    conn.execute('PRAGMA synchronous=FULL')  # 每次提交都落盘；批量提交后次数很少
+    return conn
+
+
+class CalibrationStore:
+    """患者校准和会话数据库，写入异步批量进行"""
+
+    FLUSH_INTERVAL = 1.0  # 后台批量提交的间隔（秒）
+
+    def __init__(self, path='mouth_detect.db'):
+        self.path = path
+        self._read_conn = _connect(path)
+        self._read_conn.executescript(SCHEMA)
+        self._read_lock = threading.Lock()
+
+        self._ops = queue.Queue()  # (sql, 参数) 或 刷新请求
+        self._pending = {}  # session_id -> 最新的校准行，只保留最后一次的值
+        self._pending_lock = threading.Lock()
+        self._closed = False
+        self.last_error = None  # 最近一次写入失败的异常
+        self._failed = False  # 上次 flush 之后是否有写入失败，只由后台线程访问
+        self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self._thread.start()
+
+    def start_session(self, patient, kind, mode=None):
+        """开始一次校准或训练会话，返回会话编号"""
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        self._ops.put(('INSERT INTO sessions (id, patient, date, kind, mode, started_at) VALUES (?, ?, ?, ?, ?, ?)',
+                       (session_id, patient, _date(now), kind, mode, now)))
+        return session_id
+
+    def update_calibration(self, session_id, patient, max_open, max_left, max_right):
+        """记录会话当前的校准最大值；只更新内存，由后台线程批量写入"""
+        now = time.time()
+        with self._pending_lock:
+            self._pending[session_id] = (session_id, patient, _date(now), now,
+                                         float(max_open), float(max_left), float(max_right))
+
+    def end_session(self, session_id, action_stats=None, timeout=5.0):
+        """结束会话并等待所有修改落盘，返回是否全部写入成功"""
+        self._ops.put(('UPDATE sessions SET ended_at = ?, action_stats = ? WHERE id = ?',
+                       (time.time(), json.dumps(action_stats, default=float) if action_stats else None,
+                        session_id)))
+        return self.flush(timeout)
+
+    def flush(self, timeout=5.0):
+        """立即提交积累的修改并等待完成
+
+        返回 True 表示在超时前完成，且上次 flush 之后的写入都已成功；写入失败的批次不会重试
+        """
+        request = _FlushRequest()
+        self._ops.put(request)
+        return request.done.wait(timeout) and request.ok
+
+    def close(self):
+        """提交剩余修改并关闭数据库"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._ops.put(None)
+        self._thread.join()
+        self._read_conn.close()
+
+    def latest_calibration(self, patient):
+        """患者最近一次的校准最大值，没有记录时返回 None"""
+        row = self._query_one('SELECT max_open, max_left, max_right, date, updated_at FROM calibrations '
+                              'WHERE patient = ? ORDER BY date DESC, updated_at DESC LIMIT 1', (patient,))
+        return dict(row) if row is not None else None
+
+    def calibration_history(self, patient, since=None, until=None):
+        """患者在日期范围内（'YYYY-MM-DD'，含两端）的校准记录，按时间排序"""
+        sql = 'SELECT date, updated_at, max_open, max_left, max_right FROM calibrations WHERE patient = ?'
+        params = [patient]
+        if since is not None:
+            sql += ' AND date >= ?'
+            params.append(since)
+        if until is not None:
+            sql += ' AND date <= ?'
+            params.append(until)
+        return [dict(row) for row in self._query(sql + ' ORDER BY date, updated_at', params)]
+
+    def sessions(self, patient, since=None):
+        """患者的会话列表，action_stats 已解析为字典"""
+        sql = 'SELECT * FROM sessions WHERE patient = ?'
+        params = [patient]
+        if since is not None:
+            sql += ' AND date >= ?'
+            params.append(since)
+        rows = []
+        for row in self._query(sql + ' ORDER BY date, started_at', params):
+            row = dict(row)
+            row['action_stats'] = json.loads(row['action_stats']) if row['action_stats'] else None
+            rows.append(row)
+        return rows
+
+    def _query(self, sql, params):
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    def _query_one(self, sql, params):
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchone()
+
+    def _writer_loop(self):
+        conn = _connect(self.path)
+        try:
+            running = True
+            while running:
+                waiters = []
+                statements = []
+                try:
+                    item = self._ops.get(timeout=self.FLUSH_INTERVAL)
+                    # 把队列中已有的操作合并到同一个事务
+                    while True:
+                        if item is None:
+                            running = False
+                        elif isinstance(item, _FlushRequest):
+                            waiters.append(item)
+                        else:
+                            statements.append(item)
+                        item = self._ops.get_nowait()
+                except queue.Empty:
+                    pass
+
+                with self._pending_lock:
+                    pending, self._pending = self._pending, {}
+                if statements or pending:
+                    try:
+                        self._commit(conn, statements, pending.values())
+                    except sqlite3.Error as e:
+                        self.last_error = e
+                        self._failed = True
+                if waiters:
+                    for request in waiters:
+                        request.ok = not self._failed
+                        request.done.set()
+                    self._failed = False
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _commit(conn, statements, calibrations):
+        """在一个事务中执行积累的语句和校准行的插入/更新"""
+        with conn:
+            for sql, params in statements:
+                conn.execute(sql, params)
+            conn.executemany(
+                'INSERT INTO calibrations (session_id, patient, date, updated_at, max_open, max_left, max_right) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (session_id) DO UPDATE SET '
+                'updated_at = excluded.updated_at, max_open = excluded.max_open, '
+                'max_left = excluded.max_left, max_right = excluded.max_right',
+                calibrations)
+
+
+class _FlushRequest:
+    """flush 放入写入队列的请求，后台线程提交后设置结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+
+
+def _date(timestamp):
+    return time.strftime('%Y-%m-%d', time.localtime(timestamp))
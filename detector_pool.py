@@ -0,0 +1,202 @@
+"""多摄像头检测池：在一个进程内同时处理多路摄像头
+
+每路摄像头有独立的采集线程、最新帧槽和 MouthDetector（各自的 FaceMesh 和动作状态），
+推理由数量有限的工作线程承担，工作线程只挑选已有新帧且空闲的摄像头处理，
+因此某一路摄像头卡住时只影响它自己，不会占用工作线程或拖慢其他摄像头。
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from frame_pool import LatestFrameBuffer
+from frame_source import open_source
+from mouth_detector import MouthDetector
+from perf_stats import PerfStats
+
+
+class CameraSource:
+    """一路摄像头及其独立的检测状态"""
+
+    def __init__(self, source_id, source, detector):
+        self.source_id = source_id
+        self.source = source  # 摄像头编号、视频流地址等，传给 frame_source.open_source
+        self.detector = detector
+        self.buffer = LatestFrameBuffer()
+        self.busy = False  # 是否有工作线程正在处理这一路
+        self.capture_thread = None
+
+        self.perf = PerfStats()
+        self.captured_frames = 0
+        self.processed_frames = 0
+        self.capture_failures = 0
+        self.last_frame_time = None  # 最近一次采集到帧的时间（单调时钟）
+        self.completion_times = deque(maxlen=30)  # 最近若干帧的处理完成时间，用于计算帧率
+
+    def fps(self):
+        """按最近若干帧计算的处理帧率"""
+        if len(self.completion_times) < 2:
+            return 0.0
+        span = self.completion_times[-1] - self.completion_times[0]
+        return (len(self.completion_times) - 1) / span if span > 0 else 0.0
+
+
+class DetectorPool:
+    """同时运行多路摄像头的检测池"""
+
+    STALL_TIMEOUT = 2.0  # 超过该时间（秒）没有新帧视为摄像头卡住
+
+    def __init__(self, sources, workers=None, on_result=None, detector_factory=None):
+        """
+        sources: 摄像头编号或视频地址的列表，也可以是 {名称: 地址} 字典
+        workers: 推理线程数，默认不超过 CPU 核心数和摄像头数
+        on_result: 回调 on_result(source_id, measurement, frame, overlay)，在推理线程中调用
+        detector_factory: 创建检测器的函数，默认创建不绘制的 MouthDetector
+        """
+        if not isinstance(sources, dict):
+            sources = {i: source for i, source in enumerate(sources)}
+        factory = detector_factory or (lambda: MouthDetector(render=False))
+        self.sources = [CameraSource(source_id, source, factory()) for source_id, source in sources.items()]
+        self.workers = workers or min(os.cpu_count() or 1, len(self.sources))
+        self.on_result = on_result
+
+        self.running = False
+        self._cond = threading.Condition()
+        self._next_index = 0  # 轮询起点，保证各路摄像头公平获得推理机会
+        self._threads = []
+
+    def start(self):
+        """启动所有采集线程和推理线程"""
+        self.running = True
+        for src in self.sources:
+            src.capture_thread = threading.Thread(target=self._capture_loop, args=(src,), daemon=True)
+            src.capture_thread.start()
+        for _ in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """停止所有线程；卡住的采集线程不会阻塞停止过程"""
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        for src in self.sources:
+            src.buffer.close()
+        for thread in self._threads:
+            thread.join(timeout)
+        for src in self.sources:
+            if src.capture_thread is not None:
+                src.capture_thread.join(timeout)
+        self._threads = []
+
+    def _capture_loop(self, src):
+        """采集线程：读取一路摄像头并写入它自己的最新帧槽"""
+        cap = open_source(src.source)
+        try:
+            while self.running:
+                item = cap.read()
+                if item is None:
+                    if not cap.live:
+                        break
+                    src.capture_failures += 1
+                    time.sleep(0.01)
+                    continue
+                frame, timestamp = item
+                src.captured_frames += 1
+                src.last_frame_time = time.monotonic()
+                src.buffer.put((frame, timestamp), src.last_frame_time)
+                with self._cond:
+                    self._cond.notify()
+        finally:
+            cap.release()
+
+    def _claim_ready_source(self):
+        """轮询挑选一路有新帧且空闲的摄像头并标记为处理中；需持有 _cond"""
+        count = len(self.sources)
+        for offset in range(count):
+            src = self.sources[(self._next_index + offset) % count]
+            if not src.busy and src.buffer.has_frame():
+                src.busy = True
+                self._next_index = (self._next_index + offset + 1) % count
+                return src
+        return None
+
+    def _worker_loop(self):
+        """推理线程：不断挑选有新帧的摄像头运行检测"""
+        while self.running:
+            with self._cond:
+                src = self._claim_ready_source()
+                if src is None:
+                    self._cond.wait(0.1)
+                    continue
+
+            try:
+                item = src.buffer.get(timeout=0)
+                if item is not None:
+                    self._process(src, *item)
+            finally:
+                with self._cond:
+                    src.busy = False
+                    self._cond.notify()
+
+    def _process(self, src, item, captured_at):
+        """处理一路摄像头的一帧并更新该路的统计"""
+        frame, timestamp = item
+        start = time.perf_counter()
+        measurement = src.detector.process_frame(frame, timestamp=timestamp)
+        src.perf.record('inference', time.perf_counter() - start)
+
+        now = time.monotonic()
+        src.perf.record('latency', now - captured_at)
+        src.processed_frames += 1
+        src.completion_times.append(now)
+
+        if self.on_result is not None:
+            self.on_result(src.source_id, measurement, frame, src.detector.last_overlay)
+
+    def get_stats(self):
+        """获取每一路摄像头的帧率、延迟和计数"""
+        now = time.monotonic()
+        stats = {}
+        for src in self.sources:
+            perf = src.perf.snapshot()['stages']
+            stalled = src.last_frame_time is None or now - src.last_frame_time > self.STALL_TIMEOUT
+            stats[src.source_id] = {
+                'fps': src.fps(),
+                'latency': perf.get('latency'),
+                'inference': perf.get('inference'),
+                'captured': src.captured_frames,
+                'processed': src.processed_frames,
+                'dropped': src.buffer.dropped_count,
+                'capture_failures': src.capture_failures,
+                'stalled': stalled
+            }
+        return stats
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description='同时运行多路摄像头检测并定期打印统计')
+    parser.add_argument('sources', nargs='+', help='摄像头编号或视频地址')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='推理线程数')
+    parser.add_argument('--interval', type=float, default=2.0, help='打印统计的间隔（秒）')
+    args = parser.parse_args(argv)
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    pool = DetectorPool(sources, workers=args.workers)
+    pool.start()
+    try:
+        while True:
+            time.sleep(args.interval)
+            print(json.dumps(pool.get_stats(), ensure_ascii=False, indent=2))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()
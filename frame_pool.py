@@ -0,0 +1,76 @@
+import threading
+
+import numpy as np
+
+
+class FramePool:
+    """预分配的数组缓冲池，按顺序循环复用，避免每帧分配新数组
+
+    缓冲区被取出 size 次后才会再次复用，调用方需保证同时在用的缓冲区不超过 size 个。
+    """
+
+    def __init__(self, size, dtype=np.uint8):
+        self.size = size
+        self.dtype = dtype
+        self._buffers = []
+        self._shape = None
+        self._next = 0
+
+    def acquire(self, shape):
+        """取下一个指定形状的缓冲区，形状变化时重新分配整个池"""
+        if shape != self._shape:
+            self._buffers = [np.empty(shape, dtype=self.dtype) for _ in range(self.size)]
+            self._shape = shape
+            self._next = 0
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % self.size
+        return buffer
+
+
+class LatestFrameBuffer:
+    """单槽最新帧缓冲区：新帧直接覆盖未被取走的旧帧，保证推理总是处理最新画面"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = None
+        self._closed = False
+
+        # 统计计数
+        self.put_count = 0  # 写入的帧数
+        self.dropped_count = 0  # 被新帧覆盖而丢弃的帧数
+
+    def put(self, frame, timestamp):
+        """写入一帧，若槽中还有未处理的旧帧则将其丢弃"""
+        with self._cond:
+            if self._frame is not None:
+                self.dropped_count += 1
+            self._frame = frame
+            self._timestamp = timestamp
+            self.put_count += 1
+            self._cond.notify()
+
+    def has_frame(self):
+        """槽中是否有尚未取走的帧"""
+        return self._frame is not None
+
+    def get(self, timeout=None):
+        """取出最新帧，返回 (frame, timestamp)；超时或已关闭时返回 None"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame is not None or self._closed, timeout)
+            if self._frame is None:
+                return None
+            frame, timestamp = self._frame, self._timestamp
+            self._frame = None
+            self._timestamp = None
+            return frame, timestamp
+
+    def is_closed(self):
+        """缓冲区是否已关闭（关闭后不会再有新帧）"""
+        return self._closed
+
+    def close(self):
+        """关闭缓冲区并唤醒等待的消费者"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
@@ -0,0 +1,101 @@
+from collections import deque
+
+
+class FrameScheduler:
+    """根据实测的每帧推理耗时，自适应选择推理分辨率和跳帧间隔"""
+
+    # 可选的推理缩放比例，从高到低
+    SCALES = (1.0, 0.75, 0.5)
+
+    def __init__(self, target_fps=30, window=30, max_skip=3, budget_ratio=0.8):
+        """
+        target_fps: 希望维持的帧率
+        window: 滚动统计推理耗时所用的帧数
+        max_skip: 最大跳帧间隔（每 max_skip 帧至少推理一次）
+        budget_ratio: 推理可占用的单帧时间比例，其余留给绘制和显示
+        """
+        self.target_fps = target_fps
+        self.budget = budget_ratio / target_fps  # 每帧推理的时间预算（秒）
+        self.max_skip = max_skip
+        self.window = window
+
+        self.costs = deque(maxlen=window)  # 最近若干次推理的耗时
+        self.scale_index = 0
+        self.skip_interval = 1  # 每 skip_interval 帧推理一次
+        self.frames_since_inference = 0
+        self.frames_since_change = 0  # 距上次调整的推理次数，用于避免来回抖动
+
+        self.inferred_frames = 0
+        self.skipped_frames = 0
+
+    @property
+    def scale(self):
+        """当前推理分辨率缩放比例"""
+        return self.SCALES[self.scale_index]
+
+    def should_infer(self):
+        """判断当前帧是否需要运行推理"""
+        self.frames_since_inference += 1
+        if self.frames_since_inference >= self.skip_interval:
+            self.frames_since_inference = 0
+            self.inferred_frames += 1
+            return True
+        self.skipped_frames += 1
+        return False
+
+    def record(self, cost):
+        """记录一次推理耗时（秒）并在需要时调整设置"""
+        self.costs.append(cost)
+        self.frames_since_change += 1
+        if self.frames_since_change >= self.window:
+            self.adjust()
+
+    def amortized_cost(self):
+        """按跳帧间隔摊到每一帧上的平均推理耗时"""
+        if not self.costs:
+            return 0.0
+        return sum(self.costs) / len(self.costs) / self.skip_interval
+
+    def adjust(self):
+        """超出预算时先降分辨率再加大跳帧；预算充裕时按相反顺序恢复"""
+        cost = self.amortized_cost()
+        changed = False
+
+        if cost > self.budget:
+            if self.scale_index < len(self.SCALES) - 1:
+                self.scale_index += 1
+                changed = True
+            elif self.skip_interval < self.max_skip:
+                self.skip_interval += 1
+                changed = True
+        elif cost < self.budget * 0.5:
+            if self.skip_interval > 1:
+                self.skip_interval -= 1
+                changed = True
+            elif self.scale_index > 0:
+                self.scale_index -= 1
+                changed = True
+
+        if changed:
+            # 设置变化后旧的耗时样本不再有代表性
+            self.costs.clear()
+            self.frames_since_change = 0
+
+    def reset(self):
+        """恢复到全分辨率、逐帧推理"""
+        self.costs.clear()
+        self.scale_index = 0
+        self.skip_interval = 1
+        self.frames_since_inference = 0
+        self.frames_since_change = 0
+
+    def get_stats(self):
+        """获取调度器的当前设置和统计"""
+        return {
+            'target_fps': self.target_fps,
+            'scale': self.scale,
+            'skip_interval': self.skip_interval,
+            'amortized_cost': self.amortized_cost(),
+            'inferred': self.inferred_frames,
+            'skipped': self.skipped_frames
+        }
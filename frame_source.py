@@ -0,0 +1,352 @@
+"""统一的帧来源：摄像头、视频文件、图片目录和 RTSP 等网络视频流
+
+所有来源都提供 read()，返回 (BGR 帧, 时间戳秒数)，读完时返回 None；也可以直接迭代。
+时间戳来自来源本身：视频文件取解码位置的媒体时间，图片序列按帧号和帧率计算，
+摄像头和网络流取采集时刻的单调时钟。因此离线加速处理和实时采集得到的时间间隔一致。
+
+PrefetchingSource 在后台线程中提前解码，放入有上限的队列，解码与检测并行。
+
+    with open_source('录像.mp4', stride=2) as source:
+        for frame, timestamp in PrefetchingSource(source):
+            ...
+"""
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.webp')
+
+
+class FrameSource:
+    """帧来源基类"""
+
+    live = False  # 实时来源：读不到帧时应重试，而不是视为结束
+
+    def __init__(self, stride=1):
+        """stride: 每隔 stride 帧取一帧，跳过的帧尽量不解码"""
+        self.stride = max(1, int(stride))
+        self.frames_read = 0
+
+    def open(self):
+        return True
+
+    def is_opened(self):
+        return True
+
+    def read(self):
+        """读取下一帧，返回 (帧, 时间戳)；没有更多帧时返回 None"""
+        raise NotImplementedError
+
+    def seek(self, index):
+        """跳到第 index 帧；实时来源不支持"""
+        raise NotImplementedError(f'{type(self).__name__} 不支持定位')
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        if not self.is_opened() and not self.open():
+            raise IOError(f'无法打开帧来源: {self!r}')
+        while True:
+            item = self.read()
+            if item is None:
+                if self.live:
+                    time.sleep(0.01)
+                    continue
+                return
+            yield item
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class CaptureSource(FrameSource):
+    """摄像头或 RTSP/HTTP 网络流，时间戳为采集时刻的单调时钟"""
+
+    live = True
+
+    def __init__(self, source=0, stride=1, buffer_size=1):
+        super().__init__(stride)
+        self.source = source  # 摄像头编号或视频流地址
+        self.buffer_size = buffer_size
+        self.cap = None
+        self.open_time = None  # 打开设备耗时（秒）
+        self.read_failures = 0
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.source!r})'
+
+    def open(self):
+        """打开设备并读取一帧，使驱动完成初始化"""
+        if self.is_opened():
+            return True
+        start = time.perf_counter()
+        self.cap = cv2.VideoCapture(self.source)
+        # 尽量减少驱动层缓存的帧数，避免画面滞后
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        if self.cap.isOpened():
+            self.cap.read()
+        self.open_time = time.perf_counter() - start
+        return self.cap.isOpened()
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def read(self):
+        """读取一帧；设备未打开时先尝试打开，读取失败返回 None"""
+        if not self.is_opened() and not self.open():
+            self.read_failures += 1
+            return None
+        # 实时来源跳过的帧只 grab 不解码
+        for _ in range(self.stride - 1):
+            self.cap.grab()
+        ret, frame = self.cap.read()
+        if not ret:
+            self.read_failures += 1
+            return None
+        self.frames_read += 1
+        return frame, time.monotonic()
+
+    def release(self):
+        """释放设备"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class VideoFileSource(FrameSource):
+    """视频文件，时间戳为媒体时间（秒），支持定位和按步长抽帧"""
+
+    def __init__(self, path, stride=1, start=0):
+        super().__init__(stride)
+        self.path = path
+        self.start = start
+        self.cap = None
+        self.fps = 0.0
+        self.frame_count = 0
+        self.position = 0  # 下一次读取的帧号
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.path!r})'
+
+    def open(self):
+        if self.is_opened():
+            return True
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if self.start:
+            self.seek(self.start)
+        return True
+
+    def is_opened(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def seek(self, index):
+        if not self.is_opened():
+            # 打开时再定位
+            self.start = index
+            return
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, index)
+        self.position = int(index)
+
+    def read(self):
+        if not self.is_opened() and not self.open():
+            return None
+        # 跳过的帧只 grab 不解码，抽帧处理时节省大部分解码时间
+        for _ in range(self.stride - 1):
+            if not self.cap.grab():
+                return None
+            self.position += 1
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if timestamp <= 0 and self.position > 0 and self.fps > 0:
+            # 部分容器不提供时间戳，按帧号和帧率推算
+            timestamp = self.position / self.fps
+        self.position += 1
+        self.frames_read += 1
+        return frame, timestamp
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageSequenceSource(FrameSource):
+    """按文件名排序的图片目录，时间戳按帧号和 fps 计算"""
+
+    def __init__(self, directory, fps=30.0, stride=1, start=0):
+        super().__init__(stride)
+        self.directory = directory
+        self.fps = fps
+        self.paths = None
+        self.position = start
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.directory!r})'
+
+    def open(self):
+        if self.paths is None:
+            names = sorted(name for name in os.listdir(self.directory)
+                           if name.lower().endswith(IMAGE_EXTENSIONS))
+            self.paths = [os.path.join(self.directory, name) for name in names]
+        return True
+
+    def is_opened(self):
+        return self.paths is not None
+
+    @property
+    def frame_count(self):
+        self.open()
+        return len(self.paths)
+
+    def seek(self, index):
+        self.position = int(index)
+
+    def read(self):
+        self.open()
+        while self.position < len(self.paths):
+            index = self.position
+            self.position += self.stride
+            frame = cv2.imread(self.paths[index], cv2.IMREAD_COLOR)
+            if frame is None:
+                continue  # 无法解码的文件跳过
+            self.frames_read += 1
+            return frame, index / self.fps
+        return None
+
+
+def open_source(spec, stride=1, fps=30.0):
+    """根据描述创建帧来源
+
+    spec: 摄像头编号（整数或数字字符串）、rtsp:// 等视频流地址、图片目录或视频文件路径
+    fps: 图片目录的帧率
+    """
+    if isinstance(spec, FrameSource):
+        return spec
+    if isinstance(spec, int) or (isinstance(spec, str) and spec.isdigit()):
+        return CaptureSource(int(spec), stride)
+    if '://' in spec:
+        return CaptureSource(spec, stride)
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec, fps, stride)
+    return VideoFileSource(spec, stride)
+
+
+class PrefetchingSource(FrameSource):
+    """在后台线程中提前从另一个来源解码，最多缓存 queue_size 帧
+
+    队列满时解码线程等待（背压），不会无限占用内存；实时来源请使用 LatestFrameBuffer。
+    """
+
+    _END = object()
+
+    def __init__(self, source, queue_size=8):
+        super().__init__()
+        self.source = source
+        self.live = source.live
+        self.queue = queue.Queue(queue_size)
+        self.thread = None
+        self.error = None
+        self._stop = threading.Event()
+        self._finished = False
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.source!r})'
+
+    def open(self):
+        if self.thread is None:
+            if not self.source.is_opened() and not self.source.open():
+                raise IOError(f'无法打开帧来源: {self.source!r}')
+            self.thread = threading.Thread(target=self._decode_loop, daemon=True)
+            self.thread.start()
+        return True
+
+    def is_opened(self):
+        return self.thread is not None
+
+    def _offer(self, item):
+        while not self._stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode_loop(self):
+        try:
+            while not self._stop.is_set():
+                item = self.source.read()
+                if item is None:
+                    if self.source.live:
+                        time.sleep(0.01)
+                        continue
+                    break
+                if not self._offer(item):
+                    return
+        except Exception as e:
+            self.error = e
+        self._offer(self._END)
+
+    def read(self):
+        if self._finished:
+            return None
+        self.open()
+        item = self.queue.get()
+        if item is self._END:
+            self._finished = True
+            if self.error is not None:
+                raise self.error
+            return None
+        self.frames_read += 1
+        return item
+
+    def release(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join(1.0)
+            self.thread = None
+        self.source.release()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='测试帧来源的解码速度')
+    parser.add_argument('source', help='摄像头编号、视频文件、图片目录或视频流地址')
+    parser.add_argument('--stride', type=int, default=1, help='抽帧步长')
+    parser.add_argument('-n', '--frames', type=int, default=300, help='最多读取的帧数')
+    parser.add_argument('--prefetch', type=int, default=0, help='预读队列长度，0 表示不预读')
+    args = parser.parse_args(argv)
+
+    source = open_source(args.source, args.stride)
+    if args.prefetch:
+        source = PrefetchingSource(source, args.prefetch)
+    start = time.perf_counter()
+    count = 0
+    last_timestamp = None
+    with source:
+        for _, last_timestamp in source:
+            count += 1
+            if count >= args.frames:
+                break
+    elapsed = time.perf_counter() - start
+    print(f'{count} 帧，{count / elapsed if elapsed > 0 else 0:.1f} 帧/秒，最后时间戳 {last_timestamp}')
+
+
+if __name__ == '__main__':
+    main()
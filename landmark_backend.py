@@ -0,0 +1,342 @@
+"""可替换的关键点检测后端
+
+MouthDetector 只需要嘴部的 9 个关键点，不同后端在速度和精度之间取舍：
+    facemesh_refined  FaceMesh 478 点（含虹膜细化），原有默认行为
+    facemesh          FaceMesh 468 点，不做虹膜细化，速度更快，嘴部点位相同
+    face_detect_roi   先用人脸检测器定位，再只在人脸框内运行 FaceMesh；检测器每隔若干帧运行一次
+    dnn_lip           人脸检测器定位后，用 OpenCV DNN 加载的 ONNX 唇部模型只回归嘴部关键点
+
+所有后端的 detect 返回整帧归一化坐标的 (M, 3) float32 数组或 None，
+mouth_indices 给出 MOUTH_POINTS 各点在该数组中的行号。传入 mouth_only=True 时只返回
+按 MOUTH_POINTS 顺序排列的 (9, 3) 嘴部关键点，不需要绘制轮廓时可省去复制整张人脸网格。
+
+    python landmark_backend.py --video 录像.mp4 --backends facemesh_refined facemesh face_detect_roi
+"""
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+# 嘴部关键点在 FaceMesh 中的索引
+MOUTH_POINTS = {
+    'top_lip': 13,  # 上嘴唇中点
+    'bottom_lip': 14,  # 下嘴唇中点
+    'left_corner': 78,  # 左嘴角
+    'right_corner': 308,  # 右嘴角
+    'middle_lower': 17,  # 下嘴唇中点（用于位移计算）
+    'left_top': 76,  # 左上嘴唇
+    'right_top': 306,  # 右上嘴唇
+    'left_bottom': 77,  # 左下嘴唇
+    'right_bottom': 307  # 右下嘴唇
+}
+_MOUTH_ROWS = tuple(MOUTH_POINTS.values())
+
+
+class LandmarkBackend:
+    """关键点检测后端基类"""
+
+    name = None
+    full_face = True  # 是否输出 FaceMesh 编号的整张人脸关键点（可绘制轮廓、可用于 ROI 跟踪）
+
+    def __init__(self):
+        self.mouth_indices = np.array(list(MOUTH_POINTS.values()))
+
+    def detect(self, rgb_frame, pool=None, mouth_only=False):
+        """检测关键点；pool 为 FramePool 时结果写入其中的缓冲区
+
+        mouth_only: 只返回嘴部关键点，行号与 MOUTH_POINTS 的顺序一致
+        """
+        raise NotImplementedError
+
+    def copy(self):
+        """创建配置相同、内部跟踪状态独立的新实例"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    @staticmethod
+    def _allocate(pool, shape):
+        return pool.acquire(shape) if pool is not None else np.empty(shape, dtype=np.float32)
+
+
+class FaceMeshBackend(LandmarkBackend):
+    """MediaPipe FaceMesh"""
+
+    def __init__(self, refine_landmarks=True, min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 max_num_faces=1):
+        """max_num_faces: 大于 1 时用 detect_all 取得所有人脸，detect 只返回第一张"""
+        super().__init__()
+        self.name = 'facemesh_refined' if refine_landmarks else 'facemesh'
+        self.options = {
+            'max_num_faces': max_num_faces,
+            'refine_landmarks': refine_landmarks,
+            'min_detection_confidence': min_detection_confidence,
+            'min_tracking_confidence': min_tracking_confidence
+        }
+        self.face_mesh = mp.solutions.face_mesh.FaceMesh(**self.options)
+
+    def detect(self, rgb_frame, pool=None, mouth_only=False):
+        results = self.face_mesh.process(rgb_frame)
+        if not results.multi_face_landmarks:
+            return None
+        landmarks = results.multi_face_landmarks[0].landmark
+        if mouth_only:
+            # 只取 9 个嘴部点，不为整张网格的 478 个点逐个构造元组
+            landmarks = [landmarks[i] for i in _MOUTH_ROWS]
+        points = self._allocate(pool, (len(landmarks), 3))
+        points[:] = [(lm.x, lm.y, lm.z) for lm in landmarks]
+        return points
+
+    def detect_all(self, rgb_frame, mouth_only=False):
+        """检测画面中所有人脸，返回 (人脸数, M, 3) 数组，没有人脸时返回 None"""
+        results = self.face_mesh.process(rgb_frame)
+        if not results.multi_face_landmarks:
+            return None
+        faces = [face.landmark for face in results.multi_face_landmarks]
+        if mouth_only:
+            faces = [[landmarks[i] for i in _MOUTH_ROWS] for landmarks in faces]
+        return np.array([[(lm.x, lm.y, lm.z) for lm in landmarks] for landmarks in faces], dtype=np.float32)
+
+    def copy(self, **overrides):
+        """overrides: 替换部分 FaceMesh 参数，例如 min_tracking_confidence"""
+        options = dict(self.options)
+        options.update(overrides)
+        return FaceMeshBackend(**options)
+
+    def close(self):
+        self.face_mesh.close()
+
+
+class _FaceBoxTracker:
+    """用 MediaPipe 人脸检测器定位人脸框，每隔 detect_interval 帧或跟丢时重新检测"""
+
+    def __init__(self, detect_interval=10, padding=0.25, min_confidence=0.5):
+        self.detector = mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=min_confidence)
+        self.detect_interval = detect_interval
+        self.padding = padding
+        self.box = None  # 归一化坐标 (x0, y0, x1, y1)
+        self.frames_since_detect = 0
+
+    def face_box(self, rgb_frame):
+        """当前人脸框的像素坐标 (x0, y0, x1, y1)，没有人脸时返回 None"""
+        if self.box is None or self.frames_since_detect >= self.detect_interval:
+            self.frames_since_detect = 0
+            results = self.detector.process(rgb_frame)
+            if not results.detections:
+                self.box = None
+                return None
+            box = results.detections[0].location_data.relative_bounding_box
+            pad_w, pad_h = box.width * self.padding, box.height * self.padding
+            self.box = (box.xmin - pad_w, box.ymin - pad_h,
+                        box.xmin + box.width + pad_w, box.ymin + box.height + pad_h)
+        self.frames_since_detect += 1
+
+        h, w = rgb_frame.shape[:2]
+        x0, y0, x1, y1 = self.box
+        x0, x1 = max(int(x0 * w), 0), min(int(x1 * w), w)
+        y0, y1 = max(int(y0 * h), 0), min(int(y1 * h), h)
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            self.box = None
+            return None
+        return x0, y0, x1, y1
+
+    def lost(self):
+        """框内没有找到关键点，下一帧重新检测"""
+        self.box = None
+
+    def close(self):
+        self.detector.close()
+
+
+def map_crop_to_frame(points, x0, y0, crop_w, crop_h, w, h):
+    """把裁剪区域内的归一化坐标换算回整帧的归一化坐标"""
+    points[:, 0] *= crop_w / w
+    points[:, 0] += x0 / w
+    points[:, 1] *= crop_h / h
+    points[:, 1] += y0 / h
+    points[:, 2] *= crop_w / w
+
+
+class FaceDetectionRoiBackend(LandmarkBackend):
+    """人脸检测器定位 + 只在人脸框内运行 FaceMesh，输入分辨率较高时明显更快"""
+
+    name = 'face_detect_roi'
+
+    def __init__(self, detect_interval=10, padding=0.25):
+        super().__init__()
+        self.detect_interval = detect_interval
+        self.padding = padding
+        self.tracker = _FaceBoxTracker(detect_interval, padding)
+        self.mesh = FaceMeshBackend(refine_landmarks=False)
+
+    def detect(self, rgb_frame, pool=None, mouth_only=False):
+        box = self.tracker.face_box(rgb_frame)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        points = self.mesh.detect(np.ascontiguousarray(rgb_frame[y0:y1, x0:x1]), pool, mouth_only)
+        if points is None:
+            self.tracker.lost()
+            return None
+        h, w = rgb_frame.shape[:2]
+        map_crop_to_frame(points, x0, y0, x1 - x0, y1 - y0, w, h)
+        return points
+
+    def copy(self):
+        return FaceDetectionRoiBackend(self.detect_interval, self.padding)
+
+    def close(self):
+        self.tracker.close()
+        self.mesh.close()
+
+
+class DnnLipBackend(LandmarkBackend):
+    """OpenCV DNN 运行的唇部关键点模型，只输出嘴部的 9 个点
+
+    模型要求：输入为 RGB 嘴部裁剪图（NCHW，像素值缩放到 0~1），
+    输出 9×2 个数，依次为 MOUTH_POINTS 各点在裁剪图内的归一化 (x, y)。
+    嘴部裁剪区域取人脸框的下半部分。
+    """
+
+    name = 'dnn_lip'
+    full_face = False
+
+    def __init__(self, model_path, input_size=(64, 64), detect_interval=10):
+        super().__init__()
+        self.model_path = model_path
+        self.input_size = input_size
+        self.detect_interval = detect_interval
+        self.net = cv2.dnn.readNet(model_path)
+        self.tracker = _FaceBoxTracker(detect_interval, padding=0.1)
+        self.mouth_indices = np.arange(len(MOUTH_POINTS))
+
+    def detect(self, rgb_frame, pool=None, mouth_only=False):
+        # 本身只输出嘴部关键点，mouth_only 不影响结果
+        box = self.tracker.face_box(rgb_frame)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        y0 = (y0 + y1) // 2  # 只取人脸下半部分
+        crop = rgb_frame[y0:y1, x0:x1]
+        blob = cv2.dnn.blobFromImage(crop, 1 / 255.0, self.input_size)
+        self.net.setInput(blob)
+        output = self.net.forward().reshape(-1, 2)
+        if len(output) != len(MOUTH_POINTS):
+            raise ValueError(f'唇部模型应输出 {len(MOUTH_POINTS)} 个点，实际为 {len(output)}')
+
+        points = self._allocate(pool, (len(MOUTH_POINTS), 3))
+        points[:, :2] = output
+        points[:, 2] = 0
+        h, w = rgb_frame.shape[:2]
+        map_crop_to_frame(points, x0, y0, x1 - x0, y1 - y0, w, h)
+        return points
+
+    def copy(self):
+        return DnnLipBackend(self.model_path, self.input_size, self.detect_interval)
+
+    def close(self):
+        self.tracker.close()
+
+
+BACKENDS = {
+    'facemesh_refined': lambda **kwargs: FaceMeshBackend(refine_landmarks=True, **kwargs),
+    'facemesh': lambda **kwargs: FaceMeshBackend(refine_landmarks=False, **kwargs),
+    'face_detect_roi': FaceDetectionRoiBackend,
+    'dnn_lip': DnnLipBackend
+}
+
+
+def create_backend(kind='facemesh_refined', **kwargs):
+    """按名称创建后端；传入后端实例时原样返回"""
+    if isinstance(kind, LandmarkBackend):
+        return kind
+    if kind not in BACKENDS:
+        raise ValueError(f'未知的关键点后端: {kind}，可选 {", ".join(BACKENDS)}')
+    return BACKENDS[kind](**kwargs)
+
+
+def compare_backends(frames, backends, reference='facemesh_refined'):
+    """在同一组帧上比较各后端的速度和嘴部关键点精度
+
+    frames: BGR 帧的列表
+    backends: {名称: 后端实例}；精度以 reference 后端的嘴部关键点为基准
+    返回每个后端的检出率、每帧耗时分位数，以及与基准的嘴部点平均误差（归一化坐标）和张口距离误差
+    """
+    rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    slots = {name: i for i, name in enumerate(MOUTH_POINTS)}
+    mouths = {}
+    report = {}
+    for name, backend in backends.items():
+        timings = []
+        points = np.full((len(rgb_frames), len(MOUTH_POINTS), 2), np.nan, dtype=np.float32)
+        for i, rgb in enumerate(rgb_frames):
+            start = time.perf_counter()
+            face_points = backend.detect(rgb)
+            timings.append(time.perf_counter() - start)
+            if face_points is not None:
+                points[i] = face_points[backend.mouth_indices, :2]
+        mouths[name] = points
+        values = np.asarray(timings) * 1000
+        p50, p95 = np.percentile(values, (50, 95)).tolist()
+        report[name] = {
+            'detection_rate': float((~np.isnan(points[:, 0, 0])).mean()),
+            'mean_ms': float(values.mean()),
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'fps': 1000 / float(values.mean()) if values.mean() > 0 else None
+        }
+
+    if reference in mouths:
+        base = mouths[reference]
+        base_open = np.linalg.norm(base[:, slots['top_lip']] - base[:, slots['bottom_lip']], axis=1)
+        for name, points in mouths.items():
+            both = ~np.isnan(points[:, 0, 0]) & ~np.isnan(base[:, 0, 0])
+            if not both.any():
+                continue
+            error = np.linalg.norm(points[both] - base[both], axis=2)
+            opening = np.linalg.norm(points[both, slots['top_lip']] - points[both, slots['bottom_lip']], axis=1)
+            report[name]['mouth_point_error'] = float(error.mean())
+            report[name]['vertical_error'] = float(np.abs(opening - base_open[both]).mean())
+    return report
+
+
+def main(argv=None):
+    import argparse
+    import json
+
+    from frame_source import open_source
+
+    parser = argparse.ArgumentParser(description='比较关键点后端的速度和精度')
+    parser.add_argument('--video', required=True, help='视频文件、图片目录或摄像头编号')
+    parser.add_argument('-n', '--frames', type=int, default=200, help='使用的帧数')
+    parser.add_argument('--backends', nargs='+', default=['facemesh_refined', 'facemesh', 'face_detect_roi'],
+                        help=f'要比较的后端：{", ".join(BACKENDS)}')
+    parser.add_argument('--lip-model', help='dnn_lip 后端使用的 ONNX 模型')
+    parser.add_argument('--reference', default='facemesh_refined', help='作为精度基准的后端')
+    args = parser.parse_args(argv)
+
+    frames = []
+    with open_source(args.video) as source:
+        for frame, _ in source:
+            frames.append(frame)
+            if len(frames) >= args.frames:
+                break
+
+    names = list(dict.fromkeys(args.backends + [args.reference]))
+    backends = {}
+    for name in names:
+        kwargs = {'model_path': args.lip_model} if name == 'dnn_lip' else {}
+        backends[name] = create_backend(name, **kwargs)
+    try:
+        report = compare_backends(frames, backends, args.reference)
+    finally:
+        for backend in backends.values():
+            backend.close()
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
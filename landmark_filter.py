@@ -0,0 +1,132 @@
+"""嘴部关键点的时域平滑滤波
+
+两种滤波器都以 NumPy 数组保存每个关键点每个坐标的状态，整组关键点一次向量化更新。
+filter 在原数组上写入平滑结果；predict 按当前速度外推，供跳过推理的帧使用。
+"""
+import math
+
+import numpy as np
+
+
+class OneEuroFilter:
+    """One-Euro 滤波：静止时强平滑去抖，快速运动时自动提高截止频率以减少滞后"""
+
+    def __init__(self, min_cutoff=1.0, beta=5.0, d_cutoff=1.0):
+        """
+        min_cutoff: 静止时的截止频率（Hz），越小越平滑
+        beta: 速度对截止频率的影响系数，越大运动时滞后越小
+        d_cutoff: 速度估计的截止频率（Hz）
+        """
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.x = None  # 上一次的平滑值
+        self.dx = None  # 上一次的平滑速度
+        self.t = None
+
+    @staticmethod
+    def alpha(cutoff, dt):
+        """由截止频率和时间间隔计算平滑系数，cutoff 可以是数组"""
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, points, t):
+        """平滑一帧关键点，结果写回 points 并返回"""
+        if self.x is None or t <= self.t:
+            self.x = points.astype(np.float64)
+            self.dx = np.zeros_like(self.x)
+            self.t = t
+            return points
+
+        dt = t - self.t
+        dx = (points - self.x) / dt
+        self.dx += self.alpha(self.d_cutoff, dt) * (dx - self.dx)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.dx)
+        self.x += self.alpha(cutoff, dt) * (points - self.x)
+        self.t = t
+        points[:] = self.x
+        return points
+
+    def predict(self, t, out):
+        """按平滑速度外推到时间 t，写入 out；没有状态时返回 None"""
+        if self.x is None:
+            return None
+        np.multiply(self.dx, t - self.t, out=out, casting='unsafe')
+        out += self.x
+        return out
+
+
+class KalmanFilter:
+    """匀速模型的卡尔曼滤波，每个关键点的每个坐标独立维护 [位置, 速度] 状态"""
+
+    def __init__(self, process_noise=1.0, measurement_noise=0.002 ** 2):
+        """
+        process_noise: 加速度噪声的方差（归一化坐标/秒²），越大跟随越快
+        measurement_noise: 关键点测量噪声的方差（归一化坐标²），越大越平滑
+        """
+        self.q = process_noise
+        self.r = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.p = None  # 位置
+        self.v = None  # 速度
+        self.p00 = self.p01 = self.p11 = None  # 协方差矩阵的三个独立元素
+        self.t = None
+
+    def _predict_state(self, dt):
+        """把状态和协方差预测到 dt 秒之后"""
+        q = self.q
+        self.p += self.v * dt
+        self.p00 += dt * (2 * self.p01 + dt * self.p11) + q * dt ** 4 / 4
+        self.p01 += dt * self.p11 + q * dt ** 3 / 2
+        self.p11 += q * dt ** 2
+
+    def filter(self, points, t):
+        """用一帧测量更新状态，平滑结果写回 points 并返回"""
+        if self.p is None or t <= self.t:
+            self.p = points.astype(np.float64)
+            self.v = np.zeros_like(self.p)
+            self.p00 = np.full_like(self.p, self.r)
+            self.p01 = np.zeros_like(self.p)
+            self.p11 = np.full_like(self.p, 1.0)
+            self.t = t
+            return points
+
+        self._predict_state(t - self.t)
+        self.t = t
+
+        s = self.p00 + self.r
+        k0 = self.p00 / s
+        k1 = self.p01 / s
+        residual = points - self.p
+        self.p += k0 * residual
+        self.v += k1 * residual
+        self.p11 -= k1 * self.p01
+        self.p00 *= 1 - k0
+        self.p01 *= 1 - k0
+
+        points[:] = self.p
+        return points
+
+    def predict(self, t, out):
+        """按当前速度外推到时间 t（不改变滤波状态），写入 out；没有状态时返回 None"""
+        if self.p is None:
+            return None
+        np.multiply(self.v, t - self.t, out=out, casting='unsafe')
+        out += self.p
+        return out
+
+
+def create_filter(kind, **kwargs):
+    """按名称创建滤波器：'one_euro'、'kalman'，None 表示不平滑"""
+    if kind is None:
+        return None
+    if kind == 'one_euro':
+        return OneEuroFilter(**kwargs)
+    if kind == 'kalman':
+        return KalmanFilter(**kwargs)
+    raise ValueError(f'未知的平滑滤波器: {kind}')
@@ -0,0 +1,224 @@
+"""局域网测量广播服务：把测量结果和动作统计推送给远程看板
+
+协议为 TCP 上逐行的 JSON，每条消息一行：
+    {"type": "measurement", "time": 1700000000.0, "measurement": {...}, "action_stats": {...}}
+客户端可以随时发送一行 JSON 调整自己的订阅，例如 {"max_fps": 5} 表示最多每秒接收 5 条，
+{"max_fps": null} 或 0 表示不限制；无法解析或取值无效的设置会被忽略。
+
+服务在独立线程的 asyncio 事件循环中运行。每个客户端有自己的有界队列，队列满时丢弃最旧的消息，
+慢客户端只会丢消息，不会阻塞推理线程或其他客户端。
+"""
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+
+
+class _Subscriber:
+    """一个已连接的客户端及其发送队列"""
+
+    def __init__(self, peer, queue_size):
+        self.peer = peer
+        self.queue = deque(maxlen=queue_size)
+        self.ready = asyncio.Event()
+        self.max_fps = None  # 为 None 时不降采样
+        self.last_accepted = 0.0
+        self.sent = 0
+        self.dropped = 0  # 队列满时被挤掉的消息数
+        self.skipped = 0  # 因降采样跳过的消息数
+
+    def offer(self, data, now):
+        """放入一条消息；按订阅的帧率降采样，队列满时丢弃最旧的消息"""
+        if self.max_fps and now - self.last_accepted < 1.0 / self.max_fps:
+            self.skipped += 1
+            return
+        self.last_accepted = now
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+        self.queue.append(data)
+        self.ready.set()
+
+
+class MeasurementServer:
+    """在后台线程中运行的测量广播服务"""
+
+    def __init__(self, host='127.0.0.1', port=8765, queue_size=64):
+        """
+        host: 监听地址，'0.0.0.0' 表示允许局域网访问
+        port: 监听端口，0 表示由系统分配
+        queue_size: 每个客户端最多缓存的消息数
+        """
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.loop = None
+        self.subscribers = set()
+        self.published = 0
+
+        self._server = None
+        self._thread = None
+        self._started = threading.Event()
+        self._error = None
+
+    def start(self, timeout=5.0):
+        """启动服务线程，返回实际监听的端口"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait(timeout)
+        if self._error is not None:
+            raise self._error
+        return self.port
+
+    def stop(self, timeout=2.0):
+        """关闭服务和所有客户端连接"""
+        if self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def publish(self, measurement, action_stats=None):
+        """广播一条测量结果，可以在任意线程中调用，不会阻塞"""
+        loop = self.loop
+        if loop is None or not loop.is_running():
+            return
+        if action_stats is not None:
+            # 复制一份，避免序列化时推理线程仍在修改
+            action_stats = {action: dict(stats) for action, stats in action_stats.items()}
+        message = {
+            'type': 'measurement',
+            'time': time.time(),
+            'measurement': dict(measurement) if measurement else None,
+            'action_stats': action_stats
+        }
+        loop.call_soon_threadsafe(self._broadcast, message)
+
+    def get_stats(self):
+        """各客户端的发送和丢弃计数"""
+        return {
+            'published': self.published,
+            'clients': [{
+                'peer': str(sub.peer),
+                'max_fps': sub.max_fps,
+                'queued': len(sub.queue),
+                'sent': sub.sent,
+                'dropped': sub.dropped,
+                'skipped': sub.skipped
+            } for sub in list(self.subscribers)]
+        }
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_client, self.host, self.port))
+        except OSError as e:
+            self._error = e
+            self._started.set()
+            self.loop.close()
+            self.loop = None
+            return
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._started.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+            self.loop.run_until_complete(asyncio.sleep(0))
+            self.loop.close()
+            self.loop = None
+
+    def _broadcast(self, message):
+        """在事件循环中执行：序列化一次，分发给所有客户端"""
+        self.published += 1
+        if not self.subscribers:
+            return
+        data = (json.dumps(message, ensure_ascii=False, default=float) + '\n').encode('utf-8')
+        now = time.monotonic()
+        for sub in self.subscribers:
+            sub.offer(data, now)
+
+    async def _handle_client(self, reader, writer):
+        sub = _Subscriber(writer.get_extra_info('peername'), self.queue_size)
+        self.subscribers.add(sub)
+        control = asyncio.ensure_future(self._read_control(reader, sub))
+        try:
+            while not control.done():
+                await sub.ready.wait()
+                sub.ready.clear()
+                while sub.queue:
+                    writer.write(sub.queue.popleft())
+                    sub.sent += 1
+                    # 只有这个客户端自己的协程在此等待，期间新消息继续进入队列
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(sub)
+            control.cancel()
+            writer.close()
+
+    async def _read_control(self, reader, sub):
+        """读取客户端发送的订阅设置，连接断开时结束"""
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                continue  # 超长的行已被丢弃
+            except ConnectionError:
+                line = b''
+            if not line:
+                sub.ready.set()  # 唤醒发送协程使其退出
+                return
+            try:
+                options = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(options, dict) and 'max_fps' in options:
+                max_fps = options['max_fps']
+                if max_fps is None or max_fps == 0:
+                    sub.max_fps = None
+                elif _valid_rate(max_fps):
+                    sub.max_fps = float(max_fps)
+
+
+def _valid_rate(value):
+    """是否为有限的正数（不接受布尔值和字符串）"""
+    return (isinstance(value, (int, float)) and not isinstance(value, bool)
+            and math.isfinite(value) and value > 0)
+
+
+def main(argv=None):
+    import argparse
+
+    from stream import capture_frames, stream_measurements
+    from mouth_detector import MouthDetector
+
+    parser = argparse.ArgumentParser(description='不启动界面，运行检测并通过 TCP 广播测量结果')
+    parser.add_argument('--source', default='0', help='摄像头编号或视频文件')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址，0.0.0.0 允许局域网访问')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    args = parser.parse_args(argv)
+
+    source = int(args.source) if args.source.isdigit() else args.source
+    detector = MouthDetector(render=False)
+    server = MeasurementServer(args.host, args.port)
+    port = server.start()
+    print(f'正在监听 {args.host}:{port}')
+    try:
+        for record in stream_measurements(capture_frames(source), detector):
+            server.publish(record['measurement'], detector.action_stats)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
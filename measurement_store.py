@@ -0,0 +1,130 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+# 每帧测量字典中保存到历史记录的字段
+MEASUREMENT_FIELDS = ('frame', 'displacement', 'vertical', 'horizontal', 'left_rotation', 'right_rotation')
+
+
+class MeasurementStore(Sequence):
+    """列式存储的测量历史
+
+    数据保存在预分配的 NumPy 结构化数组中，追加为 O(1)。未指定 capacity 时空间不足按倍数扩容；
+    指定 capacity 后作为环形缓冲区，只保留最近 capacity 帧。按下标访问时才惰性生成字典，
+    因此可以像原来的字典列表一样使用。
+    """
+
+    def __init__(self, capacity=None, initial_size=1024, fields=MEASUREMENT_FIELDS):
+        self.fields = tuple(fields)
+        self.dtype = np.dtype([(name, np.int64 if name == 'frame' else np.float32) for name in self.fields])
+        self.capacity = capacity
+        size = capacity if capacity is not None else initial_size
+        self._data = np.zeros(size, dtype=self.dtype)
+        self._start = 0  # 环形缓冲区中最旧一条记录的位置
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('measurement index out of range')
+        row = self._data[(self._start + index) % len(self._data)]
+        return {name: row[name].item() for name in self.fields}
+
+    def append(self, measurements):
+        """追加一帧测量结果（字典），缺失的字段记为 0"""
+        size = len(self._data)
+        if self._length == size:
+            if self.capacity is None:
+                self._grow()
+                size = len(self._data)
+            else:
+                # 环形缓冲区已满，覆盖最旧的一条
+                self._start = (self._start + 1) % size
+                self._length -= 1
+
+        row = self._data[(self._start + self._length) % size]
+        for name in self.fields:
+            row[name] = measurements.get(name, 0)
+        self._length += 1
+
+    def _grow(self):
+        """容量翻倍，数据保持时间顺序"""
+        data = np.zeros(len(self._data) * 2, dtype=self.dtype)
+        data[:self._length] = self.to_array()
+        self._data = data
+        self._start = 0
+
+    def clear(self):
+        """清空历史记录（不释放已分配的空间）"""
+        self._start = 0
+        self._length = 0
+
+    def to_array(self):
+        """按时间顺序返回全部记录的结构化数组"""
+        end = self._start + self._length
+        if end <= len(self._data):
+            return self._data[self._start:end]
+        return np.concatenate((self._data[self._start:], self._data[:end - len(self._data)]))
+
+    def column(self, field):
+        """按时间顺序返回某个字段的数组"""
+        return self.to_array()[field]
+
+    def max(self, field):
+        """字段最大值，无数据时返回 None"""
+        if not self._length:
+            return None
+        return float(self.column(field).max())
+
+    def min(self, field):
+        """字段最小值，无数据时返回 None"""
+        if not self._length:
+            return None
+        return float(self.column(field).min())
+
+    def mean(self, field, last=None):
+        """字段均值；指定 last 时只统计最近 last 帧"""
+        values = self.column(field)
+        if last is not None:
+            values = values[-last:]
+        if not len(values):
+            return None
+        return float(values.mean(dtype=np.float64))
+
+    def percentile(self, field, q):
+        """字段分位数，q 可以是单个值或序列（0-100）"""
+        if not self._length:
+            return None
+        return np.percentile(self.column(field), q)
+
+    def windowed_mean(self, field, window):
+        """长度为 window 的滑动窗口均值，返回长度为 len - window + 1 的数组"""
+        values = self.column(field).astype(np.float64)
+        if window <= 0 or len(values) < window:
+            return np.empty(0)
+        cumsum = np.cumsum(np.concatenate(([0.0], values)))
+        return (cumsum[window:] - cumsum[:-window]) / window
+
+    def summary(self, percentiles=(50, 95, 99)):
+        """所有数值字段的最大值、最小值、均值和分位数"""
+        if not self._length:
+            return {}
+        data = self.to_array()
+        result = {}
+        for name in self.fields:
+            if name == 'frame':
+                continue
+            values = data[name]
+            result[name] = {
+                'max': float(values.max()),
+                'min': float(values.min()),
+                'mean': float(values.mean(dtype=np.float64)),
+                'percentiles': dict(zip(percentiles, np.percentile(values, percentiles).tolist()))
+            }
+        return result
@@ -1,21 +1,41 @@
 import cv2
-import mediapipe as mp
 import numpy as np
 import time
 
+from action_stats import MOVEMENT_THRESHOLD, OPEN_THRESHOLD, ActionStatistics, classify_action
+from frame_pool import FramePool
+from frame_scheduler import FrameScheduler
+from landmark_backend import MOUTH_POINTS, FaceMeshBackend, create_backend, map_crop_to_frame
+from landmark_filter import create_filter
+from measurement_store import MeasurementStore
+from overlay_renderer import OverlayRenderer
+from perf_stats import PerfStats
+from session_log import SessionRecorder
 
 class MouthDetector:
-    def __init__(self):
-        """初始化嘴部检测器"""
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        self.drawing = mp.solutions.drawing_utils
-        self.drawing_spec = self.drawing.DrawingSpec(thickness=1, circle_radius=1)
+    def __init__(self, roi_tracking=False, target_fps=None, history_capacity=None, render=True,
+                 smoothing=None, smoothing_params=None, backend='facemesh_refined', backend_params=None,
+                 full_mesh=None):
+        """初始化嘴部检测器
+
+        roi_tracking: 为 True 时启用嘴部 ROI 跟踪模式，检测到人脸后只在其外扩包围框内运行 FaceMesh
+        target_fps: 指定后启用自适应调度，按实测耗时降低推理分辨率或跳帧以维持该帧率
+        history_capacity: 测量历史最多保留的帧数，为 None 时不限制
+        render: 是否在 process_frame 中直接把检测结果画到帧上；无界面运行时设为 False
+        smoothing: 嘴部关键点平滑方式，'one_euro'、'kalman' 或 None（不平滑）
+        smoothing_params: 传给平滑滤波器的参数字典
+        backend: 关键点检测后端名称或 LandmarkBackend 实例，见 landmark_backend.BACKENDS
+        backend_params: 按名称创建后端时传入的参数字典
+        full_mesh: 是否保留整张人脸的关键点（绘制面部轮廓用），为 None 时与 render 相同；
+                   不保留时后端只复制 9 个嘴部点。ROI 跟踪需要整张网格，启用时总是保留
+        """
+        self.backend = create_backend(backend, **(backend_params or {}))
+        self.roi_backend = None
+
+        # 绘制与测量分离：last_overlay 保存最近一帧的绘制数据，可交给其他线程绘制
+        self.render = render
+        self.renderer = OverlayRenderer() if render else None
+        self.last_overlay = None
 
         # 初始化测量值
         self.max_open = 0
@@ -25,21 +45,62 @@ class MouthDetector:
         self.calibration_mode = None
 
         # 定义关键点索引
-        self.MOUTH_POINTS = {
-            'top_lip': 13,  # 上嘴唇中点
-            'bottom_lip': 14,  # 下嘴唇中点
-            'left_corner': 78,  # 左嘴角
-            'right_corner': 308,  # 右嘴角
-            'middle_lower': 17,  # 下嘴唇中点（用于位移计算）
-            'left_top': 76,  # 左上嘴唇
-            'right_top': 306,  # 右上嘴唇
-            'left_bottom': 77,  # 左下嘴唇
-            'right_bottom': 307  # 右下嘴唇
-        }
+        self.MOUTH_POINTS = dict(MOUTH_POINTS)
+        # 嘴部关键点在提取后数组中的行号
+        self.MOUTH_SLOTS = {name: i for i, name in enumerate(self.MOUTH_POINTS)}
+
+        # 计算距离用的点对：第 N 行为上下嘴唇中点，依次为 垂直、水平、左旋转、右旋转
+        n = len(self.MOUTH_POINTS)
+        slots = self.MOUTH_SLOTS
+        self.DISTANCE_PAIRS = (np.array([slots['top_lip'], slots['left_corner'], slots['top_lip'], slots['bottom_lip']]),
+                               np.array([slots['bottom_lip'], slots['right_corner'], n, n]))
+        self._distance_points = np.empty((n + 1, 2), dtype=np.float32)
+
+        # 关键点数组缓冲池：整张人脸 (M, 3) 和嘴部 (N, 3) 各自循环复用。
+        # 容量需覆盖最近两次推理结果；绘制快照 last_overlay 保存自己的副本，不引用池中的缓冲区，
+        # 因为绘制线程何时用完快照与推理线程复用缓冲区的节奏无关
+        self.face_point_pool = FramePool(6, np.float32)
+        self.mouth_point_pool = FramePool(6, np.float32)
+        self.predicted_point_pool = FramePool(6, np.float32)
+
+        # 自适应调度：跳过推理的帧使用前两次推理结果外推嘴部关键点
+        self.scheduler = FrameScheduler(target_fps) if target_fps else None
+        self.inference_scale = 1.0
+        self.last_points = None  # 最近一次推理得到的嘴部关键点
+        self.last_points_time = None
+        self.prev_points = None  # 再上一次推理得到的嘴部关键点
+        self.prev_points_time = None
+
+        # 计算距离前对嘴部关键点做时域平滑，减少抖动导致的动作误判和校准最大值偏大
+        self.smoother = create_filter(smoothing, **(smoothing_params or {}))
+
+        # ROI 跟踪设置
+        # 只有整帧运行的 FaceMesh 后端需要 ROI 跟踪，其他后端自带人脸定位
+        self.roi_tracking = roi_tracking and isinstance(self.backend, FaceMeshBackend)
+        if full_mesh is None:
+            full_mesh = render
+        self.mouth_only = not (full_mesh or self.roi_tracking) or not self.backend.full_face
+        # 嘴部关键点在后端输出数组中的行号
+        self.MOUTH_INDICES = np.arange(len(self.MOUTH_POINTS)) if self.mouth_only else self.backend.mouth_indices
+        self.ROI_PADDING = 0.25  # 人脸包围框向外扩展的比例
+        self.ROI_EDGE_MARGIN = 0.02  # 关键点距裁剪区域边缘小于该比例时视为人脸离开裁剪区域
+        self.ROI_MIN_SIZE = 96  # 裁剪区域的最小边长（像素）
+        self.roi = None  # 当前裁剪区域 (x0, y0, x1, y1)，为 None 时进行全图搜索
+        self.roi_hits = 0  # 在裁剪区域内成功检测的帧数
+        self.full_frame_searches = 0  # 全图检测的帧数
+        if self.roi_tracking:
+            # 裁剪区域使用单独的实例，避免与全图检测的内部跟踪状态互相干扰
+            self.roi_backend = self.backend.copy(min_tracking_confidence=0.7)
 
         # 初始化CSV文件
         self.frame_count = 0
-        self.measurements_history = []
+        self.measurements_history = MeasurementStore(history_capacity)
+
+        # 各阶段耗时统计（推理、测量、绘制）和未检测到人脸的帧数
+        self.perf = PerfStats()
+
+        # 二进制关键点日志，调用 start_recording 后启用
+        self.recorder = None
 
         # 添加动作状态跟踪
         self.action_state = 'neutral'  # 可能的状态：neutral, open, left, right
@@ -49,36 +110,20 @@ class MouthDetector:
         self.last_time = None  # 上一帧的时间
 
         # 动作阈值
-        self.OPEN_THRESHOLD = 0.1  # 张嘴阈值
-        self.MOVEMENT_THRESHOLD = 0.05  # 左右移动阈值
-
-        # 动作统计
-        self.action_stats = {
-            'open': {'total_time': 0, 'count': 0, 'avg_speed': 0},
-            'left': {'total_time': 0, 'count': 0, 'avg_speed': 0},
-            'right': {'total_time': 0, 'count': 0, 'avg_speed': 0}
-        }
+        self.OPEN_THRESHOLD = OPEN_THRESHOLD  # 张嘴阈值
+        self.MOVEMENT_THRESHOLD = MOVEMENT_THRESHOLD  # 左右移动阈值
+
+        # 动作统计，每帧增量更新
+        self.action_engine = ActionStatistics()
 
     def detect_action(self, vertical_dist, displacement, current_time):
         """检测当前动作并计算持续时间和速度"""
         # 确定当前动作
-        new_state = 'neutral'
-        if vertical_dist > self.OPEN_THRESHOLD:
-            new_state = 'open'
-        elif displacement < -self.MOVEMENT_THRESHOLD:
-            new_state = 'left'
-        elif displacement > self.MOVEMENT_THRESHOLD:
-            new_state = 'right'
+        new_state = classify_action(vertical_dist, displacement, self.OPEN_THRESHOLD, self.MOVEMENT_THRESHOLD)
 
         # 如果是新动作
         if new_state != self.action_state:
-            if self.action_state != 'neutral':
-                # 记录上一个动作的统计信息
-                duration = current_time - self.action_start_time
-                self.action_stats[self.action_state]['total_time'] += duration
-                self.action_stats[self.action_state]['count'] += 1
-
-            # 更新状态
+            # 更新状态（上一个动作的统计由 action_engine 在 measure 中记录）
             self.action_state = new_state
             self.action_start_time = current_time
 
@@ -87,186 +132,294 @@ class MouthDetector:
             self.current_action_duration = current_time - self.action_start_time
 
     def calculate_speed(self, current_position, current_time):
-        """计算动作速度"""
+        """计算动作速度，没有上一帧时返回 None"""
+        speed = None
         if self.last_position is not None and self.last_time is not None:
             time_diff = current_time - self.last_time
             if time_diff > 0:
-                distance = np.linalg.norm(current_position - self.last_position)
+                distance = float(np.linalg.norm(current_position - self.last_position))
                 speed = distance / time_diff
 
-                # 更新动作的平均速度
-                if self.action_state != 'neutral':
-                    stats = self.action_stats[self.action_state]
-                    stats['avg_speed'] = (stats['avg_speed'] * stats['count'] + speed) / (stats['count'] + 1)
-
         # 更新上一帧的位置和时间
         self.last_position = current_position.copy()
         self.last_time = current_time
-
-    def calculate_mouth_distances(self, landmarks):
-        """计算嘴部各种距离"""
-        # 获取关键点
-        top_lip = np.array([landmarks[self.MOUTH_POINTS['top_lip']].x,
-                            landmarks[self.MOUTH_POINTS['top_lip']].y])
-        bottom_lip = np.array([landmarks[self.MOUTH_POINTS['bottom_lip']].x,
-                               landmarks[self.MOUTH_POINTS['bottom_lip']].y])
-        left_corner = np.array([landmarks[self.MOUTH_POINTS['left_corner']].x,
-                                landmarks[self.MOUTH_POINTS['left_corner']].y])
-        right_corner = np.array([landmarks[self.MOUTH_POINTS['right_corner']].x,
-                                 landmarks[self.MOUTH_POINTS['right_corner']].y])
-
-        # 计算垂直张开距离
-        vertical_distance = np.linalg.norm(top_lip - bottom_lip)
-
-        # 计算水平距离（左右嘴角之间的距离）
-        horizontal_distance = np.linalg.norm(left_corner - right_corner)
-
-        # 计算旋转（使用上下嘴唇中点）
-        mouth_center_vertical = (top_lip + bottom_lip) / 2
-        left_rotation = np.linalg.norm(top_lip - mouth_center_vertical)
-        right_rotation = np.linalg.norm(bottom_lip - mouth_center_vertical)
-
+        return speed
+
+    @property
+    def action_stats(self):
+        """各动作的累计统计：总时长、次数、平均/峰值速度及其标准差等"""
+        return self.action_engine.summary()
+
+    def get_action_repetitions(self, action):
+        """某种动作每次重复的时长、速度、达峰时间和最大幅度"""
+        return self.action_engine.get_repetitions(action)
+
+    def extract_mouth_points(self, face_points):
+        """从整张人脸的关键点数组中取出嘴部关键点，按 MOUTH_POINTS 的顺序排列为 (N, 3) 数组"""
+        points = self.mouth_point_pool.acquire((len(self.MOUTH_INDICES), 3))
+        np.take(face_points, self.MOUTH_INDICES, axis=0, out=points)
+        return points
+
+    def remember_points(self, points, current_time):
+        """保存最近两次推理的关键点，用于跳帧时外推"""
+        self.prev_points = self.last_points
+        self.prev_points_time = self.last_points_time
+        self.last_points = points
+        self.last_points_time = current_time
+
+    def predict_mouth_points(self, current_time):
+        """跳过推理的帧按匀速运动外推嘴部关键点（启用平滑时使用滤波器的速度估计）"""
+        if self.last_points is None:
+            return None
+        points = self.predicted_point_pool.acquire(self.last_points.shape)
+        if self.smoother is not None:
+            # 平滑滤波器自带速度估计，直接用它外推
+            return self.smoother.predict(current_time, points)
+        if self.prev_points is None or self.last_points_time <= self.prev_points_time:
+            points[:] = self.last_points
+            return points
+        ratio = (current_time - self.last_points_time) / (self.last_points_time - self.prev_points_time)
+        ratio = min(max(ratio, 0.0), 1.0)  # 最多外推一个推理间隔，避免漂移
+        np.subtract(self.last_points, self.prev_points, out=points)
+        points *= ratio
+        points += self.last_points
+        return points
+
+    def calculate_mouth_distances(self, points):
+        """计算嘴部各种距离，所有点对一次向量化计算"""
+        n = len(self.MOUTH_INDICES)
+        xy = self._distance_points
+        xy[:n] = points[:, :2]
+        # 上下嘴唇中点，用于计算旋转
+        xy[n] = (xy[self.MOUTH_SLOTS['top_lip']] + xy[self.MOUTH_SLOTS['bottom_lip']]) / 2
+
+        first, second = self.DISTANCE_PAIRS
+        diffs = xy[first] - xy[second]
+        distances = np.sqrt(np.einsum('ij,ij->i', diffs, diffs, dtype=np.float64))
+
+        # 依次为 垂直张开距离、水平距离（左右嘴角）、左旋转、右旋转
+        vertical_distance, horizontal_distance, left_rotation, right_rotation = distances.tolist()
         return vertical_distance, horizontal_distance, left_rotation, right_rotation
 
-    def process_frame(self, frame):
-        """处理视频帧"""
-        current_time = time.time()  # 获取当前时间
+    def detect_landmarks(self, rgb_frame):
+        """检测人脸关键点，返回整帧归一化坐标的 (M, 3) 数组或 None
+
+        ROI 跟踪模式下优先在上一帧人脸附近的裁剪区域内检测
+        """
+        h, w = rgb_frame.shape[:2]
+
+        if self.roi_tracking and self.roi is not None:
+            x0, y0, x1, y1 = self.roi
+            crop = np.ascontiguousarray(rgb_frame[y0:y1, x0:x1])
+            face_points = self.roi_backend.detect(crop, self.face_point_pool)
+            if face_points is not None:
+                # 置信度不足时 FaceMesh 不会返回结果；人脸贴近裁剪边缘时同样退回全图搜索
+                if self.landmarks_inside_crop(face_points):
+                    map_crop_to_frame(face_points, x0, y0, x1 - x0, y1 - y0, w, h)
+                    self.update_roi(face_points, w, h)
+                    self.roi_hits += 1
+                    return face_points
+            self.roi = None
+
+        self.full_frame_searches += 1
+        face_points = self.backend.detect(rgb_frame, self.face_point_pool, self.mouth_only)
+        if face_points is None:
+            self.roi = None
+            return None
+
+        if self.roi_tracking:
+            self.update_roi(face_points, w, h)
+        return face_points
+
+    def landmarks_inside_crop(self, face_points):
+        """判断裁剪区域内检测到的关键点是否都远离裁剪边缘"""
+        margin = self.ROI_EDGE_MARGIN
+        xy = face_points[:, :2]
+        return bool(((xy >= margin) & (xy <= 1 - margin)).all())
+
+    def update_roi(self, face_points, w, h):
+        """根据当前人脸关键点更新下一帧的裁剪区域"""
+        min_x, min_y = face_points[:, :2].min(axis=0) * (w, h)
+        max_x, max_y = face_points[:, :2].max(axis=0) * (w, h)
+
+        pad_x = max((max_x - min_x) * self.ROI_PADDING, (self.ROI_MIN_SIZE - (max_x - min_x)) / 2)
+        pad_y = max((max_y - min_y) * self.ROI_PADDING, (self.ROI_MIN_SIZE - (max_y - min_y)) / 2)
+        x0 = max(int(min_x - pad_x), 0)
+        y0 = max(int(min_y - pad_y), 0)
+        x1 = min(int(max_x + pad_x), w)
+        y1 = min(int(max_y + pad_y), h)
+
+        if x1 - x0 < 2 or y1 - y0 < 2:
+            self.roi = None
+        else:
+            self.roi = (x0, y0, x1, y1)
+
+    def run_inference(self, frame, current_time, is_rgb=False):
+        """按调度器选定的分辨率运行关键点检测，返回整张人脸的关键点数组或 None"""
+        start = time.perf_counter()
+
+        scale = self.scheduler.scale if self.scheduler is not None else 1.0
+        if scale != self.inference_scale:
+            # 分辨率变化后原裁剪区域的像素坐标失效
+            self.inference_scale = scale
+            self.roi = None
+        if scale != 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+        rgb_frame = frame if is_rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        face_points = self.detect_landmarks(rgb_frame)
+        if face_points is not None:
+            mouth_points = self.extract_mouth_points(face_points)
+            if self.smoother is not None:
+                self.smoother.filter(mouth_points, current_time)
+            self.remember_points(mouth_points, current_time)
+        else:
+            # 人脸丢失时不再外推旧位置
+            self.last_points = None
+            self.prev_points = None
+            if self.smoother is not None:
+                self.smoother.reset()
+
+        if self.scheduler is not None:
+            self.scheduler.record(time.perf_counter() - start)
+        return face_points
+
+    def process_frame(self, frame, draw=None, is_rgb=False, timestamp=None):
+        """处理视频帧
+
+        draw: 是否在帧上绘制检测结果，为 None 时按构造时的 render 设置
+        is_rgb: 输入帧已经是 RGB 顺序时设为 True，省去一次颜色转换
+        timestamp: 帧来源提供的时间戳（秒），动作时长和速度都按它计算，
+                   因此离线加速处理与实时采集结果一致；为 None 时使用单调时钟
+        """
+        current_time = time.monotonic() if timestamp is None else timestamp
         self.frame_count += 1
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_mesh.process(rgb_frame)
-
-        if results.multi_face_landmarks:
-            face_landmarks = results.multi_face_landmarks[0]
-
-            # 绘制面部网格
-            self.drawing.draw_landmarks(
-                image=frame,
-                landmark_list=face_landmarks,
-                connections=self.mp_face_mesh.FACEMESH_CONTOURS,
-                landmark_drawing_spec=self.drawing_spec,
-                connection_drawing_spec=self.drawing_spec)
-
-            # 获取上嘴唇中点位置
-            upper_lip = np.array([face_landmarks.landmark[self.MOUTH_POINTS['top_lip']].x,
-                                  face_landmarks.landmark[self.MOUTH_POINTS['top_lip']].y])
-
-            # 计算嘴部距离
-            vertical_dist, horizontal_dist, left_rot, right_rot = self.calculate_mouth_distances(
-                face_landmarks.landmark)
-
-            # 如果是第一帧，初始化初始位置
-            if self.initial_position is None:
-                self.initial_position = upper_lip.copy()
-                return {
-                    'frame': self.frame_count,
-                    'displacement': 0,
-                    'vertical': vertical_dist,
-                    'horizontal': horizontal_dist,
-                    'left_rotation': left_rot,
-                    'right_rotation': right_rot
-                }
-
-            # 计算水平位移
-            displacement = upper_lip[0] - self.initial_position[0]
-
-            # 检测动作和计算速度
-            self.detect_action(vertical_dist, displacement, current_time)
-            self.calculate_speed(upper_lip, current_time)
-
-            # 如果在校准模式下，更新最大值
-            if self.calibration_mode == 'open':
-                self.max_open = max(self.max_open, vertical_dist)
-            elif self.calibration_mode == 'left':
-                self.max_left = min(self.max_left, displacement)
-            elif self.calibration_mode == 'right':
-                self.max_right = max(self.max_right, displacement)
-
-            # 在图像上绘制测量点和位移线
-            self.draw_measurements(frame, face_landmarks.landmark, displacement,
-                                   vertical_dist, horizontal_dist, left_rot, right_rot)
-
-            # 保存测量结果
+        face_points = None
+        self.last_overlay = None
+
+        clock = time.perf_counter
+        perf = self.perf
+        start = clock()
+
+        if self.scheduler is None or self.scheduler.should_infer():
+            face_points = self.run_inference(frame, current_time, is_rgb)
+            mouth_points = self.last_points if face_points is not None else None
+            perf.record('inference', clock() - start)
+            if face_points is None:
+                perf.count('no_face')
+        else:
+            mouth_points = self.predict_mouth_points(current_time)
+            perf.count('skipped')
+
+        measurements = None
+        if mouth_points is not None:
+            measure_start = clock()
+            # 第一帧只用于确定初始位置，与原来一样不显示测量值
+            first_frame = self.initial_position is None
+            measurements = self.measure(mouth_points, current_time)
+            # 跳过推理的帧没有完整网格，只绘制嘴部测量
+            self.last_overlay = self.make_overlay(face_points, mouth_points,
+                                                  None if first_frame else measurements)
+            perf.record('measurement', clock() - measure_start)
+
+        if draw is None:
+            draw = self.render
+        if draw and self.last_overlay is not None:
+            draw_start = clock()
+            if self.renderer is None:
+                self.renderer = OverlayRenderer()
+            self.renderer.render(frame, self.last_overlay, rgb=is_rgb)
+            perf.record('drawing', clock() - draw_start)
+
+        perf.count('frames')
+        return measurements
+
+    def measure(self, mouth_points, current_time):
+        """由嘴部关键点计算测量值，更新动作状态和校准最大值"""
+        # 获取上嘴唇中点位置
+        upper_lip = mouth_points[self.MOUTH_SLOTS['top_lip'], :2]
+
+        # 计算嘴部距离
+        vertical_dist, horizontal_dist, left_rot, right_rot = self.calculate_mouth_distances(
+            mouth_points)
+
+        # 如果是第一帧，初始化初始位置
+        if self.initial_position is None:
+            self.initial_position = upper_lip.copy()
             measurements = {
                 'frame': self.frame_count,
-                'displacement': displacement,
+                'displacement': 0,
                 'vertical': vertical_dist,
                 'horizontal': horizontal_dist,
                 'left_rotation': left_rot,
                 'right_rotation': right_rot
             }
-            self.measurements_history.append(measurements)
-
+            if self.recorder is not None:
+                self.recorder.write(current_time, measurements, mouth_points)
             return measurements
-        return None
-
-    def draw_measurements(self, frame, landmarks, displacement, vertical_dist,
-                          horizontal_dist, left_rot, right_rot):
-        """绘制测量结果"""
-        h, w = frame.shape[:2]
-
-        # 获取上下嘴唇中点的当前位置
-        top_x = int(landmarks[self.MOUTH_POINTS['top_lip']].x * w)
-        top_y = int(landmarks[self.MOUTH_POINTS['top_lip']].y * h)
-        bottom_x = int(landmarks[self.MOUTH_POINTS['bottom_lip']].x * w)
-        bottom_y = int(landmarks[self.MOUTH_POINTS['bottom_lip']].y * h)
-
-        # 绘制跟踪点
-        cv2.circle(frame, (top_x, top_y), 3, (0, 0, 255), -1)  # 红色点跟踪上嘴唇
-        cv2.circle(frame, (bottom_x, bottom_y), 3, (255, 0, 0), -1)  # 蓝色点跟踪下嘴唇
-
-        # 获取并绘制嘴部关键点
-        top_lip = (top_x, top_y)
-        bottom_lip = (bottom_x, bottom_y)
-        left_corner = (int(landmarks[self.MOUTH_POINTS['left_corner']].x * w),
-                       int(landmarks[self.MOUTH_POINTS['left_corner']].y * h))
-        right_corner = (int(landmarks[self.MOUTH_POINTS['right_corner']].x * w),
-                        int(landmarks[self.MOUTH_POINTS['right_corner']].y * h))
-
-        # 绘制上下嘴唇中点和连接线
-        cv2.circle(frame, top_lip, 2, (0, 255, 255), -1)  # 黄色点标记上嘴唇中点
-        cv2.circle(frame, bottom_lip, 2, (0, 255, 255), -1)  # 黄色点标记下嘴唇中点
-        cv2.line(frame, top_lip, bottom_lip, (0, 255, 0), 2)  # 绿色线连接上下嘴唇中点
-
-        # 绘制嘴角连接线
-        cv2.line(frame, left_corner, right_corner, (0, 255, 0), 2)  # 水平线（绿色）
-
-        # 显示测量值
-        cv2.putText(frame, f'Displacement: {displacement:.3f}', (30, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
-        cv2.putText(frame, f'Vertical: {vertical_dist:.3f}', (30, 60),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(frame, f'Horizontal: {horizontal_dist:.3f}', (30, 90),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(frame, f'Left Rot: {left_rot:.3f}', (30, 120),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-        cv2.putText(frame, f'Right Rot: {right_rot:.3f}', (30, 150),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-
-        # 显示当前动作信息
+
+        # 计算水平位移
+        displacement = float(upper_lip[0] - self.initial_position[0])
+
+        # 检测动作和计算速度
+        self.detect_action(vertical_dist, displacement, current_time)
+        speed = self.calculate_speed(upper_lip, current_time)
+        amplitude = vertical_dist if self.action_state == 'open' else abs(displacement)
+        self.action_engine.update(self.action_state, current_time, speed, amplitude)
+
+        # 如果在校准模式下，更新最大值
+        if self.calibration_mode == 'open':
+            self.max_open = max(self.max_open, vertical_dist)
+        elif self.calibration_mode == 'left':
+            self.max_left = min(self.max_left, displacement)
+        elif self.calibration_mode == 'right':
+            self.max_right = max(self.max_right, displacement)
+
+        # 保存测量结果
+        measurements = {
+            'frame': self.frame_count,
+            'displacement': displacement,
+            'vertical': vertical_dist,
+            'horizontal': horizontal_dist,
+            'left_rotation': left_rot,
+            'right_rotation': right_rot
+        }
+        self.measurements_history.append(measurements)
+        if self.recorder is not None:
+            self.recorder.write(current_time, measurements, mouth_points)
+
+        return measurements
+
+    def make_overlay(self, face_points, mouth_points, measurements):
+        """生成当前帧的绘制数据快照，供 OverlayRenderer 在任意线程中绘制
+
+        关键点数组复制一份，推理线程之后复用缓冲池时不会改动已交给绘制线程的快照
+        """
+        # 只有嘴部点时不绘制轮廓
+        landmarks = face_points.copy() if face_points is not None and not self.mouth_only else None
+        overlay = {
+            'landmarks': landmarks,
+            'points': mouth_points.copy(),
+            'slots': self.MOUTH_SLOTS,
+            'measurements': measurements,
+            'action_state': self.action_state,
+            'action_duration': self.current_action_duration,
+            'avg_speed': 0,
+            'total_time': 0,
+            'calibration_mode': self.calibration_mode,
+            'calibration_max': 0
+        }
         if self.action_state != 'neutral':
-            cv2.putText(frame, f'Action: {self.action_state}', (30, 210),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(frame, f'Duration: {self.current_action_duration:.2f}s', (30, 240),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-            # 显示当前动作的统计信息
-            stats = self.action_stats[self.action_state]
-            cv2.putText(frame, f'Avg Speed: {stats["avg_speed"]:.3f}', (30, 270),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(frame, f'Total Time: {stats["total_time"]:.2f}s', (30, 300),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-        # 如果在校准模式下，显示最大值
-        if self.calibration_mode:
-            if self.calibration_mode == 'open':
-                cv2.putText(frame, f'Max Open: {self.max_open:.3f}', (30, 180),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            elif self.calibration_mode == 'left':
-                cv2.putText(frame, f'Max Left: {self.max_left:.3f}', (30, 180),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            elif self.calibration_mode == 'right':
-                cv2.putText(frame, f'Max Right: {self.max_right:.3f}', (30, 180),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            stats = self.action_engine.summary()[self.action_state]
+            overlay['avg_speed'] = stats['avg_speed']
+            overlay['total_time'] = stats['total_time']
+        if self.calibration_mode == 'open':
+            overlay['calibration_max'] = self.max_open
+        elif self.calibration_mode == 'left':
+            overlay['calibration_max'] = self.max_left
+        elif self.calibration_mode == 'right':
+            overlay['calibration_max'] = self.max_right
+        return overlay
 
     def reset_calibration(self):
         """重置校准数据"""
@@ -276,19 +429,43 @@ class MouthDetector:
         self.max_right = 0
         self.max_open = 0
         self.frame_count = 0
-        self.measurements_history = []
-
-        # 重置动作统计
+        self.measurements_history.clear()
+        self.last_points = None
+        self.prev_points = None
+        if self.smoother is not None:
+            self.smoother.reset()
+        self.reset_action_stats()
+
+    def reset_action_stats(self):
+        """重置动作状态和统计，保留校准最大值和初始位置；每次训练会话开始时调用"""
         self.action_state = 'neutral'
         self.action_start_time = 0
         self.current_action_duration = 0
         self.last_position = None
         self.last_time = None
-        self.action_stats = {
-            'open': {'total_time': 0, 'count': 0, 'avg_speed': 0},
-            'left': {'total_time': 0, 'count': 0, 'avg_speed': 0},
-            'right': {'total_time': 0, 'count': 0, 'avg_speed': 0}
-        }
+        self.action_engine.reset()
+
+    def start_recording(self, path):
+        """开始把每帧的嘴部关键点和测量值写入二进制日志"""
+        self.stop_recording()
+        self.recorder = SessionRecorder(path, len(self.MOUTH_POINTS))
+
+    def stop_recording(self):
+        """停止记录并关闭日志文件"""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def warm_up(self, width=640, height=480):
+        """用空白帧运行一次 FaceMesh，提前完成模型加载和内存分配"""
+        blank = np.zeros((height, width, 3), dtype=np.uint8)
+        self.backend.detect(blank)
+        if self.roi_backend is not None:
+            self.roi_backend.detect(blank)
+
+    def get_perf_stats(self):
+        """获取检测器各阶段的耗时统计和计数"""
+        return self.perf.snapshot()
 
     def get_calibration_results(self):
         """获取校准结果"""
@@ -299,5 +476,9 @@ class MouthDetector:
         }
 
     def get_measurements_history(self):
-        """获取测量历史数据"""
+        """获取测量历史数据（按需生成字典的只读序列）"""
         return self.measurements_history
+
+    def get_history_summary(self):
+        """获取测量历史各字段的最大值、均值和分位数"""
+        return self.measurements_history.summary()
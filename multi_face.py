@@ -0,0 +1,252 @@
+"""多人同框检测：一次 FaceMesh 推理同时测量画面中的多张人脸
+
+治疗师在患者旁边示范时，不需要为每个人各跑一套检测流程。每张人脸按嘴部中心与上一帧的距离
+匹配到稳定的跟踪编号，每个跟踪的初始位置、动作状态、动作统计和校准最大值都保存在按槽位
+索引的紧凑数组中，所有人脸的测量和状态更新都是一次向量化运算。
+
+判定规则和阈值与 MouthDetector 相同（见 action_stats.classify_action），使用其向量化版本
+action_analysis.classify 一次判定所有人脸。
+"""
+import time
+
+import cv2
+import numpy as np
+
+from action_analysis import classify
+from action_stats import ACTIONS, MOVEMENT_THRESHOLD, OPEN_THRESHOLD
+from landmark_backend import MOUTH_POINTS, FaceMeshBackend
+
+# 动作状态编码，0 为无动作，其余依次对应 ACTIONS
+STATE_NAMES = ('neutral',) + ACTIONS
+NEUTRAL, OPEN, LEFT, RIGHT = range(len(STATE_NAMES))
+
+
+class MultiFaceDetector:
+    """同时跟踪多张人脸的嘴部检测器"""
+
+    OPEN_THRESHOLD = OPEN_THRESHOLD  # 张嘴阈值
+    MOVEMENT_THRESHOLD = MOVEMENT_THRESHOLD  # 左右移动阈值
+
+    def __init__(self, max_faces=4, max_match_distance=0.15, max_missed=15):
+        """
+        max_faces: 同时检测的最多人脸数
+        max_match_distance: 与上一帧嘴部中心的最大匹配距离（归一化坐标），超过时视为新的人
+        max_missed: 连续多少帧未出现后释放该跟踪
+        """
+        # 嘴部测量不需要虹膜关键点
+        self.backend = FaceMeshBackend(refine_landmarks=False, max_num_faces=max_faces)
+        self.max_match_distance = max_match_distance
+        self.max_missed = max_missed
+
+        self.MOUTH_SLOTS = {name: i for i, name in enumerate(MOUTH_POINTS)}
+        slots = self.MOUTH_SLOTS
+        self.TOP, self.BOTTOM = slots['top_lip'], slots['bottom_lip']
+        self.LEFT_CORNER, self.RIGHT_CORNER = slots['left_corner'], slots['right_corner']
+
+        # 槽位数多于同时检测的人脸数，短暂离开画面的人回来时仍能匹配到原来的编号
+        self.capacity = max_faces * 2
+        self.calibration_mode = None
+        self.frame_count = 0
+        self.reset()
+
+    def reset(self):
+        """清空所有跟踪及其状态"""
+        k = self.capacity
+        self.next_track_id = 0
+        self.track_ids = np.full(k, -1, dtype=np.int64)  # -1 表示空槽位
+        self.centers = np.zeros((k, 2), dtype=np.float32)  # 嘴部中心，用于匹配
+        self.missed = np.zeros(k, dtype=np.int32)  # 连续未出现的帧数
+
+        self.initial_position = np.full((k, 2), np.nan, dtype=np.float32)
+        self.last_position = np.full((k, 2), np.nan, dtype=np.float32)
+        self.last_time = np.full(k, np.nan, dtype=np.float64)
+
+        self.action_state = np.zeros(k, dtype=np.int8)
+        self.action_start = np.zeros(k, dtype=np.float64)
+
+        self.max_open = np.zeros(k, dtype=np.float32)
+        self.max_left = np.zeros(k, dtype=np.float32)
+        self.max_right = np.zeros(k, dtype=np.float32)
+
+        # 每个槽位每种动作的统计，列依次对应 ACTIONS；速度均值和方差用 Welford 算法更新
+        n = len(ACTIONS)
+        self.total_time = np.zeros((k, n), dtype=np.float64)
+        self.count = np.zeros((k, n), dtype=np.int64)
+        self.speed_count = np.zeros((k, n), dtype=np.int64)
+        self.speed_mean = np.zeros((k, n), dtype=np.float64)
+        self.speed_m2 = np.zeros((k, n), dtype=np.float64)
+        self.peak_speed = np.zeros((k, n), dtype=np.float64)
+
+    def _clear_slots(self, slots):
+        """重置槽位的状态，供新的跟踪使用"""
+        self.initial_position[slots] = np.nan
+        self.last_position[slots] = np.nan
+        self.last_time[slots] = np.nan
+        self.action_state[slots] = NEUTRAL
+        self.action_start[slots] = 0
+        self.missed[slots] = 0
+        for array in (self.max_open, self.max_left, self.max_right, self.total_time, self.count,
+                      self.speed_count, self.speed_mean, self.speed_m2, self.peak_speed):
+            array[slots] = 0
+
+    def detect_faces(self, rgb_frame):
+        """检测画面中所有人脸的嘴部关键点，返回按 MOUTH_POINTS 排列的 (F, N, 3) 数组，没有人脸时返回 None"""
+        return self.backend.detect_all(rgb_frame, mouth_only=True)
+
+    def close(self):
+        self.backend.close()
+
+    def assign_tracks(self, centers):
+        """把本帧的人脸按嘴部中心匹配到槽位，返回每张人脸的槽位号"""
+        faces = len(centers)
+        active = self.track_ids >= 0
+        diff = centers[:, None, :] - self.centers[None, :, :]
+        distance = np.sqrt((diff ** 2).sum(axis=2))
+        distance[:, ~active] = np.inf
+
+        # 贪心匹配：按距离从小到大依次配对，人脸和槽位都只用一次
+        slots = np.full(faces, -1, dtype=np.int64)
+        taken = np.zeros(self.capacity, dtype=bool)
+        for flat in np.argsort(distance, axis=None):
+            face, slot = divmod(int(flat), self.capacity)
+            if distance[face, slot] > self.max_match_distance:
+                break
+            if slots[face] < 0 and not taken[slot]:
+                slots[face] = slot
+                taken[slot] = True
+
+        # 未匹配的人脸分配空槽位；没有空槽位时占用未出现最久的跟踪
+        for face in np.flatnonzero(slots < 0):
+            free = np.flatnonzero(~taken & (self.track_ids < 0))
+            if len(free):
+                slot = free[0]
+            else:
+                candidates = np.flatnonzero(~taken)
+                slot = candidates[np.argmax(self.missed[candidates])]
+            self._clear_slots(slot)
+            self.track_ids[slot] = self.next_track_id
+            self.next_track_id += 1
+            slots[face] = slot
+            taken[slot] = True
+
+        self.centers[slots] = centers
+        self.missed[taken] = 0
+        self.missed[~taken & (self.track_ids >= 0)] += 1
+        self.track_ids[self.missed > self.max_missed] = -1
+        return slots
+
+    def measure_faces(self, mouth_points):
+        """所有人脸的嘴部距离，mouth_points 为 (F, N, 3)，返回 4 个 (F,) 数组"""
+        xy = mouth_points[:, :, :2].astype(np.float64)
+        top, bottom = xy[:, self.TOP], xy[:, self.BOTTOM]
+        middle = (top + bottom) / 2
+        # 依次为 垂直张开距离、水平距离（左右嘴角）、左旋转、右旋转，与 MouthDetector 相同
+        vertical = np.linalg.norm(top - bottom, axis=1)
+        horizontal = np.linalg.norm(xy[:, self.LEFT_CORNER] - xy[:, self.RIGHT_CORNER], axis=1)
+        left_rotation = np.linalg.norm(top - middle, axis=1)
+        right_rotation = np.linalg.norm(bottom - middle, axis=1)
+        return vertical, horizontal, left_rotation, right_rotation
+
+    def process_frame(self, frame, is_rgb=False, timestamp=None):
+        """处理一帧，返回每张人脸的测量字典列表（含 track_id），没有人脸时返回空列表"""
+        current_time = time.monotonic() if timestamp is None else timestamp
+        self.frame_count += 1
+        rgb_frame = frame if is_rgb else cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        mouth_points = self.detect_faces(rgb_frame)
+        if mouth_points is None:
+            self.missed[self.track_ids >= 0] += 1
+            self.track_ids[self.missed > self.max_missed] = -1
+            return []
+
+        slots = self.assign_tracks(mouth_points[:, :, :2].mean(axis=1))
+        vertical, horizontal, left_rotation, right_rotation = self.measure_faces(mouth_points)
+        upper_lip = mouth_points[:, self.TOP, :2]
+
+        # 第一次出现的人脸只记录初始位置
+        first = np.isnan(self.initial_position[slots, 0])
+        self.initial_position[slots[first]] = upper_lip[first]
+        displacement = upper_lip[:, 0] - self.initial_position[slots, 0]
+
+        update = ~first
+        self.update_actions(slots[update], vertical[update], displacement[update], current_time)
+        self.update_speeds(slots[update], upper_lip[update], current_time)
+        self.update_calibration(slots[update], vertical[update], displacement[update])
+
+        return [{
+            'track_id': int(self.track_ids[slot]),
+            'frame': self.frame_count,
+            'displacement': float(displacement[i]),
+            'vertical': float(vertical[i]),
+            'horizontal': float(horizontal[i]),
+            'left_rotation': float(left_rotation[i]),
+            'right_rotation': float(right_rotation[i]),
+            'action_state': STATE_NAMES[self.action_state[slot]],
+            'action_duration': float(current_time - self.action_start[slot])
+            if self.action_state[slot] != NEUTRAL else 0.0
+        } for i, slot in enumerate(slots)]
+
+    def update_actions(self, slots, vertical, displacement, current_time):
+        """按阈值判定各人脸的动作，动作切换时累计上一个动作的时长和次数"""
+        # 状态编码与 action_analysis.STATE_CODES 相同
+        new_state = classify(vertical, displacement, self.OPEN_THRESHOLD, self.MOVEMENT_THRESHOLD)
+
+        old_state = self.action_state[slots]
+        changed = new_state != old_state
+        ended = changed & (old_state != NEUTRAL)
+        ended_slots, ended_actions = slots[ended], old_state[ended] - 1
+        self.total_time[ended_slots, ended_actions] += current_time - self.action_start[ended_slots]
+        self.count[ended_slots, ended_actions] += 1
+
+        self.action_start[slots[changed]] = current_time
+        self.action_state[slots] = new_state
+
+    def update_speeds(self, slots, positions, current_time):
+        """上嘴唇中点的移动速度，计入各人脸当前动作的速度统计"""
+        dt = current_time - self.last_time[slots]
+        valid = dt > 0  # 槽位第一次更新时 last_time 为 NaN，比较结果为 False
+        state = self.action_state[slots]
+        moving = valid & (state != NEUTRAL)
+        if moving.any():
+            rows, cols = slots[moving], state[moving] - 1
+            speed = np.linalg.norm(positions[moving] - self.last_position[rows], axis=1) / dt[moving]
+            n = self.speed_count[rows, cols] + 1
+            delta = speed - self.speed_mean[rows, cols]
+            mean = self.speed_mean[rows, cols] + delta / n
+            self.speed_m2[rows, cols] += delta * (speed - mean)
+            self.speed_mean[rows, cols] = mean
+            self.speed_count[rows, cols] = n
+            self.peak_speed[rows, cols] = np.maximum(self.peak_speed[rows, cols], speed)
+        self.last_position[slots] = positions
+        self.last_time[slots] = current_time
+
+    def update_calibration(self, slots, vertical, displacement):
+        """校准模式下更新各人脸的最大值"""
+        if self.calibration_mode == 'open':
+            self.max_open[slots] = np.maximum(self.max_open[slots], vertical)
+        elif self.calibration_mode == 'left':
+            self.max_left[slots] = np.minimum(self.max_left[slots], displacement)
+        elif self.calibration_mode == 'right':
+            self.max_right[slots] = np.maximum(self.max_right[slots], displacement)
+
+    def get_track_stats(self):
+        """当前所有跟踪的校准结果和动作统计，以 track_id 为键"""
+        stats = {}
+        for slot in np.flatnonzero(self.track_ids >= 0):
+            n = self.speed_count[slot]
+            variance = np.divide(self.speed_m2[slot], n - 1, out=np.zeros(len(ACTIONS)), where=n > 1)
+            stats[int(self.track_ids[slot])] = {
+                'calibration': {
+                    'max_open': float(self.max_open[slot]),
+                    'max_left': float(self.max_left[slot]),
+                    'max_right': float(self.max_right[slot])
+                },
+                'action_stats': {action: {
+                    'total_time': float(self.total_time[slot, i]),
+                    'count': int(self.count[slot, i]),
+                    'avg_speed': float(self.speed_mean[slot, i]),
+                    'speed_std': float(np.sqrt(variance[i])),
+                    'peak_speed': float(self.peak_speed[slot, i])
+                } for i, action in enumerate(ACTIONS)},
+                'missed': int(self.missed[slot])
+            }
+        return stats
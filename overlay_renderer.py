@@ -0,0 +1,155 @@
+import cv2
+import mediapipe as mp
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.7
+FONT_THICKNESS = 2
+TEXT_X = 30
+
+MESH_COLOR = (224, 224, 224)  # 与 mediapipe 默认 DrawingSpec 的颜色一致
+BLUE = (255, 0, 0)
+GREEN = (0, 255, 0)
+RED = (0, 0, 255)
+YELLOW = (0, 255, 255)
+
+
+class OverlayRenderer:
+    """把检测结果绘制到视频帧上，与测量计算分离，可以放在推理线程之外运行
+
+    面部轮廓连线的索引只计算一次，绘制时一次 polylines 调用完成；
+    固定的文字标签预先渲染成小图，每帧只贴图并绘制变化的数值部分。
+    """
+
+    def __init__(self, display_size=None, draw_mesh=True, rgb=False):
+        """
+        display_size: (宽, 高)，按保持宽高比缩放到该尺寸后再绘制，缩放在绘制线程完成，界面线程不必再缩放
+        draw_mesh: 是否绘制面部轮廓网格
+        rgb: 帧为 RGB 顺序时设为 True，颜色会相应调换
+        """
+        self.display_size = display_size
+        self.draw_mesh = draw_mesh
+        self.rgb = rgb
+        self._swap = rgb
+
+        connections = np.array(sorted(mp.solutions.face_mesh.FACEMESH_CONTOURS), dtype=np.int32)
+        self.contour_pairs = connections
+        self.contour_indices = np.unique(connections)
+
+        # 预渲染的文字标签：(标签, 颜色) -> (图像, 掩码, 基线以上高度)
+        self._label_cache = {}
+
+    def target_size(self, frame):
+        """按 display_size 保持宽高比计算缩放后的 (宽, 高)，不需要缩放时返回 None"""
+        if self.display_size is None:
+            return None
+        h, w = frame.shape[:2]
+        scale = min(self.display_size[0] / w, self.display_size[1] / h)
+        size = (max(int(w * scale), 1), max(int(h * scale), 1))
+        return None if size == (w, h) else size
+
+    def render(self, frame, overlay, dst=None, rgb=None):
+        """在帧上绘制 overlay（由 MouthDetector.make_overlay 生成），返回绘制后的帧
+
+        dst: 缩放时写入的目标缓冲区，形状需与 target_size 一致
+        rgb: 覆盖构造时的颜色顺序设置
+        """
+        size = self.target_size(frame)
+        if size is not None:
+            interpolation = cv2.INTER_AREA if size[0] < frame.shape[1] else cv2.INTER_LINEAR
+            frame = cv2.resize(frame, size, dst=dst, interpolation=interpolation)
+        if overlay is None:
+            return frame
+
+        self._swap = self.rgb if rgb is None else rgb
+        if self.draw_mesh and overlay.get('landmarks') is not None:
+            self.draw_contours(frame, overlay['landmarks'])
+        if overlay.get('points') is not None:
+            self.draw_mouth(frame, overlay['points'], overlay['slots'])
+        if overlay.get('measurements') is not None:
+            self.draw_measurements(frame, overlay)
+        return frame
+
+    def color(self, bgr):
+        """按帧的颜色顺序换算颜色"""
+        return bgr[::-1] if self._swap else bgr
+
+    def draw_contours(self, frame, face_points):
+        """绘制面部轮廓网格，face_points 为整张人脸归一化坐标的 (M, 2) 或 (M, 3) 数组"""
+        h, w = frame.shape[:2]
+        pts = (face_points[:, :2] * (w, h)).astype(np.int32)
+        cv2.polylines(frame, pts[self.contour_pairs], False, self.color(MESH_COLOR), 1)
+
+        # 轮廓上的关键点用单像素标记
+        dots = pts[self.contour_indices]
+        inside = (dots[:, 0] >= 0) & (dots[:, 0] < w) & (dots[:, 1] >= 0) & (dots[:, 1] < h)
+        dots = dots[inside]
+        frame[dots[:, 1], dots[:, 0]] = self.color(MESH_COLOR)
+
+    def draw_mouth(self, frame, points, slots):
+        """绘制嘴部跟踪点和连接线"""
+        h, w = frame.shape[:2]
+        pixels = (np.asarray(points)[:, :2] * (w, h)).astype(np.int32)
+        top_lip = tuple(pixels[slots['top_lip']].tolist())
+        bottom_lip = tuple(pixels[slots['bottom_lip']].tolist())
+        left_corner = tuple(pixels[slots['left_corner']].tolist())
+        right_corner = tuple(pixels[slots['right_corner']].tolist())
+
+        # 绘制跟踪点
+        cv2.circle(frame, top_lip, 3, self.color(RED), -1)  # 红色点跟踪上嘴唇
+        cv2.circle(frame, bottom_lip, 3, self.color(BLUE), -1)  # 蓝色点跟踪下嘴唇
+
+        # 绘制上下嘴唇中点和连接线
+        cv2.circle(frame, top_lip, 2, self.color(YELLOW), -1)
+        cv2.circle(frame, bottom_lip, 2, self.color(YELLOW), -1)
+        cv2.line(frame, top_lip, bottom_lip, self.color(GREEN), 2)
+
+        # 绘制嘴角连接线
+        cv2.line(frame, left_corner, right_corner, self.color(GREEN), 2)
+
+    def draw_measurements(self, frame, overlay):
+        """绘制测量值、当前动作和校准最大值"""
+        m = overlay['measurements']
+        self.draw_text(frame, 'Displacement: ', f'{m["displacement"]:.3f}', 30, self.color(BLUE))
+        self.draw_text(frame, 'Vertical: ', f'{m["vertical"]:.3f}', 60, self.color(GREEN))
+        self.draw_text(frame, 'Horizontal: ', f'{m["horizontal"]:.3f}', 90, self.color(GREEN))
+        self.draw_text(frame, 'Left Rot: ', f'{m["left_rotation"]:.3f}', 120, self.color(GREEN))
+        self.draw_text(frame, 'Right Rot: ', f'{m["right_rotation"]:.3f}', 150, self.color(GREEN))
+
+        # 显示当前动作信息
+        if overlay['action_state'] != 'neutral':
+            self.draw_text(frame, 'Action: ', overlay['action_state'], 210, self.color(RED))
+            self.draw_text(frame, 'Duration: ', f'{overlay["action_duration"]:.2f}s', 240, self.color(RED))
+            self.draw_text(frame, 'Avg Speed: ', f'{overlay["avg_speed"]:.3f}', 270, self.color(RED))
+            self.draw_text(frame, 'Total Time: ', f'{overlay["total_time"]:.2f}s', 300, self.color(RED))
+
+        # 如果在校准模式下，显示最大值
+        labels = {'open': 'Max Open: ', 'left': 'Max Left: ', 'right': 'Max Right: '}
+        mode = overlay['calibration_mode']
+        if mode in labels:
+            self.draw_text(frame, labels[mode], f'{overlay["calibration_max"]:.3f}', 180, self.color(RED))
+
+    def draw_text(self, frame, label, value, y, color):
+        """贴上预渲染的标签，再只绘制数值文字"""
+        sprite, mask, ascent = self.get_label(label, color)
+        top = y - ascent
+        sh, sw = sprite.shape[:2]
+        fh, fw = frame.shape[:2]
+        if top >= 0 and top + sh <= fh and TEXT_X + sw <= fw:
+            region = frame[top:top + sh, TEXT_X:TEXT_X + sw]
+            np.copyto(region, sprite, where=mask)
+        cv2.putText(frame, value, (TEXT_X + sw, y), FONT, FONT_SCALE, color, FONT_THICKNESS)
+
+    def get_label(self, label, color):
+        """获取（必要时生成）标签的预渲染图像"""
+        key = (label, color)
+        cached = self._label_cache.get(key)
+        if cached is None:
+            (tw, th), baseline = cv2.getTextSize(label, FONT, FONT_SCALE, FONT_THICKNESS)
+            ascent = th + FONT_THICKNESS
+            sprite = np.zeros((ascent + baseline + FONT_THICKNESS, tw, 3), dtype=np.uint8)
+            cv2.putText(sprite, label, (0, ascent), FONT, FONT_SCALE, color, FONT_THICKNESS)
+            mask = sprite.any(axis=2, keepdims=True)
+            cached = (sprite, mask, ascent)
+            self._label_cache[key] = cached
+        return cached
@@ -0,0 +1,106 @@
+import threading
+import time
+
+import numpy as np
+
+# 直方图分桶边界（毫秒），大致按对数分布
+HISTOGRAM_EDGES_MS = (0, 1, 2, 5, 10, 20, 33, 50, 100, 200, 500, float('inf'))
+
+
+class RollingHistogram:
+    """保存最近若干次耗时样本的环形缓冲区，读取时再计算分位数和分桶直方图
+
+    写入只是一次数组赋值，开销足够低，可以在生产环境中常开。
+    """
+
+    def __init__(self, size=512):
+        self.samples = np.zeros(size, dtype=np.float32)
+        self.size = size
+        self.index = 0
+        self.total_count = 0  # 累计样本数（不受窗口限制）
+
+    def record(self, seconds):
+        """记录一次耗时（秒）"""
+        self.samples[self.index] = seconds
+        self.index = (self.index + 1) % self.size
+        self.total_count += 1
+
+    def values(self):
+        """窗口内的样本（秒）"""
+        return self.samples[:min(self.total_count, self.size)]
+
+    def summary(self):
+        """窗口内的耗时统计，单位毫秒"""
+        values = self.values() * 1000
+        if not len(values):
+            return {'count': self.total_count}
+        p50, p95, p99 = np.percentile(values, (50, 95, 99)).tolist()
+        counts, _ = np.histogram(values, bins=HISTOGRAM_EDGES_MS)
+        return {
+            'count': self.total_count,
+            'mean_ms': float(values.mean()),
+            'p50_ms': p50,
+            'p95_ms': p95,
+            'p99_ms': p99,
+            'max_ms': float(values.max()),
+            'histogram': counts.tolist()
+        }
+
+
+class PerfStats:
+    """各阶段耗时的滚动直方图和事件计数，基于单调时钟"""
+
+    def __init__(self, window=512):
+        self.window = window
+        self.histograms = {}
+        self.counters = {}
+        self.lock = threading.Lock()  # 只在新建阶段和计数时使用
+
+    def record(self, stage, seconds):
+        """记录某个阶段的一次耗时（秒）"""
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(stage, RollingHistogram(self.window))
+        histogram.record(seconds)
+
+    def count(self, name, amount=1):
+        """累加事件计数，例如未检测到人脸的帧数"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def timer(self, stage):
+        """用于 with 语句的计时器"""
+        return _StageTimer(self, stage)
+
+    def snapshot(self):
+        """获取所有阶段的统计和计数"""
+        with self.lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+        return {
+            'stages': {stage: histogram.summary() for stage, histogram in histograms.items()},
+            'counters': counters,
+            # 各分桶的下边界，最后一个分桶没有上限
+            'histogram_bins_ms': list(HISTOGRAM_EDGES_MS[:-1])
+        }
+
+    def reset(self):
+        """清空统计"""
+        with self.lock:
+            self.histograms = {}
+            self.counters = {}
+
+
+class _StageTimer:
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.stage, time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,122 @@
+"""训练过程的二进制关键点日志
+
+文件格式（小端）：
+    文件头 32 字节：魔数 b'MDLG'、版本号、嘴部关键点数、每条记录的 float32 个数、
+                   文件头长度、会话开始的墙上时间（float64）
+    记录：定长 float32 数组，依次为 RECORD_FIELDS 中的字段和 N 个嘴部关键点的 (x, y)
+
+时间戳保存为相对第一条记录的秒数，避免 float32 存绝对时间丢失精度。
+写入只追加，不修改已有内容；读取端用内存映射，回放和重新计算指标都不需要重新运行 FaceMesh。
+"""
+import os
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b'MDLG'
+VERSION = 1
+HEADER_FORMAT = '<4sHHHHd12x'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# 每条记录开头的标量字段
+RECORD_FIELDS = ('timestamp', 'frame', 'displacement', 'vertical', 'horizontal',
+                 'left_rotation', 'right_rotation')
+
+
+class SessionRecorder:
+    """把每帧的嘴部关键点、时间戳和测量值追加写入二进制日志"""
+
+    def __init__(self, path, num_points):
+        self.path = path
+        self.num_points = num_points
+        self.record_length = len(RECORD_FIELDS) + num_points * 2
+        self.start_time = time.time()
+        self.base_timestamp = None
+        self.record_count = 0
+        self._record = np.zeros(self.record_length, dtype=np.float32)
+
+        self._file = open(path, 'wb')
+        self._file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, num_points,
+                                     self.record_length, HEADER_SIZE, self.start_time))
+
+    def write(self, timestamp, measurements, points):
+        """追加一条记录；points 为 (num_points, 2) 的归一化坐标"""
+        if self.base_timestamp is None:
+            self.base_timestamp = timestamp
+        record = self._record
+        record[0] = timestamp - self.base_timestamp
+        for i, name in enumerate(RECORD_FIELDS[1:], 1):
+            record[i] = measurements.get(name, 0)
+        record[len(RECORD_FIELDS):] = np.asarray(points)[:, :2].ravel()
+        self._file.write(record.tobytes())
+        self.record_count += 1
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        """关闭日志文件"""
+        if not self._file.closed:
+            self._file.close()
+
+
+class SessionReader:
+    """以内存映射方式读取二进制日志"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if len(header) < HEADER_SIZE:
+            raise ValueError(f'{path} 不是有效的会话日志：文件头不完整')
+        magic, version, num_points, record_length, header_size, start_time = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f'{path} 不是有效的会话日志')
+        if version != VERSION:
+            raise ValueError(f'不支持的会话日志版本: {version}')
+
+        self.num_points = num_points
+        self.record_length = record_length
+        self.start_time = start_time
+
+        # 录制中断时末尾可能有半条记录，忽略它
+        record_bytes = record_length * 4
+        count = (os.path.getsize(path) - header_size) // record_bytes
+        if count > 0:
+            self.records = np.memmap(path, dtype=np.float32, mode='r',
+                                     offset=header_size, shape=(count, record_length))
+        else:
+            self.records = np.empty((0, record_length), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.records)
+
+    def column(self, name):
+        """返回某个标量字段的数组（内存映射视图）"""
+        return self.records[:, RECORD_FIELDS.index(name)]
+
+    @property
+    def timestamps(self):
+        return self.column('timestamp')
+
+    @property
+    def points(self):
+        """所有帧的嘴部关键点，形状为 (帧数, num_points, 2)"""
+        return self.records[:, len(RECORD_FIELDS):].reshape(-1, self.num_points, 2)
+
+    def replay(self, realtime=False):
+        """逐帧回放，产出测量字典和嘴部关键点；realtime 为 True 时按原始时间间隔回放"""
+        start = time.monotonic()
+        for record, points in zip(self.records, self.points):
+            if realtime:
+                delay = float(record[0]) - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            measurements = {name: float(value) for name, value in zip(RECORD_FIELDS, record)}
+            measurements['frame'] = int(measurements['frame'])
+            yield measurements, points
+
+    def close(self):
+        """释放对内存映射的引用"""
+        self.records = None
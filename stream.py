@@ -0,0 +1,162 @@
+"""不依赖 Qt 的流式检测接口
+
+    from stream import stream_measurements, capture_frames
+
+    for record in stream_measurements(capture_frames('录像.mp4')):
+        print(record['index'], record['measurement'])
+
+帧来源可以是任意可迭代对象（摄像头、视频文件、NumPy 帧数组等），异步版本
+astream_measurements 同时接受异步可迭代对象。元素可以是 BGR 帧，也可以是 (帧, 时间戳) 元组。
+结果按需惰性产出，预读队列有上限：消费方处理慢时，读取方会被阻塞（背压），不会无限缓存帧。
+"""
+import asyncio
+import queue
+import threading
+
+from frame_source import open_source
+from mouth_detector import MouthDetector
+
+_END = object()  # 预读队列的结束标记
+
+
+def capture_frames(source=0, max_frames=None, stride=1):
+    """从摄像头编号、视频文件、图片目录或视频流地址逐帧读取，产出 (帧, 来源时间戳)"""
+    with open_source(source, stride) as src:
+        if not src.is_opened():
+            raise IOError(f'无法打开视频源: {source}')
+        for count, item in enumerate(src, 1):
+            yield item
+            if max_frames is not None and count >= max_frames:
+                break
+
+
+def _split(item):
+    """把帧来源的元素拆成 (帧, 时间戳)"""
+    if isinstance(item, tuple):
+        return item[0], item[1]
+    return item, None
+
+
+def _make_record(detector, index, item):
+    frame, timestamp = _split(item)
+    return {
+        'index': index,
+        'timestamp': timestamp,
+        'measurement': detector.process_frame(frame, timestamp=timestamp)
+    }
+
+
+def _prefetch(frames, maxsize):
+    """在后台线程中读取帧，放入有上限的队列；队列满时读取线程阻塞"""
+    buffer = queue.Queue(maxsize)
+    stop = threading.Event()
+
+    def offer(item):
+        """放入队列，消费方已停止时放弃并返回 False"""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in frames:
+                if not offer(item):
+                    return
+        except Exception as e:
+            offer(e)
+            return
+        offer(_END)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def stream_measurements(frames, detector=None, prefetch=0, skip_missing=True):
+    """对帧来源逐帧检测，惰性产出测量记录
+
+    frames: 帧或 (帧, 时间戳) 的可迭代对象
+    detector: 使用的 MouthDetector，默认新建一个不绘制的检测器
+    prefetch: 大于 0 时在后台线程中预读最多 prefetch 帧，读取和检测并行
+    skip_missing: 为 True 时跳过未检测到人脸的帧
+    产出 {'index': 帧序号, 'timestamp': 时间戳或 None, 'measurement': 测量字典或 None}
+    """
+    if detector is None:
+        detector = MouthDetector(render=False)
+    if prefetch > 0:
+        frames = _prefetch(frames, prefetch)
+
+    for index, item in enumerate(frames):
+        record = _make_record(detector, index, item)
+        if skip_missing and record['measurement'] is None:
+            continue
+        yield record
+
+
+async def _aiterate(frames):
+    """把同步或异步可迭代对象统一为异步迭代
+
+    同步对象（如 capture_frames）的每次读取可能阻塞在摄像头或解码上，放到线程池中执行。
+    """
+    if hasattr(frames, '__aiter__'):
+        async for item in frames:
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    iterator = iter(frames)
+    while True:
+        item = await loop.run_in_executor(None, next, iterator, _END)
+        if item is _END:
+            return
+        yield item
+
+
+async def astream_measurements(frames, detector=None, buffer_size=4, skip_missing=True):
+    """stream_measurements 的异步版本
+
+    frames 可以是同步或异步可迭代对象。读取帧的任务与检测并行，中间队列最多缓存 buffer_size 帧；
+    同步来源的读取和检测都在线程池中运行，不阻塞事件循环。
+    """
+    if detector is None:
+        detector = MouthDetector(render=False)
+    loop = asyncio.get_running_loop()
+    buffer = asyncio.Queue(buffer_size)
+
+    async def produce():
+        try:
+            async for item in _aiterate(frames):
+                await buffer.put(item)  # 队列满时等待，形成背压
+        except Exception as e:
+            await buffer.put(e)
+            return
+        await buffer.put(_END)
+
+    producer = asyncio.create_task(produce())
+    try:
+        index = 0
+        while True:
+            item = await buffer.get()
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                raise item
+            record = await loop.run_in_executor(None, _make_record, detector, index, item)
+            index += 1
+            if skip_missing and record['measurement'] is None:
+                continue
+            yield record
+    finally:
+        producer.cancel()
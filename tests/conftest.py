@@ -0,0 +1,40 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 模块都在仓库根目录，直接运行 pytest 时也能导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def fake_face(count=478, offset=0.0):
+    """FaceMesh 结果的替身：第 i 个点为 (i/1000, i/2000, -i/4000) 加偏移"""
+    landmarks = [SimpleNamespace(x=i / 1000 + offset, y=i / 2000 + offset, z=-i / 4000) for i in range(count)]
+    return SimpleNamespace(landmark=landmarks)
+
+
+class FakeFaceMesh:
+    """按给定的人脸列表返回结果的 FaceMesh 替身"""
+
+    def __init__(self, faces):
+        self.faces = faces
+
+    def process(self, rgb_frame):
+        return SimpleNamespace(multi_face_landmarks=self.faces or None)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_facemesh():
+    """把 FaceMeshBackend 的 FaceMesh 换成替身，返回该后端"""
+    from landmark_backend import FaceMeshBackend
+
+    def make(faces=None, **kwargs):
+        backend = FaceMeshBackend(**kwargs)
+        backend.face_mesh.close()
+        backend.face_mesh = FakeFaceMesh([fake_face()] if faces is None else faces)
+        return backend
+    return make
@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+import action_analysis
+from action_analysis import STATE_CODES
+from session_log import SessionRecorder
+
+
+def make_history(fps=30.0):
+    """张口 10 帧、静止 10 帧、向左 10 帧、静止 10 帧、向右 10 帧"""
+    vertical = np.zeros(50, dtype=np.float32)
+    displacement = np.zeros(50, dtype=np.float32)
+    vertical[0:10] = 0.2
+    displacement[20:30] = -0.1
+    displacement[40:50] = 0.1
+    times = np.arange(50) / fps
+    return vertical, displacement, times
+
+
+def test_hysteresis_holds_state_between_thresholds():
+    values = np.array([0.0, 0.12, 0.09, 0.09, 0.04, 0.09, 0.11])
+    result = action_analysis.hysteresis(values, 0.1, 0.05)
+    assert result.tolist() == [False, True, True, True, False, False, True]
+
+
+def test_run_lengths():
+    starts, lengths, values = action_analysis.run_lengths(np.array([0, 0, 1, 1, 1, 0, 2]))
+    assert starts.tolist() == [0, 2, 5, 6]
+    assert lengths.tolist() == [2, 3, 1, 1]
+    assert values.tolist() == [0, 1, 0, 2]
+    starts, lengths, values = action_analysis.run_lengths(np.array([], dtype=np.int8))
+    assert len(starts) == len(lengths) == len(values) == 0
+
+
+def test_classify_open_takes_priority():
+    states = action_analysis.classify([0.2, 0.2, 0.0, 0.0], [0.1, -0.1, -0.1, 0.0])
+    assert states.tolist() == [STATE_CODES['open'], STATE_CODES['open'], STATE_CODES['left'], 0]
+
+
+def test_analyze_counts_and_durations():
+    vertical, displacement, times = make_history()
+    result = action_analysis.analyze(vertical, displacement, times)
+    summary = result['summary']
+    for action in ('open', 'left', 'right'):
+        assert summary[action]['count'] == 1
+    assert summary['open']['total_time'] == pytest.approx(10 / 30.0)
+    # 最后一段截止到最后一帧
+    assert summary['right']['total_time'] == pytest.approx(9 / 30.0)
+
+
+def test_sweep_matches_analyze():
+    vertical, displacement, times = make_history()
+    results = action_analysis.sweep(vertical, displacement, times, [0.1, 0.3], [0.05])
+    assert [r['open_threshold'] for r in results] == [0.1, 0.3]
+    assert results[0]['open']['count'] == 1
+    assert results[1]['open']['count'] == 0
+    expected = action_analysis.analyze(vertical, displacement, times)['summary']
+    assert results[0]['left']['total_time'] == pytest.approx(expected['left']['total_time'])
+
+
+def test_session_log_round_trip(tmp_path):
+    vertical, displacement, times = make_history()
+    path = str(tmp_path / 'session.mdlg')
+    recorder = SessionRecorder(path, num_points=9)
+    for i in range(len(times)):
+        points = np.full((9, 3), 0.5, dtype=np.float32)
+        points[0, 0] += displacement[i]
+        recorder.write(100.0 + times[i], {'frame': i + 1, 'vertical': vertical[i],
+                                          'displacement': displacement[i]}, points)
+    recorder.close()
+
+    loaded_vertical, loaded_displacement, loaded_times, upper_lip = action_analysis.load_session(path)
+    np.testing.assert_allclose(loaded_vertical, vertical)
+    np.testing.assert_allclose(loaded_times, times, atol=1e-5)
+    assert upper_lip.shape == (50, 2)
+
+    results = action_analysis.sweep(loaded_vertical, loaded_displacement, loaded_times, [0.1], [0.05])
+    assert [results[0][action]['count'] for action in ('open', 'left', 'right')] == [1, 1, 1]
+    assert results[0]['open']['total_time'] == pytest.approx(10 / 30.0, abs=1e-5)
+
+
+def test_load_csv_uses_timestamps(tmp_path):
+    path = tmp_path / 'clip.measurements.csv'
+    path.write_text('timestamp,frame,displacement,vertical\n'
+                    '0.0,1,0,0.2\n0.2,2,0,0.2\n0.4,3,0,0\n', encoding='utf-8')
+    _, _, times, _ = action_analysis.load_csv(str(path))
+    np.testing.assert_allclose(times, [0.0, 0.2, 0.4])
+
+
+def test_load_csv_without_timestamps_scales_by_stride(tmp_path):
+    path = tmp_path / 'old.measurements.csv'
+    path.write_text('frame,displacement,vertical\n1,0,0.2\n2,0,0.2\n3,0,0\n', encoding='utf-8')
+    _, _, times, _ = action_analysis.load_csv(str(path), fps=30.0, stride=3)
+    np.testing.assert_allclose(times, [0.0, 0.1, 0.2])
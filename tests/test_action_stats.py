@@ -0,0 +1,89 @@
+import statistics
+
+import pytest
+
+from action_stats import ActionStatistics, RunningStats
+
+
+def test_running_stats_matches_statistics():
+    values = [0.3, 1.2, 0.7, 2.5, 1.1]
+    stats = RunningStats()
+    for value in values:
+        stats.push(value)
+    assert stats.mean == pytest.approx(statistics.mean(values))
+    assert stats.std == pytest.approx(statistics.stdev(values))
+    assert (stats.min, stats.max) == (0.3, 2.5)
+    assert RunningStats().to_dict()['std'] == 0.0
+
+
+def feed(engine, actions, dt=0.1, speed=1.0):
+    for i, action in enumerate(actions):
+        engine.update(action, i * dt, speed, 0.2)
+
+
+def test_repetitions_and_summary():
+    engine = ActionStatistics()
+    feed(engine, ['open'] * 5 + ['neutral'] * 3 + ['open'] * 2 + ['left'])
+    summary = engine.summary()
+    assert summary['open']['count'] == 2
+    assert summary['open']['total_time'] == pytest.approx(0.5 + 0.2)
+    assert summary['open']['mean_duration'] == pytest.approx(0.35)
+    assert summary['open']['mean_peak_amplitude'] == pytest.approx(0.2)
+    # 正在进行的动作计入时长，不计入次数
+    assert summary['left']['in_progress']
+    assert summary['left']['count'] == 0
+    assert [r['duration'] for r in engine.get_repetitions('open')] == pytest.approx([0.5, 0.2])
+
+
+def test_in_progress_time():
+    engine = ActionStatistics()
+    feed(engine, ['right'] * 4)
+    summary = engine.summary()['right']
+    assert summary['in_progress']
+    assert summary['total_time'] == pytest.approx(0.3)
+    assert summary['avg_speed'] == 1.0
+
+
+class RacingStats(ActionStatistics):
+    """每次读取 current 后立即清空，模拟推理线程在两次读取之间调用 finish"""
+
+    racing = False
+
+    @property
+    def current(self):
+        rep = self._current
+        if self.racing:
+            self._current = None
+        return rep
+
+    @current.setter
+    def current(self, value):
+        self._current = value
+
+
+def test_summary_survives_concurrent_finish():
+    engine = RacingStats()
+    engine.update('open', 0.0, 1.0, 0.1)
+    engine.update('open', 0.5, 1.0, 0.1)
+    engine.racing = True
+    summary = engine.summary()['open']
+    assert summary['in_progress']
+    assert summary['total_time'] == pytest.approx(0.5)
+
+
+def test_reset():
+    engine = ActionStatistics()
+    feed(engine, ['open'] * 3 + ['neutral'])
+    engine.reset()
+    assert engine.summary()['open']['count'] == 0
+    assert engine.current is None
+
+
+def test_classify_action_matches_vectorized_rule():
+    from action_analysis import STATE_CODES, classify
+    from action_stats import classify_action
+
+    cases = [(0.2, 0.1), (0.0, -0.1), (0.0, 0.1), (0.0, 0.0), (0.1, 0.05)]
+    codes = classify([v for v, _ in cases], [d for _, d in cases])
+    assert [classify_action(v, d) for v, d in cases] == ['open', 'left', 'right', 'neutral', 'neutral']
+    assert codes.tolist() == [STATE_CODES.get(classify_action(v, d), 0) for v, d in cases]
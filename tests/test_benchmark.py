@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+import pytest
+
+import benchmark
+from mouth_detector import MouthDetector
+
+
+def test_reports_detection_stages(fake_facemesh):
+    detector = MouthDetector(render=False, backend=fake_facemesh(), target_fps=30)
+    result = benchmark.run_benchmark(benchmark.synthetic_frames(15, 160, 120), warmup=5, qt=False,
+                                     detector=detector)
+    assert result['frames'] == result['faces_found'] == 10
+    assert 'error' not in result
+    for stage in ('color', 'process_frame', 'inference', 'measurement', 'draw'):
+        assert result['stages'][stage]['count'] >= 1
+    assert result['scheduler']['target_fps'] == 30
+    assert result['fps'] > 0
+
+
+def test_refuses_detection_numbers_without_faces(fake_facemesh):
+    detector = MouthDetector(render=False, backend=fake_facemesh(faces=[]))
+    result = benchmark.run_benchmark(benchmark.synthetic_frames(8, 160, 120), warmup=2, qt=False,
+                                     detector=detector)
+    assert result['faces_found'] == 0
+    assert 'error' in result
+    assert result['latency'] is None
+    assert set(result['stages']) == {'color'}
+    assert result['counters']['no_face'] == 6
+
+
+def test_video_frames_yield_timestamps(tmp_path):
+    for i in range(3):
+        cv2.imwrite(str(tmp_path / f'{i}.png'), np.zeros((8, 8, 3), dtype=np.uint8))
+    items = list(benchmark.video_frames(str(tmp_path), count=2))
+    assert [t for _, t in items] == pytest.approx([0, 1 / 30])
+
+
+def test_synthetic_frames_contain_a_face():
+    # 使用真实的 FaceMesh：不指定 --video 时的默认输入必须能检出人脸并触发动作判定
+    detector = MouthDetector(render=False, backend='facemesh')
+    result = benchmark.run_benchmark(benchmark.synthetic_frames(60, 320, 240), warmup=5, qt=False,
+                                     detector=detector)
+    assert 'error' not in result
+    assert result['faces_found'] == result['frames'] == 55
+    assert sum(stats['count'] for stats in detector.action_stats.values()) > 0
@@ -0,0 +1,64 @@
+import pytest
+
+from calibration_store import CalibrationStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CalibrationStore(str(tmp_path / 'test.db'))
+    yield store
+    store.close()
+
+
+def test_latest_calibration(store):
+    assert store.latest_calibration('p1') is None
+    first = store.start_session('p1', 'calibration', 'open')
+    store.update_calibration(first, 'p1', 0.2, 0.0, 0.0)
+    store.update_calibration(first, 'p1', 0.3, 0.0, 0.0)
+    assert store.end_session(first)
+    second = store.start_session('p1', 'calibration', 'left')
+    store.update_calibration(second, 'p1', 0.3, -0.1, 0.0)
+    store.end_session(second)
+
+    latest = store.latest_calibration('p1')
+    assert (latest['max_open'], latest['max_left'], latest['max_right']) == pytest.approx((0.3, -0.1, 0.0))
+    # 每个会话只保留最后一次的值
+    assert len(store.calibration_history('p1')) == 2
+    assert store.latest_calibration('p2') is None
+
+
+def test_sessions_store_action_stats(store):
+    session = store.start_session('p1', 'training', 'open')
+    store.end_session(session, {'open': {'count': 3, 'total_time': 1.5}})
+    sessions = store.sessions('p1')
+    assert len(sessions) == 1
+    assert sessions[0]['kind'] == 'training'
+    assert sessions[0]['ended_at'] is not None
+    assert sessions[0]['action_stats']['open']['count'] == 3
+
+
+def test_data_persists_after_close(tmp_path):
+    path = str(tmp_path / 'persist.db')
+    store = CalibrationStore(path)
+    session = store.start_session('p1', 'calibration', 'right')
+    store.update_calibration(session, 'p1', 0.0, 0.0, 0.15)
+    store.close()
+
+    reopened = CalibrationStore(path)
+    assert reopened.latest_calibration('p1')['max_right'] == pytest.approx(0.15)
+    reopened.close()
+
+
+def test_write_failure_is_reported(store):
+    session = store.start_session('p1', 'calibration', 'open')
+    # patient 不能为空，整个批次写入失败
+    store.update_calibration(session, None, 0.2, 0.0, 0.0)
+    assert not store.end_session(session)
+    assert store.last_error is not None
+    assert store.sessions('p1') == []
+
+    # 失败只影响当次 flush，之后的写入正常报告成功
+    session = store.start_session('p1', 'calibration', 'open')
+    store.update_calibration(session, 'p1', 0.2, 0.0, 0.0)
+    assert store.end_session(session)
+    assert store.latest_calibration('p1')['max_open'] == pytest.approx(0.2)
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from detector_pool import DetectorPool
+from frame_source import FrameSource
+from mouth_detector import MouthDetector
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+class TickingSource(FrameSource):
+    """每隔 interval 秒产出一帧的实时来源"""
+
+    live = True
+
+    def __init__(self, interval=0.005):
+        super().__init__()
+        self.interval = interval
+
+    def read(self):
+        time.sleep(self.interval)
+        self.frames_read += 1
+        return FRAME, time.monotonic()
+
+
+class StalledSource(FrameSource):
+    """产出一帧后 read 一直阻塞，模拟卡住的摄像头"""
+
+    live = True
+
+    def __init__(self):
+        super().__init__()
+        self.unblock = threading.Event()
+
+    def read(self):
+        if self.frames_read == 0:
+            self.frames_read += 1
+            return FRAME, time.monotonic()
+        self.unblock.wait()
+        return None
+
+
+@pytest.fixture
+def detector_factory(fake_facemesh):
+    return lambda: MouthDetector(render=False, backend=fake_facemesh())
+
+
+def test_stalled_source_does_not_block_others(detector_factory):
+    stalled = StalledSource()
+    results = {'stalled': 0, 'live': 0}
+
+    def on_result(source_id, measurement, frame, overlay):
+        results[source_id] += 1
+
+    # 只有一个推理线程：卡住的摄像头若占用它，另一路将得不到处理
+    pool = DetectorPool({'stalled': stalled, 'live': TickingSource()}, workers=1, on_result=on_result,
+                        detector_factory=detector_factory)
+    pool.STALL_TIMEOUT = 0.2
+    pool.start()
+    try:
+        time.sleep(0.5)
+        stats = pool.get_stats()
+    finally:
+        stalled.unblock.set()
+        pool.stop()
+
+    assert results['stalled'] == 1
+    assert results['live'] >= 20
+    assert stats['stalled']['stalled'] and not stats['live']['stalled']
+    assert stats['stalled']['processed'] == 1
+    assert stats['live']['processed'] == results['live']
+    assert stats['live']['fps'] > 0
+
+
+def test_claim_ready_source_round_robin_and_busy(detector_factory):
+    pool = DetectorPool([TickingSource() for _ in range(3)], detector_factory=detector_factory)
+    first, second, third = pool.sources
+
+    def claim():
+        with pool._cond:
+            return pool._claim_ready_source()
+
+    assert claim() is None
+    first.buffer.put((FRAME, 0.0), 0.0)
+    third.buffer.put((FRAME, 0.0), 0.0)
+    assert claim() is first
+    # 处理中的摄像头即使有新帧也不会被另一个工作线程选中
+    assert claim() is third
+    assert claim() is None
+
+    third.busy = False
+    first.busy = False
+    second.buffer.put((FRAME, 0.0), 0.0)
+    # 从上次选中的下一路开始轮询，各路轮流获得推理机会
+    order = []
+    for _ in range(6):
+        src = claim()
+        order.append(pool.sources.index(src))
+        src.busy = False
+    assert order == [0, 1, 2, 0, 1, 2]
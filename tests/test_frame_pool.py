@@ -0,0 +1,42 @@
+import threading
+
+import numpy as np
+
+from frame_pool import FramePool, LatestFrameBuffer
+
+
+def test_pool_cycles_buffers():
+    pool = FramePool(2)
+    a = pool.acquire((4, 4, 3))
+    b = pool.acquire((4, 4, 3))
+    assert a is not b
+    assert pool.acquire((4, 4, 3)) is a
+    assert a.dtype == np.uint8
+
+
+def test_pool_reallocates_on_shape_change():
+    pool = FramePool(2, dtype=np.float32)
+    a = pool.acquire((9, 3))
+    c = pool.acquire((478, 3))
+    assert c.shape == (478, 3) and c.dtype == np.float32
+    assert pool.acquire((478, 3)) is not a
+
+
+def test_latest_frame_buffer_drops_old_frames():
+    buffer = LatestFrameBuffer()
+    buffer.put('a', 1.0)
+    buffer.put('b', 2.0)
+    assert buffer.dropped_count == 1
+    assert buffer.get(timeout=0) == ('b', 2.0)
+    assert buffer.get(timeout=0) is None
+
+
+def test_latest_frame_buffer_close_wakes_consumer():
+    buffer = LatestFrameBuffer()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(buffer.get()))
+    consumer.start()
+    buffer.close()
+    consumer.join(1.0)
+    assert results == [None]
+    assert buffer.is_closed()
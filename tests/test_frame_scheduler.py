@@ -0,0 +1,73 @@
+import pytest
+
+from frame_scheduler import FrameScheduler
+
+SLOW = 0.5  # 远超预算的推理耗时
+FAST = 0.001  # 低于预算一半的推理耗时
+
+
+@pytest.fixture
+def scheduler():
+    # 预算为 0.8 / 10 = 80 ms，每 4 次推理评估一次
+    return FrameScheduler(target_fps=10, window=4, max_skip=3)
+
+
+def settings(scheduler):
+    return scheduler.scale, scheduler.skip_interval
+
+
+def feed(scheduler, cost, count):
+    """记录 count 次耗时，返回每次记录后的 (缩放比例, 跳帧间隔)"""
+    history = []
+    for _ in range(count):
+        scheduler.record(cost)
+        history.append(settings(scheduler))
+    return history
+
+
+def test_degrades_resolution_before_skipping(scheduler):
+    history = feed(scheduler, SLOW, 24)
+    changes = [s for i, s in enumerate(history) if i == 0 or s != history[i - 1]]
+    assert changes == [(1.0, 1), (0.75, 1), (0.5, 1), (0.5, 2), (0.5, 3)]
+    # 每次调整后需要重新积累一个窗口的样本
+    assert history[:4] == [(1.0, 1)] * 3 + [(0.75, 1)]
+    assert settings(scheduler) == (0.5, 3)
+
+
+def test_recovers_skipping_before_resolution(scheduler):
+    feed(scheduler, SLOW, 24)
+    history = feed(scheduler, FAST, 24)
+    changes = [s for i, s in enumerate(history) if i == 0 or s != history[i - 1]]
+    assert changes == [(0.5, 3), (0.5, 2), (0.5, 1), (0.75, 1), (1.0, 1)]
+
+
+def test_hysteresis_between_half_and_full_budget(scheduler):
+    feed(scheduler, SLOW, 4)
+    assert settings(scheduler) == (0.75, 1)
+    # 预算 80 ms：60 ms 和 41 ms 都不超预算也不低于一半，设置保持不变
+    feed(scheduler, 0.060, 20)
+    feed(scheduler, 0.041, 20)
+    assert settings(scheduler) == (0.75, 1)
+    feed(scheduler, 0.039, 4)
+    assert settings(scheduler) == (1.0, 1)
+
+
+def test_amortized_cost_accounts_for_skipping(scheduler):
+    scheduler.skip_interval = 2
+    feed(scheduler, 0.120, 3)  # 不足一个窗口，不调整
+    # 每 2 帧推理一次，摊到每帧 60 ms，在预算内
+    assert scheduler.amortized_cost() == pytest.approx(0.060)
+    scheduler.record(0.120)
+    assert settings(scheduler) == (1.0, 2)
+
+
+def test_should_infer_follows_skip_interval(scheduler):
+    assert [scheduler.should_infer() for _ in range(3)] == [True] * 3
+    scheduler.skip_interval = 3
+    assert [scheduler.should_infer() for _ in range(6)] == [False, False, True] * 2
+    stats = scheduler.get_stats()
+    assert (stats['inferred'], stats['skipped']) == (5, 4)
+
+    scheduler.reset()
+    assert settings(scheduler) == (1.0, 1)
+    assert scheduler.should_infer()
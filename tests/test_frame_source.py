@@ -0,0 +1,176 @@
+import functools
+import http.server
+import threading
+
+import cv2
+import numpy as np
+import pytest
+
+from frame_source import (CaptureSource, ImageSequenceSource, PrefetchingSource, VideoFileSource,
+                          open_source)
+
+FRAME_COUNT = 20
+FPS = 10.0
+
+
+def frame_index(frame):
+    """测试帧的亮度为 帧号 * 10，由亮度还原帧号（MJPG 有少量压缩误差）"""
+    return int(round(float(frame.mean()) / 10))
+
+
+@pytest.fixture(scope='module')
+def video_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp('video') / 'clip.avi'
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'MJPG'), FPS, (64, 48))
+    for i in range(FRAME_COUNT):
+        writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def image_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('images')
+    for i in range(FRAME_COUNT):
+        cv2.imwrite(str(directory / f'{i:03d}.png'), np.full((48, 64, 3), i * 10, dtype=np.uint8))
+    (directory / 'notes.txt').write_text('not an image')
+    (directory / '999.png').write_bytes(b'broken')
+    return str(directory)
+
+
+@pytest.fixture
+def stream_url(video_path):
+    """本地 HTTP 服务作为 RTSP 等网络视频流的替身"""
+    directory, name = video_path.rsplit('/', 1)
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}/{name}'
+    server.shutdown()
+    server.server_close()
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def read_all(source):
+    with source:
+        return [(frame_index(frame), timestamp) for frame, timestamp in source]
+
+
+def test_video_file_reads_media_timestamps(video_path):
+    items = read_all(VideoFileSource(video_path))
+    assert [index for index, _ in items] == list(range(FRAME_COUNT))
+    np.testing.assert_allclose([t for _, t in items], np.arange(FRAME_COUNT) / FPS, atol=1e-6)
+
+
+def test_video_file_stride(video_path):
+    items = read_all(VideoFileSource(video_path, stride=3))
+    assert [index for index, _ in items] == [2, 5, 8, 11, 14, 17]
+    np.testing.assert_allclose([t for _, t in items], [0.2, 0.5, 0.8, 1.1, 1.4, 1.7], atol=1e-6)
+
+
+def test_video_file_seek(video_path):
+    with VideoFileSource(video_path) as source:
+        source.seek(12)
+        frame, timestamp = source.read()
+        assert frame_index(frame) == 12
+        assert timestamp == pytest.approx(1.2)
+        assert source.position == 13
+
+    # 打开前定位，打开时生效
+    source = VideoFileSource(video_path, start=7)
+    frame, timestamp = source.read()
+    assert frame_index(frame) == 7
+    source.release()
+
+
+def test_video_file_missing():
+    source = VideoFileSource('does-not-exist.avi')
+    assert not source.open()
+    assert source.read() is None
+
+
+def test_image_sequence(image_dir):
+    source = ImageSequenceSource(image_dir, fps=FPS)
+    assert source.frame_count == FRAME_COUNT + 1
+    items = read_all(source)
+    # 无法解码的文件被跳过，其他文件按文件名排序
+    assert [index for index, _ in items] == list(range(FRAME_COUNT))
+    np.testing.assert_allclose([t for _, t in items], np.arange(FRAME_COUNT) / FPS)
+
+
+def test_image_sequence_stride_and_seek(image_dir):
+    source = ImageSequenceSource(image_dir, fps=FPS, stride=4)
+    source.seek(2)
+    items = read_all(source)
+    assert [index for index, _ in items] == [2, 6, 10, 14, 18]
+    np.testing.assert_allclose([t for _, t in items], [0.2, 0.6, 1.0, 1.4, 1.8])
+
+
+def test_prefetching_matches_source(video_path):
+    expected = read_all(VideoFileSource(video_path, stride=2))
+    assert read_all(PrefetchingSource(VideoFileSource(video_path, stride=2), queue_size=2)) == expected
+
+
+def test_prefetching_release_mid_stream(video_path):
+    source = PrefetchingSource(VideoFileSource(video_path), queue_size=1)
+    with source:
+        frame, _ = source.read()
+        assert frame_index(frame) == 0
+    # 解码线程在队列已满时也能退出
+    assert source.thread is None
+
+
+def test_prefetching_propagates_errors():
+    class Failing(ImageSequenceSource):
+        def read(self):
+            raise RuntimeError('decode failed')
+
+    source = PrefetchingSource(Failing('.'))
+    with pytest.raises(RuntimeError, match='decode failed'):
+        source.read()
+    source.release()
+
+
+def test_open_source_dispatch(video_path, image_dir):
+    assert isinstance(open_source(0), CaptureSource)
+    assert open_source('1').source == 1
+    stream = open_source('rtsp://127.0.0.1:8554/cam', stride=2)
+    assert isinstance(stream, CaptureSource)
+    assert stream.live and stream.stride == 2 and stream.source == 'rtsp://127.0.0.1:8554/cam'
+    assert isinstance(open_source(image_dir, fps=25.0), ImageSequenceSource)
+    assert open_source(image_dir, fps=25.0).fps == 25.0
+    assert isinstance(open_source(video_path), VideoFileSource)
+    source = VideoFileSource(video_path)
+    assert open_source(source) is source
+
+
+def test_capture_source_reads_stream(stream_url):
+    source = open_source(stream_url)
+    assert isinstance(source, CaptureSource)
+    with source:
+        assert source.is_opened()
+        items = []
+        while True:
+            item = source.read()
+            if item is None:
+                break
+            items.append(item)
+    # open() 读掉一帧用于初始化设备
+    assert [frame_index(frame) for frame, _ in items] == list(range(1, FRAME_COUNT))
+    timestamps = [t for _, t in items]
+    assert timestamps == sorted(timestamps)
+    assert source.read_failures == 1
+    assert not source.is_opened()
+
+
+def test_capture_source_stride(stream_url):
+    with CaptureSource(stream_url, stride=5) as source:
+        frame, _ = source.read()
+        assert frame_index(frame) == 5
+        frame, _ = source.read()
+        assert frame_index(frame) == 10
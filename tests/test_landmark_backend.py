@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from frame_pool import FramePool
+from landmark_backend import MOUTH_POINTS, LandmarkBackend, create_backend, map_crop_to_frame
+from mouth_detector import MouthDetector
+
+
+@pytest.fixture
+def facemesh(fake_facemesh):
+    return fake_facemesh()
+
+
+def test_facemesh_full_and_mouth_only(facemesh):
+    frame = np.zeros((48, 64, 3), dtype=np.uint8)
+    full = facemesh.detect(frame)
+    assert full.shape == (478, 3) and full.dtype == np.float32
+    mouth = facemesh.detect(frame, FramePool(2, np.float32), mouth_only=True)
+    assert mouth.shape == (len(MOUTH_POINTS), 3)
+    np.testing.assert_array_equal(mouth, full[facemesh.mouth_indices])
+
+
+def test_facemesh_no_face(fake_facemesh):
+    assert fake_facemesh(faces=[]).detect(np.zeros((4, 4, 3), dtype=np.uint8)) is None
+
+
+def test_create_backend():
+    backend = LandmarkBackend()
+    assert create_backend(backend) is backend
+    with pytest.raises(ValueError):
+        create_backend('nope')
+
+
+def recording(backend):
+    """记录每次 detect 的 mouth_only 参数"""
+    detect = backend.detect
+    backend.calls = []
+
+    def wrapper(rgb_frame, pool=None, mouth_only=False):
+        backend.calls.append(mouth_only)
+        return detect(rgb_frame, pool, mouth_only)
+    backend.detect = wrapper
+    return backend
+
+
+@pytest.mark.parametrize('render, roi_tracking, mouth_only', [
+    (False, False, True),
+    (True, False, False),
+    (False, True, False),
+])
+def test_detector_copies_full_mesh_only_when_needed(fake_facemesh, render, roi_tracking, mouth_only):
+    backend = recording(fake_facemesh())
+    detector = MouthDetector(render=render, roi_tracking=roi_tracking, backend=backend)
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    detector.process_frame(frame, draw=False, timestamp=0.0)
+    measurement = detector.process_frame(frame, draw=False, timestamp=0.1)
+    assert backend.calls[0] is mouth_only
+    assert (detector.last_overlay['landmarks'] is None) == mouth_only
+
+    # 两种路径得到相同的测量值
+    reference = MouthDetector(render=True, backend=fake_facemesh())
+    reference.process_frame(frame, draw=False, timestamp=0.0)
+    expected = reference.process_frame(frame, draw=False, timestamp=0.1)
+    assert measurement == pytest.approx(expected)
+
+
+def test_map_crop_to_frame():
+    points = np.array([[0.0, 0.0, 0.1], [1.0, 0.5, -0.2]], dtype=np.float32)
+    map_crop_to_frame(points, 20, 10, 40, 30, 100, 60)
+    np.testing.assert_allclose(points, [[0.2, 10 / 60, 0.04], [0.6, 25 / 60, -0.08]], rtol=1e-6)
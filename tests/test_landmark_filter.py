@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from landmark_filter import KalmanFilter, OneEuroFilter, create_filter
+
+
+@pytest.mark.parametrize('kind', ['one_euro', 'kalman'])
+def test_first_frame_passes_through(kind):
+    smoother = create_filter(kind)
+    points = np.array([[0.5, 0.5, 0.0]], dtype=np.float32)
+    assert smoother.filter(points.copy(), 0.0).tolist() == points.tolist()
+
+
+@pytest.mark.parametrize('kind', ['one_euro', 'kalman'])
+def test_reduces_jitter(kind):
+    rng = np.random.default_rng(0)
+    smoother = create_filter(kind)
+    noisy = 0.5 + rng.normal(0, 0.002, size=(120, 9, 3))
+    smoothed = np.array([smoother.filter(frame.copy(), i / 30.0) for i, frame in enumerate(noisy)])
+    assert smoothed[30:].std() < noisy[30:].std() * 0.85
+
+
+@pytest.mark.parametrize('kind', ['one_euro', 'kalman'])
+def test_follows_motion_and_predicts(kind):
+    smoother = create_filter(kind)
+    for i in range(60):
+        smoother.filter(np.full((9, 3), 0.01 * i), i / 30.0)
+    # 匀速运动（0.3/秒）时滞后很小，外推沿运动方向
+    out = np.empty((9, 3), dtype=np.float32)
+    predicted = smoother.predict(60 / 30.0, out)
+    assert predicted is out
+    assert out[0, 0] == pytest.approx(0.6, abs=0.02)
+
+
+def test_predict_without_state():
+    assert OneEuroFilter().predict(1.0, np.empty(3)) is None
+    assert KalmanFilter().predict(1.0, np.empty(3)) is None
+
+
+def test_non_increasing_time_restarts():
+    smoother = KalmanFilter()
+    smoother.filter(np.zeros(3), 1.0)
+    points = np.ones(3)
+    assert smoother.filter(points.copy(), 1.0).tolist() == points.tolist()
+
+
+def test_create_filter():
+    assert create_filter(None) is None
+    assert isinstance(create_filter('kalman', process_noise=2.0), KalmanFilter)
+    with pytest.raises(ValueError):
+        create_filter('median')
@@ -0,0 +1,78 @@
+import json
+import socket
+import time
+
+import pytest
+
+from measurement_server import MeasurementServer
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def server():
+    server = MeasurementServer(port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server):
+    sock = socket.create_connection(('127.0.0.1', server.port), timeout=2.0)
+    assert wait_for(lambda: server.get_stats()['clients'])
+    lines = sock.makefile('r', encoding='utf-8')
+    yield sock, lines
+    lines.close()
+    sock.close()
+
+
+def send(sock, text):
+    sock.sendall(text.encode('utf-8') + b'\n')
+
+
+def test_broadcasts_measurements(server, client):
+    _, lines = client
+    server.publish({'frame': 1, 'vertical': 0.2}, {'open': {'count': 1}})
+    message = json.loads(lines.readline())
+    assert message['type'] == 'measurement'
+    assert message['measurement']['frame'] == 1
+    assert message['action_stats']['open']['count'] == 1
+
+
+def test_max_fps_control(server, client):
+    sock, _ = client
+    send(sock, '{"max_fps": 5}')
+    assert wait_for(lambda: server.get_stats()['clients'][0]['max_fps'] == 5.0)
+    send(sock, '{"max_fps": null}')
+    assert wait_for(lambda: server.get_stats()['clients'][0]['max_fps'] is None)
+
+
+@pytest.mark.parametrize('control', ['{"max_fps": "x"}', '{"max_fps": [1]}', '{"max_fps": -3}',
+                                     '{"max_fps": true}', 'not json', '[1, 2]'])
+def test_invalid_control_is_ignored(server, client, control):
+    sock, lines = client
+    send(sock, '{"max_fps": 100}')
+    assert wait_for(lambda: server.get_stats()['clients'][0]['max_fps'] == 100.0)
+    send(sock, control)
+    time.sleep(0.05)
+    assert server.get_stats()['clients'][0]['max_fps'] == 100.0
+    # 读取设置的任务仍在运行，连接仍然可用
+    send(sock, '{"max_fps": 50}')
+    assert wait_for(lambda: server.get_stats()['clients'][0]['max_fps'] == 50.0)
+    server.publish({'frame': 2})
+    assert json.loads(lines.readline())['measurement']['frame'] == 2
+
+
+def test_disconnect_removes_client(server, client):
+    sock, lines = client
+    lines.close()
+    sock.close()
+    assert wait_for(lambda: not server.get_stats()['clients'])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from measurement_store import MeasurementStore
+
+
+def fill(store, count):
+    for i in range(count):
+        store.append({'frame': i + 1, 'vertical': i * 0.1, 'displacement': -i * 0.01})
+
+
+def test_append_and_index():
+    store = MeasurementStore(initial_size=2)
+    fill(store, 5)
+    assert len(store) == 5
+    assert store[0]['frame'] == 1
+    assert store[-1]['vertical'] == pytest.approx(0.4)
+    # 缺失的字段记为 0
+    assert store[2]['horizontal'] == 0
+    assert [m['frame'] for m in store[1:3]] == [2, 3]
+    with pytest.raises(IndexError):
+        store[5]
+
+
+def test_ring_buffer_keeps_latest():
+    store = MeasurementStore(capacity=3)
+    fill(store, 5)
+    assert len(store) == 3
+    assert store.column('frame').tolist() == [3, 4, 5]
+    assert store.max('vertical') == pytest.approx(0.4)
+    assert store.min('displacement') == pytest.approx(-0.04)
+
+
+def test_statistics():
+    store = MeasurementStore()
+    assert store.max('vertical') is None
+    assert store.summary() == {}
+    fill(store, 5)
+    assert store.mean('vertical') == pytest.approx(0.2)
+    assert store.mean('vertical', last=2) == pytest.approx(0.35)
+    np.testing.assert_allclose(store.windowed_mean('vertical', 2), [0.05, 0.15, 0.25, 0.35], rtol=1e-6)
+    assert len(store.windowed_mean('vertical', 6)) == 0
+    summary = store.summary(percentiles=(50,))
+    assert 'frame' not in summary
+    assert summary['vertical']['percentiles'][50] == pytest.approx(0.2)
+
+
+def test_clear():
+    store = MeasurementStore(capacity=3)
+    fill(store, 4)
+    store.clear()
+    assert len(store) == 0
+    fill(store, 1)
+    assert store.column('frame').tolist() == [1]
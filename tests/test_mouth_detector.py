@@ -0,0 +1,164 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from action_stats import OPEN_THRESHOLD
+from landmark_backend import MOUTH_POINTS
+from mouth_detector import MouthDetector
+
+FRAME = np.zeros((120, 160, 3), dtype=np.uint8)
+
+
+def face(cx=0.5, cy=0.5, opening=0.0, spread=0.1):
+    """嘴部中心在 (cx, cy)、上下嘴唇相距 opening、其余点分布在 ±spread 内的人脸"""
+    offsets = np.linspace(-spread, spread, 478)
+    points = [SimpleNamespace(x=cx + dx, y=cy + dy, z=0.0) for dx, dy in zip(offsets, offsets[::-1])]
+    points[MOUTH_POINTS['top_lip']] = SimpleNamespace(x=cx, y=cy - opening / 2, z=0.0)
+    points[MOUTH_POINTS['bottom_lip']] = SimpleNamespace(x=cx, y=cy + opening / 2, z=0.0)
+    return SimpleNamespace(landmark=points)
+
+
+@pytest.fixture
+def make_detector(fake_facemesh):
+    detectors = []
+
+    def make(faces=None, **kwargs):
+        detector = MouthDetector(render=False, backend=fake_facemesh(faces=[face()] if faces is None else faces),
+                                 **kwargs)
+        detectors.append(detector)
+        return detector
+    yield make
+    for detector in detectors:
+        detector.backend.close()
+
+
+def run(detector, faces, t, frame=FRAME):
+    detector.backend.face_mesh.faces = faces
+    return detector.process_frame(frame, is_rgb=True, timestamp=t)
+
+
+def test_reset_action_stats_keeps_calibration(make_detector):
+    detector = make_detector()
+    detector.calibration_mode = 'open'
+    opening = OPEN_THRESHOLD * 1.5
+    run(detector, [face()], 0.0)
+    run(detector, [face(opening=opening)], 0.1)
+    run(detector, [face()], 0.3)
+    assert detector.action_stats['open']['count'] == 1
+
+    detector.reset_action_stats()
+    assert detector.action_stats['open']['count'] == 0
+    assert detector.action_stats['open']['total_time'] == 0
+    assert detector.action_state == 'neutral'
+    # 校准最大值和初始位置保留，训练时的位移仍相对于校准时的位置
+    assert detector.max_open == pytest.approx(opening)
+    assert detector.initial_position is not None
+    assert run(detector, [face(cx=0.6)], 0.4)['displacement'] == pytest.approx(0.1)
+
+
+@pytest.mark.parametrize('roi_tracking', [False, True])
+def test_overlay_survives_buffer_reuse(make_detector, roi_tracking):
+    detector = make_detector(roi_tracking=roi_tracking, full_mesh=True)
+    run(detector, [face()], 0.0)
+    overlay = detector.last_overlay
+    points, landmarks = overlay['points'].copy(), overlay['landmarks'].copy()
+    # 推理线程继续处理，缓冲池中的数组被多次复用
+    for i in range(1, 12):
+        run(detector, [face(cx=0.4, opening=0.05)], i * 0.1)
+    np.testing.assert_array_equal(overlay['points'], points)
+    np.testing.assert_array_equal(overlay['landmarks'], landmarks)
+
+
+def test_skipped_frames_still_return_measurements(make_detector):
+    detector = make_detector(target_fps=30)
+    run(detector, [face(cx=0.5)], 0.0)
+    run(detector, [face(cx=0.52)], 0.1)
+    detector.scheduler.skip_interval = 2
+
+    # 跳过推理的帧没有调用后端，人脸替身的变化不影响结果
+    skipped = run(detector, [], 0.2)
+    assert isinstance(skipped, dict)
+    # 按前两次推理匀速外推
+    assert skipped['displacement'] == pytest.approx(0.04)
+    assert skipped['frame'] == 3
+    assert detector.last_overlay['landmarks'] is None
+    assert detector.get_perf_stats()['counters']['skipped'] == 1
+
+    inferred = run(detector, [face(cx=0.55)], 0.3)
+    assert inferred['displacement'] == pytest.approx(0.05)
+    assert detector.scheduler.get_stats()['skipped'] == 1
+
+
+@pytest.fixture
+def roi_detector(make_detector):
+    """ROI 跟踪模式的检测器，裁剪区域用的 FaceMesh 同样换成替身"""
+    detector = make_detector(roi_tracking=True, target_fps=30)
+    roi_backend = detector.roi_backend
+    roi_backend.face_mesh.close()
+    roi_backend.face_mesh = type(detector.backend.face_mesh)([])
+    yield detector
+    roi_backend.close()
+
+
+def run_roi(detector, full_faces, crop_faces, t):
+    detector.roi_backend.face_mesh.faces = crop_faces
+    return run(detector, full_faces, t)
+
+
+def test_roi_tracks_face_inside_crop(roi_detector):
+    detector = roi_detector
+    run_roi(detector, [face()], [], 0.0)
+    assert detector.full_frame_searches == 1
+    x0, y0, x1, y1 = detector.roi
+    assert x0 <= 0.4 * 160 and x1 >= 0.6 * 160 and y0 <= 0.4 * 120 and y1 >= 0.6 * 120
+
+    # 裁剪区域内检测到的人脸换算回整帧坐标
+    run_roi(detector, [], [face(cx=0.5, cy=0.5)], 0.1)
+    assert (detector.roi_hits, detector.full_frame_searches) == (1, 1)
+    top = detector.last_points[detector.MOUTH_SLOTS['top_lip']]
+    assert top[0] == pytest.approx((x0 + 0.5 * (x1 - x0)) / 160, abs=1e-6)
+    assert top[1] == pytest.approx((y0 + 0.5 * (y1 - y0)) / 120, abs=1e-6)
+
+
+def test_roi_miss_falls_back_to_full_frame(roi_detector):
+    detector = roi_detector
+    run_roi(detector, [face()], [], 0.0)
+    # 裁剪区域内没有人脸，同一帧退回全图搜索
+    assert isinstance(run_roi(detector, [face(cx=0.3)], [], 0.1), dict)
+    assert (detector.roi_hits, detector.full_frame_searches) == (0, 2)
+    assert detector.roi is not None
+
+    # 全图也没有人脸时清除裁剪区域
+    assert run_roi(detector, [], [], 0.2) is None
+    assert detector.roi is None
+    assert detector.full_frame_searches == 3
+
+
+def test_roi_edge_landmarks_fall_back_to_full_frame(roi_detector):
+    detector = roi_detector
+    run_roi(detector, [face()], [], 0.0)
+    roi = detector.roi
+    # 关键点贴近裁剪区域边缘，说明人脸正在离开裁剪区域
+    run_roi(detector, [face(cx=0.6)], [face(cx=0.95)], 0.1)
+    assert (detector.roi_hits, detector.full_frame_searches) == (0, 2)
+    # 裁剪区域按全图检测的结果重新确定
+    assert detector.roi != roi
+    assert detector.last_points[detector.MOUTH_SLOTS['top_lip'], 0] == pytest.approx(0.6)
+
+
+def test_roi_reset_when_inference_scale_changes(roi_detector):
+    detector = roi_detector
+    run_roi(detector, [face()], [], 0.0)
+    run_roi(detector, [], [face()], 0.1)
+    assert detector.roi_hits == 1
+
+    # 调度器降低推理分辨率后，原裁剪区域的像素坐标失效，先做一次全图搜索
+    detector.scheduler.scale_index = 1
+    run_roi(detector, [face()], [face()], 0.2)
+    assert (detector.roi_hits, detector.full_frame_searches) == (1, 2)
+    assert detector.inference_scale == 0.75
+    x0, y0, x1, y1 = detector.roi
+    assert x1 <= 120 and y1 <= 90
+    run_roi(detector, [], [face()], 0.3)
+    assert detector.roi_hits == 2
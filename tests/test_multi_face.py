@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from action_stats import OPEN_THRESHOLD
+from landmark_backend import MOUTH_POINTS
+from multi_face import MultiFaceDetector
+
+FRAME = np.zeros((48, 64, 3), dtype=np.uint8)
+
+
+def face(cx, cy, opening=0.0):
+    """嘴部中心在 (cx, cy)、上下嘴唇相距 opening 的人脸"""
+    points = [SimpleNamespace(x=cx, y=cy, z=0.0) for _ in range(468)]
+    points[MOUTH_POINTS['top_lip']] = SimpleNamespace(x=cx, y=cy - opening / 2, z=0.0)
+    points[MOUTH_POINTS['bottom_lip']] = SimpleNamespace(x=cx, y=cy + opening / 2, z=0.0)
+    return SimpleNamespace(landmark=points)
+
+
+@pytest.fixture
+def detector(fake_facemesh):
+    detector = MultiFaceDetector(max_faces=2)
+    detector.backend.close()
+    detector.backend = fake_facemesh(faces=[], refine_landmarks=False, max_num_faces=2)
+    yield detector
+    detector.close()
+
+
+def run(detector, faces, t):
+    detector.backend.face_mesh.faces = faces
+    return detector.process_frame(FRAME, is_rgb=True, timestamp=t)
+
+
+def test_uses_shared_backend_options(detector):
+    assert detector.backend.options['max_num_faces'] == 2
+    assert not detector.backend.options['refine_landmarks']
+
+
+def test_track_ids_follow_faces(detector):
+    first = run(detector, [face(0.3, 0.5), face(0.7, 0.5)], 0.0)
+    assert [r['track_id'] for r in first] == [0, 1]
+    # 人脸顺序交换、位置略有移动，编号跟随人脸
+    second = run(detector, [face(0.71, 0.5), face(0.31, 0.5)], 0.1)
+    assert [r['track_id'] for r in second] == [1, 0]
+    assert run(detector, [], 0.2) == []
+    assert set(detector.get_track_stats()) == {0, 1}
+
+
+def test_actions_use_shared_thresholds(detector):
+    run(detector, [face(0.3, 0.5), face(0.7, 0.5)], 0.0)
+    opening = OPEN_THRESHOLD * 1.5
+    results = run(detector, [face(0.3, 0.5, opening), face(0.8, 0.5)], 0.1)
+    assert [r['action_state'] for r in results] == ['open', 'right']
+    assert results[0]['vertical'] == pytest.approx(opening)
+    run(detector, [face(0.3, 0.5), face(0.7, 0.5)], 0.4)
+    stats = detector.get_track_stats()
+    assert stats[0]['action_stats']['open']['count'] == 1
+    assert stats[0]['action_stats']['open']['total_time'] == pytest.approx(0.3)
+    assert stats[1]['action_stats']['right']['count'] == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from session_log import SessionReader, SessionRecorder
+
+
+def record(path, count=10, num_points=4):
+    recorder = SessionRecorder(path, num_points)
+    for i in range(count):
+        points = np.arange(num_points * 3, dtype=np.float32).reshape(num_points, 3) + i
+        recorder.write(1000.0 + i * 0.5, {'frame': i + 1, 'vertical': i * 0.1}, points)
+    recorder.close()
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / 'a.mdlg')
+    record(path)
+    reader = SessionReader(path)
+    assert len(reader) == 10
+    # 时间戳相对第一条记录
+    np.testing.assert_allclose(reader.timestamps, np.arange(10) * 0.5)
+    np.testing.assert_allclose(reader.column('vertical'), np.arange(10) * 0.1, rtol=1e-6)
+    assert reader.points.shape == (10, 4, 2)
+    # 只保存 (x, y)
+    assert reader.points[3, 1].tolist() == [6.0, 7.0]
+
+    measurements, points = next(reader.replay())
+    assert measurements['frame'] == 1
+    assert points.shape == (4, 2)
+    reader.close()
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = tmp_path / 'b.mdlg'
+    record(str(path), count=3)
+    with open(path, 'ab') as f:
+        f.write(b'\0' * 6)
+    assert len(SessionReader(str(path))) == 3
+
+
+def test_empty_log(tmp_path):
+    path = str(tmp_path / 'c.mdlg')
+    SessionRecorder(path, 4).close()
+    reader = SessionReader(path)
+    assert len(reader) == 0
+    assert reader.points.shape == (0, 4, 2)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / 'd.mdlg'
+    path.write_bytes(b'x' * 64)
+    with pytest.raises(ValueError):
+        SessionReader(str(path))
+    path.write_bytes(b'MDLG')
+    with pytest.raises(ValueError):
+        SessionReader(str(path))
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from stream import astream_measurements, stream_measurements
+
+
+class FakeDetector:
+    """奇数帧没有检测到人脸"""
+
+    def __init__(self):
+        self.threads = set()
+
+    def process_frame(self, frame, timestamp=None):
+        self.threads.add(threading.get_ident())
+        return None if frame % 2 else {'frame': frame, 'timestamp': timestamp}
+
+
+def slow_frames(count, delay=0.02):
+    for i in range(count):
+        time.sleep(delay)  # 模拟阻塞的摄像头读取或解码
+        yield i, i / 10
+
+
+def failing_frames():
+    yield 0
+    raise IOError('camera lost')
+
+
+@pytest.mark.parametrize('prefetch', [0, 2])
+def test_stream_measurements(prefetch):
+    records = list(stream_measurements(range(6), FakeDetector(), prefetch=prefetch))
+    assert [r['index'] for r in records] == [0, 2, 4]
+    assert records[1]['timestamp'] is None
+
+    records = list(stream_measurements(slow_frames(3, 0), FakeDetector(), prefetch=prefetch,
+                                       skip_missing=False))
+    assert [r['timestamp'] for r in records] == [0.0, 0.1, 0.2]
+    assert records[1]['measurement'] is None
+
+
+def test_stream_measurements_propagates_errors():
+    with pytest.raises(IOError):
+        list(stream_measurements(failing_frames(), FakeDetector(), prefetch=2))
+
+
+async def collect(frames, detector, **kwargs):
+    return [record async for record in astream_measurements(frames, detector, **kwargs)]
+
+
+def test_astream_does_not_block_event_loop():
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.005)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        records = await collect(slow_frames(10), FakeDetector())
+        task.cancel()
+        return records, ticks
+
+    records, ticks = asyncio.run(main())
+    assert [r['index'] for r in records] == [0, 2, 4, 6, 8]
+    # 读取共约 0.2 秒，事件循环未被阻塞时计时任务可运行多次
+    assert ticks >= 10
+
+
+def test_astream_accepts_async_iterables():
+    async def frames():
+        for i in range(4):
+            yield i
+
+    detector = FakeDetector()
+    records = asyncio.run(collect(frames(), detector, skip_missing=False))
+    assert [r['index'] for r in records] == [0, 1, 2, 3]
+    # 检测在线程池中运行
+    assert threading.get_ident() not in detector.threads
+
+
+def test_astream_propagates_errors():
+    with pytest.raises(IOError):
+        asyncio.run(collect(failing_frames(), FakeDetector()))
@@ -0,0 +1,23 @@
+import numpy as np
+
+from video_thread import VideoThread
+
+
+def test_render_loop_never_emits_inference_buffer():
+    # 帧尺寸与显示尺寸相同，不需要缩放
+    thread = VideoThread(detector=None, display_size=(64, 48))
+    emitted = []
+    thread.change_pixmap_signal.connect(emitted.append)
+
+    frame = thread.rgb_pool.acquire((48, 64, 3))
+    frame[:] = 7
+    thread.render_buffer.put((frame, None), 0.0)
+    thread.render_buffer.close()
+    thread.render_loop()
+
+    assert len(emitted) == 1
+    assert not np.shares_memory(emitted[0], frame)
+    # 推理线程随后覆盖 RGB 缓冲区，已发送的帧不受影响
+    frame[:] = 0
+    assert (emitted[0] == 7).all()
+
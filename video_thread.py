@@ -1,27 +1,245 @@
 from PyQt5.QtCore import QThread, pyqtSignal
 import cv2
 import numpy as np
+import threading
+import time
+from collections import deque
+
+from frame_pool import FramePool, LatestFrameBuffer
+from frame_source import open_source
+from overlay_renderer import OverlayRenderer
+from perf_stats import PerfStats
+
 
 class VideoThread(QThread):
-    change_pixmap_signal = pyqtSignal(np.ndarray)
+    change_pixmap_signal = pyqtSignal(np.ndarray)  # 发送 RGB 顺序的帧，界面可直接构造 QImage
     measurement_signal = pyqtSignal(dict)  # 修改为发送字典类型的数据
+    stats_signal = pyqtSignal(dict)  # 定期发送的性能统计，内容同 get_pipeline_stats
+    source_finished_signal = pyqtSignal()  # 视频文件或图片目录播放完毕，线程随即结束
+
+    STATS_INTERVAL = 1.0  # 发送性能统计的间隔（秒）
 
-    def __init__(self, detector):
+    # 已发送但界面尚未显示的帧数上限；超过时丢弃新帧，保证显示缓冲池中的帧不会在显示前被覆盖
+    MAX_PENDING_DISPLAY = 2
+    # 缓冲池大小需覆盖：推理中 1 帧、绘制槽 1 帧、绘制中 1 帧、等待显示的帧。
+    # 发送给界面的总是显示缓冲池中的帧，推理用的 RGB 缓冲区不受界面显示速度约束，不能直接发送
+    POOL_SIZE = MAX_PENDING_DISPLAY + 4
+
+    def __init__(self, detector, camera_index=0, display_size=None, camera=None):
+        """
+        camera_index: 摄像头编号，也可以是视频文件、图片目录或视频流地址（见 frame_source.open_source）
+        camera: 外部持有的帧来源（如保持打开的 CaptureSource），线程结束时不释放；为 None 时线程自己打开并释放
+        """
         super().__init__()
         self.detector = detector
+        self.camera_index = camera_index
+        self.camera = camera
         self.running = True
+        self.active = True  # 暂停时继续采集（保持摄像头工作），但不推理也不发送信号
+
+        # 需要在推理线程中执行的操作（如切换模式），在两帧之间执行，避免与 process_frame 并发修改检测器
+        self._commands = deque()
+
+        # 采集线程与推理线程之间共享的最新帧槽
+        self.frame_buffer = LatestFrameBuffer()
+        # 推理线程与绘制线程之间共享的最新帧槽，绘制跟不上时同样丢弃旧帧
+        self.render_buffer = LatestFrameBuffer()
+        self.renderer = OverlayRenderer(display_size, rgb=True)
+
+        # 颜色只转换一次（BGR -> RGB），转换结果同时用于推理、绘制和显示
+        self.rgb_pool = FramePool(self.POOL_SIZE)
+        self.display_pool = FramePool(self.POOL_SIZE)
+        self.pending_display = 0
+        self.pending_lock = threading.Lock()
+
+        # 采集阶段计数
+        self.captured_frames = 0
+        self.capture_failures = 0
+
+        # 采集等待、绘制、信号发送和界面绘制的耗时统计；推理和测量由检测器自己统计
+        self.perf = PerfStats()
+
+        # 绘制阶段计数
+        self.rendered_frames = 0
+        self.display_dropped = 0  # 界面来不及显示而丢弃的帧数
+
+        # 推理阶段计数
+        self.processed_frames = 0
+        self.last_latency = 0.0  # 最近一帧从采集到推理完成的延迟（秒）
+        self.avg_latency = 0.0
+        self.max_latency = 0.0
+        # 推理线程在发送测量结果前生成的动作统计快照，界面线程只读取，不直接访问检测器
+        self.action_stats = None
+
+    def capture_loop(self, cap):
+        """采集线程：持续读取帧来源并覆盖写入最新帧槽
+
+        视频文件和图片目录按来源时间戳实时播放，读完后停止采集。
+        """
+        first_timestamp = None
+        first_wall = None
+        while self.running:
+            item = cap.read()
+            if item is None:
+                if not cap.live:
+                    break
+                self.capture_failures += 1
+                time.sleep(0.01)
+                continue
+            frame, timestamp = item
+            if not cap.live:
+                if first_timestamp is None:
+                    first_timestamp, first_wall = timestamp, time.monotonic()
+                delay = (timestamp - first_timestamp) - (time.monotonic() - first_wall)
+                if delay > 0:
+                    time.sleep(delay)
+            self.captured_frames += 1
+            # 同时保存来源时间戳；槽的时间戳为采集时刻，用于统计延迟
+            self.frame_buffer.put((frame, timestamp), time.monotonic())
+        self.frame_buffer.close()
+
+    def render_loop(self):
+        """绘制线程：在推理线程之外把检测结果画到帧上并发送给界面"""
+        while self.running:
+            item = self.render_buffer.get(timeout=0.1)
+            if item is None:
+                if self.render_buffer.is_closed():
+                    break
+                continue
+            (frame, overlay), _ = item
+
+            with self.pending_lock:
+                if self.pending_display >= self.MAX_PENDING_DISPLAY:
+                    self.display_dropped += 1
+                    continue
+                self.pending_display += 1
+
+            # 缩放到显示尺寸在绘制线程完成，写入预分配的缓冲区；不需要缩放时同样复制一份，
+            # 推理线程会继续复用 rgb_pool 中的缓冲区，界面显示前可能被下一帧覆盖
+            with self.perf.timer('drawing'):
+                size = self.renderer.target_size(frame)
+                if size is not None:
+                    dst = self.display_pool.acquire((size[1], size[0], 3))
+                else:
+                    dst = self.display_pool.acquire(frame.shape)
+                    np.copyto(dst, frame)
+                    frame = dst
+                frame = self.renderer.render(frame, overlay, dst=dst)
+            with self.perf.timer('pixmap_emit'):
+                self.change_pixmap_signal.emit(frame)
+            self.rendered_frames += 1
+
+    def frame_displayed(self, paint_time=None):
+        """界面显示完一帧后调用，释放一个等待显示的名额；paint_time 为界面绘制耗时（秒）"""
+        if paint_time is not None:
+            self.perf.record('gui_paint', paint_time)
+        with self.pending_lock:
+            self.pending_display = max(self.pending_display - 1, 0)
 
     def run(self):
-        cap = cv2.VideoCapture(0)
+        owns_camera = self.camera is None
+        cap = open_source(self.camera_index) if owns_camera else self.camera
+        cap.open()
+
+        capture_thread = threading.Thread(target=self.capture_loop, args=(cap,), daemon=True)
+        capture_thread.start()
+        render_thread = threading.Thread(target=self.render_loop, daemon=True)
+        render_thread.start()
+
+        last_stats_time = time.monotonic()
         while self.running:
-            ret, frame = cap.read()
-            if ret:
-                measurement = self.detector.process_frame(frame)
-                if measurement is not None:
+            wait_start = time.perf_counter()
+            item = self.frame_buffer.get(timeout=0.1)
+            self.run_commands()
+            if item is None and self.frame_buffer.is_closed():
+                # 非实时来源已读完，关闭的缓冲区不会再阻塞，继续循环只会空转
+                if self.running:
+                    self.source_finished_signal.emit()
+                break
+            if item is None or not self.active:
+                continue
+            self.perf.record('capture_wait', time.perf_counter() - wait_start)
+            (frame, source_time), captured_at = item
+
+            rgb_frame = self.rgb_pool.acquire(frame.shape)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_frame)
+
+            measurement = self.detector.process_frame(rgb_frame, draw=False, is_rgb=True, timestamp=source_time)
+            if measurement is not None:
+                self.action_stats = self.detector.action_stats
+                with self.perf.timer('signal_emit'):
                     self.measurement_signal.emit(measurement)
-                self.change_pixmap_signal.emit(frame)
-        cap.release()
+            self.render_buffer.put((rgb_frame, self.detector.last_overlay), captured_at)
+
+            now = time.monotonic()
+            self.update_latency(now - captured_at)
+            self.perf.record('latency', now - captured_at)
+            if now - last_stats_time >= self.STATS_INTERVAL:
+                last_stats_time = now
+                self.stats_signal.emit(self.get_pipeline_stats())
+
+        self.frame_buffer.close()
+        self.render_buffer.close()
+        capture_thread.join()
+        render_thread.join()
+        if owns_camera:
+            cap.release()
+
+    def submit(self, command):
+        """在推理线程的两帧之间执行 command；线程未运行时立即执行"""
+        if not self.isRunning():
+            command()
+            return
+        self._commands.append(command)
+
+    def run_commands(self):
+        """执行所有待处理的操作"""
+        while self._commands:
+            self._commands.popleft()()
+
+    def pause(self):
+        """暂停推理和显示，摄像头和线程保持运行"""
+        self.active = False
+
+    def resume(self):
+        """恢复推理和显示"""
+        self.active = True
+
+    def update_latency(self, latency):
+        """更新推理阶段的处理帧数和端到端延迟统计"""
+        self.processed_frames += 1
+        self.last_latency = latency
+        self.avg_latency += (latency - self.avg_latency) / self.processed_frames
+        self.max_latency = max(self.max_latency, latency)
+
+    def get_pipeline_stats(self):
+        """获取采集、推理和绘制各阶段的计数，以及各环节的耗时直方图"""
+        perf = self.perf.snapshot()
+        detector_perf = self.detector.get_perf_stats()
+        perf['stages'].update(detector_perf['stages'])
+        perf['counters'].update(detector_perf['counters'])
+        return {
+            'perf': perf,
+            'capture': {
+                'captured': self.captured_frames,
+                'dropped': self.frame_buffer.dropped_count,
+                'failures': self.capture_failures
+            },
+            'inference': {
+                'processed': self.processed_frames,
+                'last_latency': self.last_latency,
+                'avg_latency': self.avg_latency,
+                'max_latency': self.max_latency
+            },
+            'render': {
+                'rendered': self.rendered_frames,
+                'dropped': self.render_buffer.dropped_count,
+                'display_dropped': self.display_dropped
+            }
+        }
 
     def stop(self):
         self.running = False
-        self.wait()
\ No newline at end of file
+        self.frame_buffer.close()
+        self.render_buffer.close()
+        self.wait()